@@ -0,0 +1,114 @@
+# Copyright Elasticsearch B.V. and/or licensed to Elasticsearch B.V. under one
+# or more contributor license agreements. Licensed under the Elastic License
+# 2.0; you may not use this file except in compliance with the Elastic License
+# 2.0.
+
+"""CLI for running the benchmarks and comparing git refs."""
+
+import os
+import tempfile
+from pathlib import Path
+
+import click
+from eql.table import Table  # type: ignore[reportMissingTypeStubs]
+
+from detection_rules.utils import add_params
+
+from .runner import (
+    CORPORA_ENV,
+    MULTIPLIER_ENV,
+    BenchmarkResults,
+    compare_results,
+    run_at_ref,
+    run_benchmarks,
+)
+
+REMOTE_ESQL_VALIDATION_ENV = "DR_REMOTE_ESQL_VALIDATION"
+
+suite_options = [
+    click.Option(["--bench", "-b", "pattern"], help="Only run benchmarks with names matching this regex"),
+    click.Option(
+        ["--corpus", "-c", "corpora"],
+        multiple=True,
+        type=click.Choice(["real", "synthetic"]),
+        help="Rule corpora to run against (default: all)",
+    ),
+    click.Option(["--multiplier", "-m"], type=click.IntRange(min=1), help="Rule copies in the synthetic corpus"),
+    click.Option(["--repeat", "-r"], type=click.IntRange(min=1), help="Timed runs of each benchmark"),
+]
+
+
+def suite_args(pattern: str | None, corpora: tuple[str, ...], multiplier: int | None, repeat: int | None) -> list[str]:
+    args = [arg for corpus in corpora for arg in ("--corpus", corpus)]
+    for name, value in (("--bench", pattern), ("--multiplier", multiplier), ("--repeat", repeat)):
+        if value is not None:
+            args.extend([name, str(value)])
+    return args
+
+
+@click.group(context_settings={"help_option_names": ["-h", "--help"]})
+def cli() -> None:
+    """Benchmarks for the rule pipeline."""
+
+
+@cli.command("run")
+@add_params(*suite_options)
+@click.option("--output", "-o", type=Path, help="Save the timings as JSON")
+def run(
+    pattern: str | None, corpora: tuple[str, ...], multiplier: int | None, repeat: int | None, output: Path | None
+) -> BenchmarkResults:
+    """Run the benchmarks against the code in this environment."""
+    # the corpora are read when the benchmark modules are imported
+    if corpora:
+        os.environ[CORPORA_ENV] = ",".join(corpora)
+    if multiplier:
+        os.environ[MULTIPLIER_ENV] = str(multiplier)
+    # benchmark the local ES|QL validation only
+    _ = os.environ.pop(REMOTE_ESQL_VALIDATION_ENV, None)
+
+    def echo(name: str, times: list[float]) -> None:
+        click.echo(f"{name}: best {min(times):.4f}s of {len(times)}")
+
+    results = run_benchmarks(pattern, repeat, echo)
+    if output:
+        results.save(output)
+    return results
+
+
+@cli.command("compare")
+@click.argument("baseline")
+@click.argument("contender", default="HEAD")
+@add_params(*suite_options)
+@click.option(
+    "--threshold", "-t", type=click.FloatRange(min=1), default=1.1, show_default=True, help="Ratio to flag changes"
+)
+def compare(  # noqa: PLR0913, PLR0917
+    baseline: str,
+    contender: str,
+    pattern: str | None,
+    corpora: tuple[str, ...],
+    multiplier: int | None,
+    repeat: int | None,
+    threshold: float,
+) -> None:
+    """Run the benchmarks against two git refs and compare their best times."""
+    args = suite_args(pattern, corpora, multiplier, repeat)
+    with tempfile.TemporaryDirectory(prefix="detection-rules-benchmark-") as tmp_dir:
+        before = run_at_ref(baseline, Path(tmp_dir), args)
+        after = run_at_ref(contender, Path(tmp_dir), args)
+
+    rows = [
+        {
+            **row,
+            "before": f"{row['before']:.4f}",
+            "after": f"{row['after']:.4f}",
+            "ratio": f"{row['ratio']:.2f}",
+        }
+        for row in compare_results(before, after, threshold)
+    ]
+    fields = ["benchmark", "before", "after", "ratio", "change"]
+    click.echo(f"{baseline} -> {contender}\n{Table.from_list(fields, rows)}")  # type: ignore[reportUnknownMemberType]
+
+
+if __name__ == "__main__":
+    cli()
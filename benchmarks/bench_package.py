@@ -0,0 +1,49 @@
+# Copyright Elasticsearch B.V. and/or licensed to Elasticsearch B.V. under one
+# or more contributor license agreements. Licensed under the Elastic License
+# 2.0; you may not use this file except in compliance with the Elastic License
+# 2.0.
+
+"""Benchmarks for version locking and packaging rules."""
+
+import shutil
+from typing import TYPE_CHECKING
+
+from detection_rules.packaging import RELEASE_DIR, Package
+from detection_rules.version_lock import loaded_version_lock
+
+from .corpus import CORPORA, get_corpus
+
+if TYPE_CHECKING:
+    from detection_rules.rule_loader import RuleCollection
+
+PACKAGE_NAME = "benchmark"
+
+
+class ManageVersions:
+    """Compute version lock changes for every rule, without saving them."""
+
+    params = (CORPORA,)
+    param_names = ("corpus",)
+
+    def setup(self, corpus: str) -> None:
+        self.rules: RuleCollection = get_corpus(corpus)
+
+    def time_manage_versions(self, _corpus: str) -> None:
+        _ = loaded_version_lock.manage_versions(self.rules, save_changes=False, verbose=False)
+
+
+class SavePackage:
+    """Save a package of every rule, without release artifacts."""
+
+    params = (CORPORA,)
+    param_names = ("corpus",)
+    repeat = 3
+
+    def setup(self, corpus: str) -> None:
+        self.package = Package(get_corpus(corpus), PACKAGE_NAME, verbose=False)
+
+    def teardown(self, _corpus: str) -> None:
+        shutil.rmtree(RELEASE_DIR / PACKAGE_NAME, ignore_errors=True)
+
+    def time_save(self, _corpus: str) -> None:
+        self.package.save(verbose=False)
@@ -0,0 +1,80 @@
+# Copyright Elasticsearch B.V. and/or licensed to Elasticsearch B.V. under one
+# or more contributor license agreements. Licensed under the Elastic License
+# 2.0; you may not use this file except in compliance with the Elastic License
+# 2.0.
+
+"""Benchmarks for loading, validating, hashing and converting rules."""
+
+import kql  # type: ignore[reportMissingTypeStubs]
+
+from detection_rules.rule import TOMLRule, TOMLRuleContents
+from detection_rules.utils import clear_caches
+
+from .corpus import CORPORA, get_corpus, load_corpus
+
+
+class LoadRules:
+    """Load and validate every rule of the corpus from disk."""
+
+    params = (CORPORA,)
+    param_names = ("corpus",)
+    repeat = 3
+
+    def setup(self, corpus: str) -> None:
+        # build the synthetic corpus outside of the timed run
+        _ = get_corpus(corpus)
+        clear_caches()
+
+    def time_load(self, corpus: str) -> None:
+        _ = load_corpus(corpus)
+
+
+class ValidateQueries:
+    """Validate the queries of every rule of a language, with the local validators only."""
+
+    params = (CORPORA, ("kuery", "eql", "esql"))
+    param_names = ("corpus", "language")
+
+    def setup(self, corpus: str, language: str) -> None:
+        self.rules: list[TOMLRule] = [r for r in get_corpus(corpus) if r.contents.data.get("language") == language]
+
+    def time_validate(self, _corpus: str, _language: str) -> None:
+        for rule in self.rules:
+            rule.contents.data.validate_query(rule.contents.metadata)
+
+
+class ParseKQL:
+    """Parse the query of every KQL rule."""
+
+    params = (CORPORA,)
+    param_names = ("corpus",)
+
+    def setup(self, corpus: str) -> None:
+        self.queries: list[str] = [
+            r.contents.data.query  # type: ignore[reportAttributeAccessIssue]
+            for r in get_corpus(corpus)
+            if r.contents.data.get("language") == "kuery" and r.contents.data.get("query")
+        ]
+
+    def time_parse(self, _corpus: str) -> None:
+        for query in self.queries:
+            _ = kql.parse(query)  # type: ignore[reportUnknownMemberType]
+
+
+class ConvertRules:
+    """Hash every rule and convert it to the API format."""
+
+    params = (CORPORA,)
+    param_names = ("corpus",)
+
+    def setup(self, corpus: str) -> None:
+        self.rules = get_corpus(corpus).rules
+        TOMLRuleContents.get_hash.clear()  # type: ignore[reportFunctionMemberAccess]
+
+    def time_get_hash(self, _corpus: str) -> None:
+        for rule in self.rules:
+            _ = rule.contents.get_hash()
+
+    def time_to_api_format(self, _corpus: str) -> None:
+        for rule in self.rules:
+            _ = rule.contents.to_api_format()
@@ -0,0 +1,77 @@
+# Copyright Elasticsearch B.V. and/or licensed to Elasticsearch B.V. under one
+# or more contributor license agreements. Licensed under the Elastic License
+# 2.0; you may not use this file except in compliance with the Elastic License
+# 2.0.
+
+"""Rule corpora to benchmark: the real rules tree, and a synthetic corpus enlarged from it."""
+
+import atexit
+import os
+import shutil
+import tempfile
+import uuid
+from pathlib import Path
+from typing import Any
+
+import pytoml  # type: ignore[reportMissingTypeStubs]
+
+from detection_rules.rule_formatter import toml_write
+from detection_rules.rule_loader import DEFAULT_PREBUILT_BBR_DIRS, DEFAULT_PREBUILT_RULES_DIRS, RuleCollection
+
+from .runner import CORPORA_ENV, MULTIPLIER_ENV
+
+CORPORA = tuple(os.getenv(CORPORA_ENV, "real,synthetic").split(","))
+MULTIPLIER = int(os.getenv(MULTIPLIER_ENV, "10"))
+
+_synthetic_dir: Path | None = None
+_collections: dict[str, RuleCollection] = {}
+
+
+def build_synthetic_corpus(directory: Path, multiplier: int = MULTIPLIER) -> list[Path]:
+    """Write every rule `multiplier` times, with new IDs, names and file names for each copy."""
+    paths: list[Path] = []
+    for rules_dir in DEFAULT_PREBUILT_RULES_DIRS + DEFAULT_PREBUILT_BBR_DIRS:
+        for path in sorted(rules_dir.rglob("*.toml")):
+            contents: dict[str, Any] = pytoml.loads(path.read_text())  # type: ignore[reportUnknownMemberType]
+            if contents["metadata"].get("maturity") == "deprecated":
+                continue
+
+            rule = contents["rule"]
+            rule_id, name = rule["rule_id"], rule["name"]
+            for copy in range(multiplier):
+                rule["rule_id"] = str(uuid.uuid5(uuid.NAMESPACE_OID, f"{rule_id}-{copy}")) if copy else rule_id
+                rule["name"] = f"{name} ({copy})" if copy else name
+                out_path = directory / f"{path.stem}_{copy}.toml"
+                toml_write(contents, out_path)
+                paths.append(out_path)
+    return paths
+
+
+def get_directories(corpus: str) -> list[Path]:
+    """Get the rule directories of a corpus."""
+    global _synthetic_dir  # noqa: PLW0603
+
+    if corpus == "real":
+        return DEFAULT_PREBUILT_RULES_DIRS + DEFAULT_PREBUILT_BBR_DIRS
+    if corpus != "synthetic":
+        raise ValueError(f"Unknown corpus: {corpus}")
+
+    if _synthetic_dir is None:
+        _synthetic_dir = Path(tempfile.mkdtemp(prefix="detection-rules-benchmark-"))
+        _ = atexit.register(shutil.rmtree, _synthetic_dir, ignore_errors=True)
+        _ = build_synthetic_corpus(_synthetic_dir)
+    return [_synthetic_dir]
+
+
+def load_corpus(corpus: str) -> RuleCollection:
+    """Load a fresh collection of the corpus rules, bypassing the default collection."""
+    collection = RuleCollection()
+    collection.load_directories(get_directories(corpus))
+    return collection
+
+
+def get_corpus(corpus: str) -> RuleCollection:
+    """Get the collection of the corpus rules, loading it once."""
+    if corpus not in _collections:
+        _collections[corpus] = load_corpus(corpus)
+    return _collections[corpus]
@@ -0,0 +1,168 @@
+# Copyright Elasticsearch B.V. and/or licensed to Elasticsearch B.V. under one
+# or more contributor license agreements. Licensed under the Elastic License
+# 2.0; you may not use this file except in compliance with the Elastic License
+# 2.0.
+
+"""Discover, run and compare benchmarks.
+
+Benchmarks are written in the style of asv: classes in the `bench_*` modules of this package with `time_*` methods.
+A class may define `params` and `param_names`, to run every method for each combination of parameters, `setup` and
+`teardown` methods, called with the parameters around every timed run, and `repeat`, the number of timed runs.
+"""
+
+import importlib
+import inspect
+import itertools
+import json
+import os
+import pkgutil
+import re
+import shutil
+import statistics
+import subprocess
+import sys
+import time
+from collections.abc import Callable, Iterator
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+BENCHMARKS_DIR = Path(__file__).resolve().parent
+REPO_DIR = BENCHMARKS_DIR.parent
+DEFAULT_REPEAT = 5
+CORPORA_ENV = "DR_BENCHMARK_CORPORA"
+MULTIPLIER_ENV = "DR_BENCHMARK_MULTIPLIER"
+
+
+@dataclass
+class Benchmark:
+    """A benchmark method of a class, for one combination of parameters."""
+
+    name: str
+    cls: type
+    method: str
+    params: tuple[Any, ...] = ()
+
+    def run(self, repeat: int | None = None) -> list[float]:
+        """Time the benchmark, calling setup and teardown around each run."""
+        instance = self.cls()
+        setup: Callable[..., None] | None = getattr(instance, "setup", None)
+        teardown: Callable[..., None] | None = getattr(instance, "teardown", None)
+
+        times: list[float] = []
+        for _ in range(repeat or getattr(self.cls, "repeat", DEFAULT_REPEAT)):
+            if setup:
+                setup(*self.params)
+            start = time.perf_counter()
+            getattr(instance, self.method)(*self.params)
+            times.append(time.perf_counter() - start)
+            if teardown:
+                teardown(*self.params)
+        return times
+
+
+@dataclass
+class BenchmarkResults:
+    """Timings of every benchmark run, in seconds."""
+
+    ref: str | None = None
+    times: dict[str, list[float]] = field(default_factory=dict)
+
+    def best(self, name: str) -> float:
+        return min(self.times[name])
+
+    def median(self, name: str) -> float:
+        return statistics.median(self.times[name])
+
+    def save(self, path: Path) -> None:
+        _ = path.write_text(json.dumps({"ref": self.ref, "times": self.times}, indent=2, sort_keys=True))
+
+    @classmethod
+    def load(cls, path: Path) -> "BenchmarkResults":
+        return cls(**json.loads(path.read_text()))
+
+
+def discover(pattern: str | None = None) -> Iterator[Benchmark]:
+    """Find the benchmarks with names matching a regex, importing the benchmark modules."""
+    for module_info in sorted(pkgutil.iter_modules([str(BENCHMARKS_DIR)]), key=lambda m: m.name):
+        if not module_info.name.startswith("bench_"):
+            continue
+
+        module = importlib.import_module(f".{module_info.name}", __package__)
+        for cls_name, cls in inspect.getmembers(module, inspect.isclass):
+            if cls.__module__ != module.__name__:
+                continue
+
+            methods = sorted(m for m in dir(cls) if m.startswith("time_"))
+            for method, params in itertools.product(methods, itertools.product(*getattr(cls, "params", ()))):
+                name = f"{module_info.name}.{cls_name}.{method}"
+                if params:
+                    name += f"({', '.join(map(str, params))})"
+                if pattern is None or re.search(pattern, name):
+                    yield Benchmark(name, cls, method, params)
+
+
+def run_benchmarks(
+    pattern: str | None = None,
+    repeat: int | None = None,
+    callback: Callable[[str, list[float]], None] | None = None,
+) -> BenchmarkResults:
+    """Run every matching benchmark."""
+    results = BenchmarkResults()
+    for benchmark in discover(pattern):
+        results.times[benchmark.name] = benchmark.run(repeat)
+        if callback:
+            callback(benchmark.name, results.times[benchmark.name])
+    return results
+
+
+def git_executable() -> str:
+    """Get the path of the git executable, which is needed to check out the code of other refs."""
+    git = shutil.which("git")
+    if not git:
+        raise RuntimeError("git is required to run the benchmarks against a ref")
+    return git
+
+
+def run_at_ref(ref: str, work_dir: Path, args: list[str]) -> BenchmarkResults:
+    """Run the current benchmarks against the code of a git ref, checked out in a temporary worktree."""
+    worktree = work_dir / re.sub(r"[^\w.-]+", "_", ref)
+    suite_dir = work_dir / "suite"
+    output = work_dir / f"{worktree.name}.json"
+
+    if not suite_dir.exists():
+        # run a copy of the suite, so that every ref is measured by the same benchmarks
+        ignore = shutil.ignore_patterns("__pycache__")
+        _ = shutil.copytree(BENCHMARKS_DIR, suite_dir / BENCHMARKS_DIR.name, ignore=ignore)
+
+    git = git_executable()
+    _ = subprocess.run([git, "worktree", "add", "--detach", str(worktree), ref], cwd=REPO_DIR, check=True)
+    try:
+        # the suite directory comes first on sys.path, then the checked out packages before any installed ones
+        python_path = [worktree, worktree / "lib" / "kql", worktree / "lib" / "kibana"]
+        env = {**os.environ, "PYTHONPATH": os.pathsep.join([*map(str, python_path), os.getenv("PYTHONPATH", "")])}
+        _ = subprocess.run(
+            [sys.executable, "-m", BENCHMARKS_DIR.name, "run", "--output", str(output), *args],
+            cwd=suite_dir,
+            env=env,
+            check=True,
+        )
+    finally:
+        _ = subprocess.run([git, "worktree", "remove", "--force", str(worktree)], cwd=REPO_DIR, check=False)
+
+    results = BenchmarkResults.load(output)
+    results.ref = ref
+    return results
+
+
+def compare_results(
+    baseline: BenchmarkResults, contender: BenchmarkResults, threshold: float = 1.1
+) -> list[dict[str, Any]]:
+    """Compare the best times of the benchmarks run in both results, flagging changes beyond the ratio threshold."""
+    rows: list[dict[str, Any]] = []
+    for name in sorted(set(baseline.times) & set(contender.times)):
+        before, after = baseline.best(name), contender.best(name)
+        ratio = after / before if before else float("inf")
+        change = "slower" if ratio > threshold else "faster" if ratio < 1 / threshold else ""
+        rows.append({"benchmark": name, "before": before, "after": after, "ratio": ratio, "change": change})
+    return rows
@@ -5,23 +5,27 @@
 
 """Detection rules."""
 
-from . import (
-    custom_rules,
-    custom_schemas,
-    devtools,
-    docs,
-    eswrap,
-    ghwrap,
-    kbwrap,
-    main,
-    misc,
-    ml,
-    navigator,
-    rule_formatter,
-    rule_loader,
-    schemas,
-    utils,
-)
+import importlib
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from . import (
+        custom_rules,
+        custom_schemas,
+        devtools,
+        docs,
+        eswrap,
+        ghwrap,
+        kbwrap,
+        main,
+        misc,
+        ml,
+        navigator,
+        rule_formatter,
+        rule_loader,
+        schemas,
+        utils,
+    )
 
 __all__ = (
     "custom_rules",
@@ -40,3 +44,10 @@ __all__ = (
     "schemas",
     "utils",
 )
+
+
+def __getattr__(name: str) -> Any:
+    """Import submodules on first access, so importing the package does not load every command."""
+    if name in __all__:
+        return importlib.import_module(f".{name}", __name__)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,189 @@
+# Copyright Elasticsearch B.V. and/or licensed to Elasticsearch B.V. under one
+# or more contributor license agreements. Licensed under the Elastic License
+# 2.0; you may not use this file except in compliance with the Elastic License
+# 2.0.
+
+"""Find the rules which are affected by the changes since a git ref."""
+
+import fnmatch
+import gzip
+import json
+import shutil
+import subprocess
+from collections.abc import Callable, Iterable
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+from . import utils
+from .config import parse_rules_config
+from .rule import DictRule
+from .rule_loader import DEFAULT_PREBUILT_BBR_DIRS, DEFAULT_PREBUILT_RULES_DIRS, RawRuleCollection
+
+RULES_CONFIG = parse_rules_config()
+CODE_DIR = Path(__file__).resolve().parent
+INTEGRATION_SCHEMAS_FILE = utils.get_etc_path(["integration-schemas.json.gz"])
+INTEGRATION_MANIFESTS_FILE = utils.get_etc_path(["integration-manifests.json.gz"])
+NON_ECS_SCHEMA_FILE = utils.get_etc_path(["non-ecs-schema.json"])
+
+# changes to these files are resolved to individual rules, any other change to the code or etc/ affects every rule
+KEYED_FILES = (
+    INTEGRATION_SCHEMAS_FILE,
+    INTEGRATION_MANIFESTS_FILE,
+    NON_ECS_SCHEMA_FILE,
+    RULES_CONFIG.version_lock_file,
+    RULES_CONFIG.deprecated_rules_file,
+)
+GLOBAL_FILES = (
+    RULES_CONFIG.packages_file,
+    RULES_CONFIG.stack_schema_map_file,
+    utils.get_path(["pyproject.toml"]),
+)
+GLOBAL_DIRS = (CODE_DIR, utils.get_path(["lib"]))
+
+
+@dataclass
+class AffectedRules:
+    """Rules which need to be validated again because of the changes since a git ref."""
+
+    since: str
+    paths: set[Path] = field(default_factory=set)  # type: ignore[reportUnknownVariableType]
+    reasons: dict[Path, list[str]] = field(default_factory=dict)  # type: ignore[reportUnknownVariableType]
+    global_changes: list[Path] = field(default_factory=list)  # type: ignore[reportUnknownVariableType]
+
+    @property
+    def validate_all(self) -> bool:
+        """Whether a change affects every rule, such as a change to the code, the ECS schemas or the stack map."""
+        return bool(self.global_changes)
+
+    def add(self, path: Path, reason: str) -> None:
+        """Mark a rule file as affected."""
+        self.paths.add(path)
+        self.reasons.setdefault(path, []).append(reason)
+
+
+def _is_relative_to_any(path: Path, directories: Iterable[Path]) -> bool:
+    return any(path.is_relative_to(directory) for directory in directories)
+
+
+def _load_json(raw: bytes, path: Path) -> dict[str, Any]:
+    if not raw:
+        return {}
+    if path.suffix == ".gz":
+        raw = gzip.decompress(raw)
+    return json.loads(raw)
+
+
+def _changed_keys(old: dict[str, Any], new: dict[str, Any]) -> set[str]:
+    """Get the top-level keys which were added, removed or changed between two dicts."""
+    return {key for key in old.keys() | new.keys() if old.get(key) != new.get(key)}
+
+
+def _rule_packages(rule: DictRule) -> set[str]:
+    """Get the integration packages a raw rule is validated against."""
+    integration: str | list[str] | None = rule.metadata.get("integration")
+    packages = set(utils.ensure_list_of_strings(integration or []))
+    rule_data = rule.contents.get("rule", {})
+    packages.update(related["package"] for related in rule_data.get("related_integrations", []) if "package" in related)
+    return packages
+
+
+def _rule_indices(rule: DictRule) -> list[str]:
+    return rule.contents.get("rule", {}).get("index") or []
+
+
+def _index_matches(index: str, patterns: Iterable[str]) -> bool:
+    return any(fnmatch.fnmatch(index, pattern) or fnmatch.fnmatch(pattern, index) for pattern in patterns)
+
+
+def get_changed_files(since: str) -> list[Path]:
+    """Get the files which changed since a git ref, including uncommitted and untracked files."""
+    git = utils.make_git()
+    top_level = Path(git("rev-parse", "--show-toplevel"))
+
+    names = git("diff", "--name-only", "--no-renames", since, "--").splitlines()
+    names.extend(git("ls-files", "--others", "--exclude-standard").splitlines())
+    return sorted({(top_level / name).resolve() for name in names if name})
+
+
+def git_show_bytes(ref: str, path: Path) -> bytes:
+    """Get the raw contents of a file at a git ref, or nothing if it did not exist."""
+    git = utils.make_git()
+    top_level = Path(git("rev-parse", "--show-toplevel"))
+    show_args = ["show", f"{ref}:{path.relative_to(top_level).as_posix()}"]
+    try:
+        # `make_git` decodes the output, which would corrupt the compressed schemas
+        return subprocess.check_output(
+            [shutil.which("git") or "git", "-C", str(top_level), *show_args],
+            stderr=subprocess.DEVNULL,
+        )
+    except subprocess.CalledProcessError:
+        return b""
+
+
+def read_bytes(path: Path) -> bytes:
+    """Get the raw contents of a file in the working tree, or nothing if it was deleted."""
+    return path.read_bytes() if path.exists() else b""
+
+
+def get_affected_rules(
+    since: str,
+    rules: RawRuleCollection | None = None,
+    changed_files: list[Path] | None = None,
+) -> AffectedRules:
+    """Find the rules affected by the changes since a git ref.
+
+    A rule is affected when its own file changed, when its entry in the version lock or deprecated rules changed, or
+    when the schemas of one of its integrations or indices changed. Changes to the code, the ECS, beats or endgame
+    schemas, or the stack and package config affect every rule.
+    """
+    rule_dirs = [d.resolve() for d in DEFAULT_PREBUILT_RULES_DIRS + DEFAULT_PREBUILT_BBR_DIRS]
+    keyed_files = {p.resolve(): p for p in KEYED_FILES if p}
+    global_files = {p.resolve() for p in GLOBAL_FILES if p}
+    global_dirs = [d.resolve() for d in GLOBAL_DIRS]
+
+    affected = AffectedRules(since=since)
+    changed_files = get_changed_files(since) if changed_files is None else changed_files
+    changed_keyed: list[Path] = []
+
+    for path in changed_files:
+        if path.suffix == ".toml" and _is_relative_to_any(path, rule_dirs):
+            if path.exists():
+                affected.add(path, "rule file changed")
+        elif path in keyed_files:
+            changed_keyed.append(path)
+        elif path in global_files or _is_relative_to_any(path, global_dirs):
+            affected.global_changes.append(path)
+
+    if affected.validate_all or not changed_keyed:
+        return affected
+
+    if rules is None:
+        rules = RawRuleCollection(ext_patterns=["*.toml"])
+        rules.load_directories(rule_dirs)
+    all_rules = [*rules.rules, *rules.deprecated.rules]
+
+    def mark(keys: set[str], reason: str, matches: Callable[[DictRule, set[str]], bool]) -> None:
+        for rule in all_rules:
+            if rule.path is not None and matches(rule, keys):
+                affected.add(rule.path.resolve(), reason)
+
+    for path in changed_keyed:
+        old = _load_json(git_show_bytes(since, path), path)
+        new = _load_json(read_bytes(path), path)
+        keys = _changed_keys(old, new)
+        if not keys:
+            continue
+
+        if path in (INTEGRATION_SCHEMAS_FILE.resolve(), INTEGRATION_MANIFESTS_FILE.resolve()):
+            mark(keys, f"integration changed in {path.name}", lambda r, k: bool(_rule_packages(r) & k))
+        elif path == NON_ECS_SCHEMA_FILE.resolve():
+            mark(
+                keys,
+                f"index schema changed in {path.name}",
+                lambda r, k: any(_index_matches(index, k) for index in _rule_indices(r)),
+            )
+        else:
+            mark(keys, f"entry changed in {path.name}", lambda r, k: r.id in k)
+
+    return affected
@@ -5,11 +5,14 @@
 
 """Mitre attack info."""
 
+import contextlib
+import hashlib
 import json
 import os
 import re
 import time
 from collections import OrderedDict
+from collections.abc import Callable
 from dataclasses import dataclass, field
 from pathlib import Path
 from typing import Any, cast
@@ -34,8 +37,23 @@ TECHNIQUES_REDIRECT_FILE = get_etc_path(["attack-technique-redirects.json"])
 ATTACK_VERSION_MAPS_DIRNAME = "attack-version-maps"
 # Stack at which ATT&CK v19 becomes the default shipped threat mapping (emit transform gate).
 MITRE_V19_MIN_STACK = Version(9, 5, 0)
+# STIX fields of tactics and techniques kept in the lookup index
+INDEX_OBJECT_FIELDS = ("type", "name", "kill_chain_phases", "revoked", "x_mitre_deprecated")
 
-tactics_map: dict[str, Any] = {}
+attack_tm = "ATT&CK\u2122"
+
+# Lookups of the current ATT&CK data, which are built from its index on first access (see `__getattr__`)
+attack: dict[str, Any]
+tactics_map: dict[str, str]
+technique_lookup: OrderedDict[str, Any]
+revoked: dict[str, Any]
+deprecated: dict[str, Any]
+matrix: dict[str, list[str]]
+tactics: list[str]
+techniques: list[str]
+technique_id_list: list[str]
+sub_technique_id_list: list[str]
+no_tactic: list[str]
 
 
 @cached
@@ -69,64 +87,86 @@ def get_attack_file_path_for_version(version: str) -> Path:
     raise FileNotFoundError(f"No ATT&CK data file found for version {version!r}. Available: {available}")
 
 
+def get_attack_index_path(attack_path: Path) -> Path:
+    """Return the path of the lookup index of an ATT&CK data file."""
+    return attack_path.with_name(attack_path.name.removesuffix(".json.gz") + ".index.json")
+
+
 _, _attack_path_base = str(get_attack_file_path()).split("-v")
 _ext_length = len(".json.gz")
 CURRENT_ATTACK_VERSION = _attack_path_base[:-_ext_length]
 
 
+@cached
 def load_attack_gz() -> dict[str, Any]:
+    """Load the full STIX bundle of the current ATT&CK data."""
     return json.loads(read_gzip(get_attack_file_path()))
 
 
-attack = load_attack_gz()
-
-technique_lookup: dict[str, Any] = {}
-revoked: dict[str, Any] = {}
-deprecated: dict[str, Any] = {}
-
-for item in attack["objects"]:
-    if item["type"] == "x-mitre-tactic":
-        tactics_map[item["name"]] = item["external_references"][0]["external_id"]
+def get_attack_source(attack_path: Path) -> dict[str, Any]:
+    """Identify an ATT&CK data file by its name, size and content digest, to tell when its index is stale."""
+    return {
+        "name": attack_path.name,
+        "size": attack_path.stat().st_size,
+        "sha256": hashlib.sha256(attack_path.read_bytes()).hexdigest(),
+    }
 
-    if item["type"] == "attack-pattern" and item["external_references"][0]["source_name"] == "mitre-attack":
-        technique_id = item["external_references"][0]["external_id"]
-        technique_lookup[technique_id] = item
 
-        if item.get("revoked"):
-            revoked[technique_id] = item
+def build_attack_index(raw: dict[str, Any], attack_path: Path) -> dict[str, Any]:
+    """Build the lookup index of ATT&CK data.
 
-        if item.get("x_mitre_deprecated"):
-            deprecated[technique_id] = item
+    The index is a STIX bundle of only the tactics and techniques, with their ids, names, kill chain phases,
+    revocations and deprecations, so lookups can be built from it without parsing the full data file.
+    """
+    objects: list[dict[str, Any]] = []
+    for item in raw["objects"]:
+        if item["type"] == "x-mitre-tactic" or (
+            item["type"] == "attack-pattern" and item["external_references"][0]["source_name"] == "mitre-attack"
+        ):
+            entry = {key: item[key] for key in INDEX_OBJECT_FIELDS if key in item}
+            entry["external_references"] = item["external_references"][:1]
+            objects.append(entry)
 
-revoked = dict(sorted(revoked.items()))
-deprecated = dict(sorted(deprecated.items()))
-tactics = list(tactics_map)
-matrix: dict[str, list[str]] = {tactic: [] for tactic in tactics}
-no_tactic: list[str] = []
-attack_tm = "ATT&CK\u2122"
+    return {"source": get_attack_source(attack_path), "objects": objects}
 
 
-# Enumerate over the techniques and build the matrix back up
-for technique_id, technique in sorted(technique_lookup.items(), key=lambda kv: kv[1]["name"].lower()):
-    kill_chain = technique.get("kill_chain_phases")
-    if kill_chain:
-        for tactic in kill_chain:
-            tactic_name = next(
-                t
-                for t in tactics
-                if tactic["kill_chain_name"] == "mitre-attack" and t.lower() == tactic["phase_name"].replace("-", " ")
-            )
-            matrix[tactic_name].append(technique_id)
-        no_tactic.append(technique_id)
-
-for val in matrix.values():
-    val.sort(key=lambda tid: technique_lookup[tid]["name"].lower())
+def write_attack_index(index_path: Path, index: dict[str, Any]) -> None:
+    """Write a lookup index atomically, so a concurrent reader never sees a partial file."""
+    tmp_path = index_path.with_name(f"{index_path.name}.{os.getpid()}.tmp")
+    try:
+        _ = tmp_path.write_text(json.dumps(index, indent=2, sort_keys=True) + "\n")
+        _ = tmp_path.replace(index_path)
+    finally:
+        with contextlib.suppress(OSError):
+            tmp_path.unlink(missing_ok=True)
+
+
+def save_attack_index(attack_path: Path | None = None, raw: dict[str, Any] | None = None) -> Path:
+    """Generate the lookup index of an ATT&CK data file, next to the file."""
+    attack_path = attack_path or get_attack_file_path()
+    data: dict[str, Any] = raw if raw is not None else json.loads(read_gzip(attack_path))
+    index_path = get_attack_index_path(attack_path)
+    write_attack_index(index_path, build_attack_index(data, attack_path))
+    # reset the cached indexes and lookups
+    clear_caches()
+    return index_path
 
 
-technique_lookup = OrderedDict(sorted(technique_lookup.items()))
-techniques = sorted({v["name"] for _, v in technique_lookup.items()})
-technique_id_list = [t for t in technique_lookup if "." not in t]
-sub_technique_id_list = [t for t in technique_lookup if "." in t]
+@cached
+def load_attack_index(attack_path: Path) -> dict[str, Any]:
+    """Load the lookup index of an ATT&CK data file, or rebuild and save it if it is missing or stale."""
+    index_path = get_attack_index_path(attack_path)
+    if index_path.exists():
+        index = json.loads(index_path.read_text())
+        # the index is ignored once its data file is replaced, even by one of the same size
+        if index.get("source") == get_attack_source(attack_path):
+            return index
+
+    index = build_attack_index(json.loads(read_gzip(attack_path)), attack_path)
+    # saving is best effort, as the package may be installed read-only
+    with contextlib.suppress(OSError):
+        write_attack_index(index_path, index)
+    return index
 
 
 @dataclass
@@ -197,8 +237,44 @@ def _build_lookups(version: str, raw: dict[str, Any]) -> AttackLookups:
 def build_attack_lookups_for_version(version: str) -> AttackLookups:
     """Load and cache ATT&CK lookup structures for a specific version."""
     path = get_attack_file_path_for_version(version)
-    raw = json.loads(read_gzip(path))
-    return _build_lookups(version, raw)
+    return _build_lookups(version, load_attack_index(path))
+
+
+@cached
+def get_attack_lookups() -> AttackLookups:
+    """Load and cache ATT&CK lookup structures for the current data."""
+    return _build_lookups(CURRENT_ATTACK_VERSION, load_attack_index(get_attack_file_path()))
+
+
+# module attributes built from the lookups of the current data on first access
+_LAZY_ATTRIBUTES: dict[str, Callable[[AttackLookups], Any]] = {
+    "tactics_map": lambda lookups: lookups.tactics_map,
+    "technique_lookup": lambda lookups: lookups.technique_lookup,
+    "revoked": lambda lookups: lookups.revoked,
+    "deprecated": lambda lookups: lookups.deprecated,
+    "matrix": lambda lookups: lookups.matrix,
+    "tactics": lambda lookups: list(lookups.tactics_map),
+    "techniques": lambda lookups: sorted({v["name"] for v in lookups.technique_lookup.values()}),
+    "technique_id_list": lambda lookups: [t for t in lookups.technique_lookup if "." not in t],
+    "sub_technique_id_list": lambda lookups: [t for t in lookups.technique_lookup if "." in t],
+    "no_tactic": lambda lookups: [
+        tid
+        for tid, technique in sorted(lookups.technique_lookup.items(), key=lambda kv: kv[1]["name"].lower())
+        if technique.get("kill_chain_phases")
+    ],
+}
+
+
+def __getattr__(name: str) -> Any:
+    """Build the ATT&CK lookups on first access, so importing the module does not load the ATT&CK data."""
+    if name == "attack":
+        return load_attack_gz()
+    if name not in _LAZY_ATTRIBUTES:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    value = _LAZY_ATTRIBUTES[name](get_attack_lookups())
+    globals()[name] = value
+    return value
 
 
 def refresh_attack_data(save: bool = True) -> tuple[dict[str, Any] | None, bytes | None]:
@@ -236,33 +312,38 @@ def refresh_attack_data(save: bool = True) -> tuple[dict[str, Any] | None, bytes
         new_path = get_etc_path([f"attack-v{latest_version}.json.gz"])
         _ = new_path.write_bytes(compressed)
         attack_path.unlink()
+        get_attack_index_path(attack_path).unlink(missing_ok=True)
         print(f"Replaced file: {attack_path} with {new_path}")
 
+        index_path = save_attack_index(new_path, attack_data)
+        print(f"Saved lookup index: {index_path}")
+
     return attack_data, compressed
 
 
 def build_threat_map_entry(tactic: str, *technique_ids: str) -> dict[str, Any]:
     """Build rule threat map from technique IDs."""
     techniques_redirect_map = load_techniques_redirect()
+    lookups = get_attack_lookups()
     url_base = "https://attack.mitre.org/{type}/{id}/"
-    tactic_id = tactics_map[tactic]
+    tactic_id = lookups.tactics_map[tactic]
     tech_entries: dict[str, Any] = {}
 
     def make_entry(_id: str) -> dict[str, Any]:
         return {
             "id": _id,
-            "name": technique_lookup[_id]["name"],
+            "name": lookups.technique_lookup[_id]["name"],
             "reference": url_base.format(type="techniques", id=_id.replace(".", "/")),
         }
 
     for tid in technique_ids:
         # fail if deprecated or else convert if it has been replaced
-        if tid in deprecated:
+        if tid in lookups.deprecated:
             raise ValueError(f"Technique ID: {tid} has been deprecated and should not be used")
         if tid in techniques_redirect_map:
             tid = techniques_redirect_map[tid]  # noqa: PLW2901
 
-        if tid not in matrix[tactic]:
+        if tid not in lookups.matrix[tactic]:
             raise ValueError(f"Technique ID: {tid} does not fall under tactic: {tactic}")
 
         # sub-techniques
@@ -286,16 +367,18 @@ def build_threat_map_entry(tactic: str, *technique_ids: str) -> dict[str, Any]:
 
 def update_threat_map(rule_threat_map: list[dict[str, Any]]) -> None:
     """Update rule map techniques to reflect changes from ATT&CK."""
+    lookups = get_attack_lookups()
     for entry in rule_threat_map:
         for tech in entry["technique"]:
-            tech["name"] = technique_lookup[tech["id"]]["name"]
+            tech["name"] = lookups.technique_lookup[tech["id"]]["name"]
 
 
 def retrieve_redirected_id(asset_id: str) -> str | Any:
     """Get the ID for a redirected ATT&CK asset."""
-    if asset_id in (tactics_map.values()):
+    lookups = get_attack_lookups()
+    if asset_id in (lookups.tactics_map.values()):
         attack_type = "tactics"
-    elif asset_id in list(technique_lookup):
+    elif asset_id in list(lookups.technique_lookup):
         attack_type = "techniques"
     else:
         raise ValueError(f"Unknown asset_id: {asset_id}")
@@ -327,7 +410,7 @@ def build_redirected_techniques_map(threads: int = 50) -> dict[str, Any]:
             technique_map[tech_id] = new
 
     pool = ThreadPool(processes=threads)
-    _ = pool.map(download_worker, list(technique_lookup))
+    _ = pool.map(download_worker, list(get_attack_lookups().technique_lookup))
     pool.close()
     pool.join()
 
@@ -509,20 +592,21 @@ def build_identity_version_map(framework: str, source_version: str, target_versi
     """Build a cross-version identity skeleton using source IDs and target-version names."""
     # Source data: determines which IDs appear as source keys.
     try:
-        src = build_attack_lookups_for_version(source_version)
+        src: AttackLookups = build_attack_lookups_for_version(source_version)
         _src_tactics_map = src.tactics_map
         _src_technique_lookup = src.technique_lookup
         _src_revoked = src.revoked
         _src_deprecated = src.deprecated
     except FileNotFoundError:
-        _src_tactics_map = tactics_map
-        _src_technique_lookup = technique_lookup
-        _src_revoked = revoked
-        _src_deprecated = deprecated
+        current: AttackLookups = get_attack_lookups()
+        _src_tactics_map = current.tactics_map
+        _src_technique_lookup = current.technique_lookup
+        _src_revoked = current.revoked
+        _src_deprecated = current.deprecated
 
     # Target data: resolves destination names/references where the same ID exists.
     try:
-        tgt = build_attack_lookups_for_version(target_version)
+        tgt: AttackLookups = build_attack_lookups_for_version(target_version)
         _tgt_tactic_id_to_name: dict[str, str] = {v: k for k, v in tgt.tactics_map.items()}
         _tgt_technique_lookup: dict[str, Any] = dict(tgt.technique_lookup)
     except FileNotFoundError:
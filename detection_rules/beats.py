@@ -17,6 +17,7 @@ import requests
 import yaml
 from semver import Version
 
+from .schema_store import KEY_SEP, SchemaIndex, get_schema_store
 from .utils import DateTimeEncoder, cached, get_etc_path, gzip_compress, read_gzip, unzip
 
 
@@ -218,11 +219,10 @@ def get_max_version() -> str:
     return str(max(get_versions()))
 
 
-@cached
-def read_beats_schema(version: str | None = None) -> dict[str, Any]:
+def get_schema_path(version: str | None = None) -> Path:
+    """Get the path of a beats schema, checking that the version exists."""
     if version and version.lower() == "main":
-        path = get_etc_path(["beats_schemas", "main.json.gz"])
-        return json.loads(read_gzip(path))
+        return get_etc_path(["beats_schemas", "main.json.gz"])
 
     ver = Version.parse(version) if version else None
     beats_schemas = get_versions()
@@ -232,9 +232,87 @@ def read_beats_schema(version: str | None = None) -> dict[str, Any]:
 
     version = version or get_max_version()
 
-    return json.loads(read_gzip(get_etc_path(["beats_schemas", f"v{version}.json.gz"])))
+    return get_etc_path(["beats_schemas", f"v{version}.json.gz"])
+
+
+@cached(maxsize=16)
+def read_beats_schema(version: str | None = None) -> dict[str, Any]:
+    return json.loads(read_gzip(get_schema_path(version)))
+
+
+def _get_field_types(flattened: list[dict[str, Any]]) -> dict[str, str]:
+    """Get the types of flattened fields and their multi-fields."""
+    field_types: dict[str, str] = {}
+    for field in flattened:
+        field_types[field["name"]] = str(field["type"])
+        for subfield in field.get("multi_fields", []):
+            field_types[f"{field['name']}.{subfield['name']}"] = str(subfield["type"])
+    return field_types
+
+
+@cached(maxsize=16)
+def get_schema_index(version: str | None = None) -> SchemaIndex | None:
+    """Get the precompiled field types of a beats version, if they have been built into the schema store."""
+    source = get_schema_path(version)
+    return get_schema_store().load("beats", source.name.removesuffix(".json.gz"), source)
+
+
+def build_schema_index(version: str | None = None) -> Path:
+    """Build the field types of a beats version into the schema store, keyed by beat, module and dataset."""
+    source = get_schema_path(version)
+    field_types: dict[str, str] = {}
+
+    def add_fields(directory: dict[str, Any], *parts: str, prefix: str = "") -> None:
+        try:
+            flattened = get_field_schema(directory, prefix=prefix, include_common=True)
+        except (KeyError, TypeError, AttributeError) as exc:
+            # a few upstream fields.yml files are malformed, which only fails when a query references them
+            print(f"Skipping malformed beats fields in {'/'.join(p for p in parts if p)}: {exc!r}")
+            return
+
+        for name, field_type in _get_field_types(flattened).items():
+            field_types[KEY_SEP.join((*parts, name))] = field_type
+
+    for beat, beat_dir in json.loads(read_gzip(source)).items():
+        add_fields(beat_dir, beat, "", "")
+
+        module_dirs = beat_dir.get("folders", {}).get("module", {}).get("folders", {})
+        for module, module_dir in module_dirs.items():
+            add_fields(module_dir, beat, module, "")
 
+            for dataset, dataset_dir in module_dir.get("folders", {}).items():
+                if not dataset.startswith("_"):
+                    add_fields(dataset_dir, beat, module, dataset, prefix=module + ".")
 
+    path = get_schema_store().save("beats", source.name.removesuffix(".json.gz"), source, field_types)
+    get_schema_index.clear()  # type: ignore[reportFunctionMemberAccess]
+    return path
+
+
+def get_indexed_beat_schema(index: SchemaIndex, beat: str, modules: set[str], datasets: set[str]) -> dict[str, Any]:
+    """Get the same fields as `get_beat_root_schema` and `get_beats_sub_schema`, from a precompiled index."""
+    beat_index = index.subset(beat)
+    if not beat_index:
+        raise KeyError(f"Unknown beats module {beat}")
+
+    field_types = beat_index.subset("", "").to_dict()
+
+    for module in modules:
+        normalized_module = module.strip("\"' ")
+        module_index = beat_index.subset(normalized_module)
+        all_datasets = datasets or [d for d in module_index.children() if d and not d.startswith("_")]
+
+        for _dataset in all_datasets:
+            ds = _dataset.strip("\"' ")
+            dataset = ds[len(normalized_module) + 1 :] if ds.startswith(normalized_module + ".") else ds
+            field_types.update(module_index.subset(dataset).iter_items())
+
+        field_types.update(module_index.subset("").iter_items())
+
+    return {name: {"name": name, "type": field_type} for name, field_type in sorted(field_types.items())}
+
+
+@cached(maxsize=128)
 def get_schema_from_datasets(
     beats: list[str],
     modules: set[str],
@@ -242,11 +320,18 @@ def get_schema_from_datasets(
     version: str | None = None,
 ) -> dict[str, Any]:
     filtered: dict[str, Any] = {}
-    beats_schema = read_beats_schema(version=version)
 
     # infer the module if only a dataset are defined
     if not modules:
-        modules.update(ds.split(".")[0] for ds in datasets if "." in ds)
+        modules = {ds.split(".")[0] for ds in datasets if "." in ds}
+
+    index = get_schema_index(version)
+    if index is not None:
+        for beat in beats:
+            filtered.update(get_indexed_beat_schema(index, beat, modules, datasets))
+        return filtered
+
+    beats_schema = read_beats_schema(version=version)
 
     for beat in beats:
         # if no modules are specified then grab them all
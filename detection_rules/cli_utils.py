@@ -18,8 +18,8 @@ from typing import Any
 import click
 import kql  # type: ignore[reportMissingTypeStubs]
 
-from . import ecs
-from .attack import build_threat_map_entry, matrix, tactics
+from . import attack, ecs
+from .attack import build_threat_map_entry
 from .config import CUSTOM_RULES_DIR, parse_rules_config
 from .mixins import get_dataclass_required_fields
 from .rule import BYPASS_VERSION_LOCK, TOMLRule, TOMLRuleContents
@@ -319,13 +319,13 @@ def rule_prompt(  # noqa: PLR0912, PLR0913, PLR0915, PLR0917
             threat_map: list[dict[str, Any]] = kwargs.get("threat", [])
             if not skip_errors and not required_only:
                 while click.confirm("add mitre tactic?"):
-                    tactic = schema_prompt("mitre tactic name", type="string", enum=tactics, is_required=True)
+                    tactic = schema_prompt("mitre tactic name", type="string", enum=attack.tactics, is_required=True)
                     technique_ids = (  # type: ignore[reportUnknownVariableType]
                         schema_prompt(
                             f"technique or sub-technique IDs for {tactic}",
                             type="array",
                             is_required=False,
-                            enum=list(matrix[tactic]),
+                            enum=list(attack.matrix[tactic]),
                         )
                         or []
                     )
@@ -235,6 +235,7 @@ class RulesConfig:
     bypass_timeline_template_validation: bool = False
     bypass_esql_keep_validation: bool = False
     bypass_esql_metadata_validation: bool = False
+    bypass_esql_schema_validation: bool = False
     no_tactic_filename: bool = False
 
     def __post_init__(self) -> None:
@@ -18,7 +18,7 @@ import typing
 import urllib.parse
 from collections import defaultdict
 from pathlib import Path
-from typing import Any, Literal
+from typing import TYPE_CHECKING, Any, Literal
 from uuid import uuid4
 
 import click
@@ -33,7 +33,7 @@ from kibana.connector import Kibana  # type: ignore[reportMissingTypeStubs]
 from kibana.resources import Signal  # type: ignore[reportMissingTypeStubs]
 from semver import Version
 
-from . import attack, rule_loader, utils
+from . import attack, beats, ecs, endgame, integrations, rule_loader, utils
 from .beats import download_beats_schema, download_latest_beats_schema, refresh_main_schema
 from .cli_utils import multi_collection, single_collection
 from .config import (
@@ -47,8 +47,10 @@ from .endgame import EndgameSchemaManager
 from .esql_errors import (
     ESQL_EXCEPTION_TYPES,
 )
-from .eswrap import CollectEvents, add_range_to_dsl
+from .eswrap import DEFAULT_MAX_CONCURRENT_SEARCHES, CollectEvents, add_range_to_dsl
 from .ghwrap import GithubClient, update_gist
+from .import_profile import STAGES, TOTAL_STAGE, StageProfile, check_budgets, profile_imports
+from .index_mappings import MappingCache, ValidationIndexPool
 from .integrations import (
     SecurityDetectionEngine,
     build_integrations_manifest,
@@ -61,11 +63,11 @@ from .main import root
 from .misc import (
     PYTHON_LICENSE,
     add_client,
-    get_default_elasticsearch_client,
-    get_default_kibana_client,
+    client_registry,
     raise_client_error,
 )
 from .packaging import CURRENT_RELEASE_PATH, PACKAGE_FILE, RELEASE_DIR, Package
+from .remote_validation import RemoteValidationLatencies, RemoteValidationStore
 from .rule import (
     AnyRuleData,
     BaseRuleData,
@@ -79,10 +81,14 @@ from .rule import (
 )
 from .rule_loader import RuleCollection, production_filter
 from .rule_validators import ESQLValidator
-from .schemas import definitions, get_stack_versions
+from .schema_store import SCHEMA_STORE_KINDS
+from .schemas import definitions, get_stack_versions, load_stack_schema_map
 from .utils import check_version_lock_double_bumps, dict_hash, get_etc_path, get_path
 from .version_lock import VersionLockFile, loaded_version_lock
 
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
 GH_CONFIG = Path.home() / ".config" / "gh" / "hosts.yml"
 NAVIGATOR_GIST_ID = "0443cfb5016bed103f1940b2f336e45a"
 NAVIGATOR_URL = "https://ela.st/detection-rules-navigator-trade"
@@ -580,6 +586,163 @@ def update_lock_versions(ctx: click.Context, rule_ids: tuple[str, ...], force: b
     return changed
 
 
+@dev_group.command("cache-stats")
+@click.option(
+    "--sort-by",
+    "-s",
+    type=click.Choice(["name", "hits", "misses", "evictions", "miss_seconds", "saved_seconds"]),
+    default="miss_seconds",
+    show_default=True,
+    help="Field to sort the caches by",
+)
+@click.option("--show-unused", is_flag=True, help="Include caches which were never called")
+@multi_collection
+def cache_stats(rules: RuleCollection, sort_by: str, show_unused: bool) -> list[utils.CacheStats]:
+    """Load rules and show the hit, miss and latency counters of memoized functions."""
+    stats = [s for s in utils.get_cache_stats() if show_unused or s.calls]
+    stats.sort(key=lambda s: getattr(s, sort_by), reverse=sort_by != "name")
+
+    fields = ["name", "hits", "misses", "hit_ratio", "evictions", "size", "miss_seconds", "saved_seconds"]
+    rows = [
+        {
+            "name": s.name,
+            "hits": s.hits,
+            "misses": s.misses,
+            "hit_ratio": f"{s.hit_ratio:.1%}",
+            "evictions": s.evictions,
+            "size": f"{s.currsize}/{s.maxsize or '-'}",
+            "miss_seconds": f"{s.miss_seconds:.3f}",
+            "saved_seconds": f"{s.saved_seconds:.3f}",
+        }
+        for s in stats
+    ]
+    table = Table.from_list(fields, rows)  # type: ignore[reportUnknownMemberType]
+    click.echo(f"Loaded {len(rules)} rules\n{table}")
+    return stats
+
+
+def _set_sample_field(event: dict[str, Any], field: str, value: Any) -> None:
+    """Set a dotted field in a nested event, unless it was already set or conflicts with another field."""
+    *parents, name = field.split(".")
+    document = event
+    for parent in parents:
+        child = document.setdefault(parent, {})
+        if not isinstance(child, dict):
+            return
+        document = typing.cast("dict[str, Any]", child)
+    _ = document.setdefault(name, value)
+
+
+def kql_sample_event(query: str) -> dict[str, Any]:
+    """Build an event with the values a KQL query compares its fields to, so that it matches some of its clauses."""
+    import kql  # type: ignore[reportMissingTypeStubs]
+
+    kql_ast: Any = kql.ast  # type: ignore[reportUnknownMemberType]
+    event: dict[str, Any] = {"@timestamp": "2024-01-01T00:00:00.000Z"}
+    nodes: list[Any] = [kql.parse(query)]  # type: ignore[reportUnknownMemberType]
+    while nodes:
+        node = nodes.pop()
+        if isinstance(node, kql_ast.AndExpr | kql_ast.OrExpr):
+            nodes.extend(node.items)
+            continue
+        if isinstance(node, kql_ast.FieldRange):
+            field_value: Any = node.value.value
+            if isinstance(field_value, int | float) and node.operator in (">", "<"):
+                field_value += 1 if node.operator == ">" else -1
+            _set_sample_field(event, node.field.name, field_value)
+            continue
+        # anything else, such as negated clauses, is left out so the event doesn't contradict it
+        if not isinstance(node, kql_ast.FieldComparison):
+            continue
+
+        value: Any = node.value
+        if isinstance(value, kql_ast.List):
+            value = value.items[0]
+        if isinstance(value, kql_ast.Exists):
+            field_value = "sample"
+        elif isinstance(value, kql_ast.Value) and value.value is not None:
+            field_value = value.value
+            if isinstance(value, kql_ast.Wildcard):
+                field_value = field_value.replace("*", "").replace("?", "x")
+        else:
+            continue
+
+        _set_sample_field(event, node.field.name, field_value)
+    return event
+
+
+@dev_group.command("kql-eval-benchmark")
+@click.option("--rounds", "-r", type=click.IntRange(min=1), default=3, show_default=True, help="Timed rounds per mode")
+@click.option(
+    "--events",
+    "-e",
+    "event_files",
+    type=click.Path(exists=True, dir_okay=False, path_type=Path),
+    multiple=True,
+    help="json, jsonl or ndjson event files, such as from `es collect-events`. Sample events are built otherwise",
+)
+@multi_collection
+def kql_eval_benchmark(rules: RuleCollection, rounds: int, event_files: tuple[Path, ...]) -> dict[str, float]:
+    """Compare the compiled KQL evaluator against the walker, evaluating every KQL rule query over a set of events.
+
+    Without event files, one sample event is built per query from the values it compares fields to, so each query
+    matches some events and misses most of them, as it would against real data.
+    """
+    import kql  # type: ignore[reportMissingTypeStubs]
+    from eql.utils import stream_file_events  # type: ignore[reportMissingTypeStubs]
+
+    queries: list[str] = [
+        r.contents.data.get("query")
+        for r in rules
+        if r.contents.data.get("language") == "kuery" and r.contents.data.get("query")
+    ]
+    if event_files:
+        events: list[dict[str, Any]] = [
+            event
+            for path in event_files
+            for event in stream_file_events(str(path))  # type: ignore[reportUnknownVariableType]
+        ]
+    else:
+        events = [kql_sample_event(query) for query in queries]
+    click.echo(f"Evaluating {len(queries)} KQL queries against {len(events)} events")
+
+    def evaluate(evaluator: "Callable[[dict[str, Any]], bool]", event: dict[str, Any]) -> bool | None:
+        # both evaluators raise when a field holds an object instead of a value, which some events do
+        try:
+            return bool(evaluator(event))
+        except kql.errors.KqlRuntimeError:  # type: ignore[reportUnknownMemberType]
+            return None
+
+    timings: dict[str, float] = {}
+    matches: dict[str, list[list[bool | None]]] = {}
+    for mode, compiled in (("walker", False), ("compiled", True)):
+        start = time.perf_counter()
+        evaluators = [
+            typing.cast("Callable[[dict[str, Any]], bool]", kql.get_evaluator(query, compiled=compiled))  # type: ignore[reportUnknownMemberType]
+            for query in queries
+        ]
+        compile_seconds = time.perf_counter() - start
+
+        best = None
+        for _ in range(rounds):
+            start = time.perf_counter()
+            matches[mode] = [[evaluate(evaluator, event) for event in events] for evaluator in evaluators]
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+
+        timings[mode] = best or 0.0
+        click.echo(f"{mode:>8}: compile {compile_seconds:.3f}s, evaluate {timings[mode]:.3f}s (best of {rounds})")
+
+    if matches["walker"] != matches["compiled"]:
+        raise click.ClickException("The compiled evaluator returned different results than the walker")
+
+    hits = sum(bool(match) for row in matches["compiled"] for match in row)
+    click.echo(f"matched {hits} of {len(queries) * len(events)} query and event pairs")
+    if timings["compiled"]:
+        click.echo(f"speedup: {timings['walker'] / timings['compiled']:.2f}x")
+    return timings
+
+
 @dev_group.command("kibana-diff")
 @click.option("--rule-id", "-r", multiple=True, help="Optionally specify rule ID")
 @click.option("--repo", default="elastic/kibana", help="Repository where branch is located")
@@ -1426,8 +1589,17 @@ def rule_event_search(  # noqa: PLR0913, PLR0917
     default=0,
     help="Set verbosity level: 0 for minimal output, 1 for detailed output.",
 )
-def esql_remote_validation(
+@click.option(
+    "--no-cache",
+    is_flag=True,
+    help=(
+        "Re-validate every rule and prepare every mapping, instead of reusing the results and mappings cached by "
+        "previous runs"
+    ),
+)
+def esql_remote_validation(  # noqa: PLR0915
     verbosity: int,
+    no_cache: bool,
 ) -> None:
     """Search using a rule file against an Elasticsearch instance."""
 
@@ -1439,41 +1611,73 @@ def esql_remote_validation(
     if not esql_rules:
         return
     # TODO(eric-forte-elastic): @add_client https://github.com/elastic/detection-rules/issues/5156  # noqa: FIX002
-    with get_default_kibana_client() as kibana_client, get_default_elasticsearch_client() as elastic_client:
+    # the clients are shared with rule loading, which validates remotely with the same defaults when enabled
+    kibana_client = client_registry.get_default_kibana_client()
+    elastic_client = client_registry.get_default_elasticsearch_client()
+    with kibana_client:
         if not kibana_client or not elastic_client:
             raise_client_error("Skipping remote validation due to missing client")
 
+        # rules are skipped if they passed against the same stack version and schemas before
+        store = None if no_cache else RemoteValidationStore()
+        stack_version: str = elastic_client.info()["version"]["number"]
+        latencies = RemoteValidationLatencies()
+        # mappings are prepared once per rule indices, integrations and stack version, and reused by later runs
+        mapping_cache = MappingCache(persist=not no_cache)
+
         failed_count = 0
         fail_list: list[str] = []
         max_retries = 3
-        for r in esql_rules:
-            retry_count = 0
-            while retry_count < max_retries:
-                try:
-                    validator = ESQLValidator(r.contents.data.query)  # type: ignore[reportIncompatibleMethodOverride]
-                    _ = validator.remote_validate_rule_contents(kibana_client, elastic_client, r.contents, verbosity)
-                    break
-                except (ValueError, BadRequestError, *ESQL_EXCEPTION_TYPES) as e:  # type: ignore[reportUnknownMemberType]
-                    e_type = type(e)  # type: ignore[reportUnknownMemberType]
-                    if isinstance(e, ESQL_EXCEPTION_TYPES):
-                        click.echo(click.style(f"{r.contents.data.rule_id} ", fg="red", bold=True), nl=False)
-                        _ = e.show()  # type: ignore[reportUnknownMemberType]
-                    else:
-                        click.echo(f"FAILURE: {e_type}: {e}")  # type: ignore[reportUnknownMemberType]
-                    fail_list.append(f"{r.contents.data.rule_id}  FAILURE: {e_type}: {e}")  # type: ignore[reportUnknownMemberType]
-                    failed_count += 1
-                    break
-                except ESConnectionError as e:
-                    retry_count += 1
-                    click.echo(f"Connection error: {e}. Retrying {retry_count}/{max_retries}...")
-                    time.sleep(30)
-                    if retry_count == max_retries:
-                        click.echo(f"FAILURE: {e} after {max_retries} retries")
-                        fail_list.append(f"FAILURE: {e} after {max_retries} retries")
+        # rules needing the same mappings share test indices, which are all deleted on exit
+        with ValidationIndexPool(elastic_client) as index_pool:
+            for r in esql_rules:
+                key = store.key(r.contents, stack_version) if store else None
+                if store and key and store.get(key) is not None:
+                    latencies.record(r.contents.data.type, None)
+                    continue
+
+                retry_count = 0
+                while retry_count < max_retries:
+                    start = time.perf_counter()
+                    try:
+                        validator = ESQLValidator(r.contents.data.query)  # type: ignore[reportIncompatibleMethodOverride]
+                        _ = validator.remote_validate_rule_contents(
+                            kibana_client,
+                            elastic_client,
+                            r.contents,
+                            verbosity,
+                            index_pool=index_pool,
+                            mapping_cache=mapping_cache,
+                        )
+                        latencies.record(r.contents.data.type, time.perf_counter() - start)
+                        if store and key:
+                            store.put(key, {"rule_id": r.id, "name": r.name, "stack_version": stack_version})
+                        break
+                    except (ValueError, BadRequestError, *ESQL_EXCEPTION_TYPES) as e:  # type: ignore[reportUnknownMemberType]
+                        e_type = type(e)  # type: ignore[reportUnknownMemberType]
+                        if isinstance(e, ESQL_EXCEPTION_TYPES):
+                            click.echo(click.style(f"{r.contents.data.rule_id} ", fg="red", bold=True), nl=False)
+                            _ = e.show()  # type: ignore[reportUnknownMemberType]
+                        else:
+                            click.echo(f"FAILURE: {e_type}: {e}")  # type: ignore[reportUnknownMemberType]
+                        fail_list.append(f"{r.contents.data.rule_id}  FAILURE: {e_type}: {e}")  # type: ignore[reportUnknownMemberType]
                         failed_count += 1
+                        break
+                    except ESConnectionError as e:
+                        retry_count += 1
+                        click.echo(f"Connection error: {e}. Retrying {retry_count}/{max_retries}...")
+                        time.sleep(30)
+                        if retry_count == max_retries:
+                            click.echo(f"FAILURE: {e} after {max_retries} retries")
+                            fail_list.append(f"FAILURE: {e} after {max_retries} retries")
+                            failed_count += 1
 
         click.echo(f"Total rules: {len(esql_rules)}")
         click.echo(f"Failed rules: {failed_count}")
+        click.echo(f"Test index sets created: {index_pool.created}, reused: {index_pool.reused}")
+        click.echo(f"Mappings prepared: {mapping_cache.misses}, cached: {mapping_cache.hits}")
+        fields = ["rule_type", "validated", "cached", "mean_ms", "p50_ms", "max_ms"]
+        click.echo(Table.from_list(fields, latencies.summary()))  # type: ignore[reportUnknownMemberType]
 
         _ = Path("failed_rules.log").write_text("\n".join(fail_list), encoding="utf-8")
         click.echo("Failed rules written to failed_rules.log")
@@ -1496,6 +1700,14 @@ def esql_remote_validation(
 )
 @click.option("--hide-zero-counts", "-z", is_flag=True, help="Exclude rules with zero hits from printing")
 @click.option("--hide-errors", "-e", is_flag=True, help="Exclude rules with errors from printing")
+@click.option(
+    "--max-concurrent-searches",
+    "-c",
+    type=click.IntRange(min=1),
+    default=DEFAULT_MAX_CONCURRENT_SEARCHES,
+    show_default=True,
+    help="Maximum number of async EQL and lucene searches running at once",
+)
 @click.pass_context
 @add_client(["elasticsearch", "kibana"], add_to_ctx=True)
 def rule_survey(  # noqa: PLR0913, PLR0917
@@ -1505,6 +1717,7 @@ def rule_survey(  # noqa: PLR0913, PLR0917
     dump_file: Path,
     hide_zero_counts: bool,
     hide_errors: bool,
+    max_concurrent_searches: int,
     elasticsearch_client: Elasticsearch,
     kibana_client: Kibana,
 ) -> list[dict[str, int]]:
@@ -1526,7 +1739,13 @@ def rule_survey(  # noqa: PLR0913, PLR0917
     click.echo(f"Saving detailed dump to: {dump_file}")
 
     collector = CollectEvents(elasticsearch_client)
-    details = collector.search_from_rule(rules, start_time=start_time, end_time=end_time)
+    details = collector.search_from_rule(
+        rules,
+        start_time=start_time,
+        end_time=end_time,
+        max_concurrent_searches=max_concurrent_searches,
+        show_progress=True,
+    )
     counts = collector.count_from_rule(rules, start_time=start_time, end_time=end_time)
 
     # add alerts
@@ -1665,6 +1884,53 @@ def update_rule_data_schemas() -> None:
         _ = cls.save_schema()
 
 
+@schemas_group.command("build-store")
+@click.option(
+    "--schema",
+    "-s",
+    "schemas",
+    multiple=True,
+    type=click.Choice(SCHEMA_STORE_KINDS),
+    help="Schemas to build, defaults to all",
+)
+@click.option("--all-versions", is_flag=True, help="Build every local version, not only those in the stack schema map")
+def build_schema_store(schemas: tuple[str, ...], all_versions: bool) -> None:
+    """Build the precompiled field type indexes which are memory-mapped during validation."""
+    schemas = schemas or SCHEMA_STORE_KINDS
+    builders = {
+        "ecs": ecs.build_schema_index,
+        "beats": beats.build_schema_index,
+        "endgame": endgame.build_schema_index,
+    }
+
+    versions: dict[str, list[str]]
+    if all_versions:
+        versions = {
+            "ecs": [p.name for p in ecs.ECS_SCHEMAS_DIR.iterdir() if p.is_dir()],
+            "beats": ["main", *[str(v) for v in beats.get_versions()]],
+            "endgame": [p.name for p in endgame.ENDGAME_SCHEMA_DIR.iterdir() if p.is_dir()],
+        }
+    else:
+        versions = defaultdict(list)
+        for stack_schemas in load_stack_schema_map().values():
+            for name, version in stack_schemas.items():
+                if name in builders and version not in versions[name]:
+                    versions[name].append(version)
+
+    for name in schemas:
+        if name == "integrations":
+            click.echo(f"Built {integrations.build_schema_index()}")
+            continue
+
+        for version in sorted(versions[name]):
+            try:
+                path = builders[name](version)
+            except (FileNotFoundError, ValueError) as e:
+                click.secho(f"Skipping {name} {version}: {e}", fg="yellow")
+                continue
+            click.echo(f"Built {path}")
+
+
 @schemas_group.command("generate")
 @click.option(
     "--token",
@@ -1737,8 +2003,12 @@ def attack_group() -> None:
 
 @attack_group.command("refresh-data")
 def refresh_attack_data() -> dict[str, Any] | None:
-    """Refresh the ATT&CK data file."""
+    """Refresh the ATT&CK data file and its lookup index."""
     data, _ = attack.refresh_attack_data()
+    if data is None:
+        # the data is current, but its index may be missing or stale
+        index_path = attack.save_attack_index()
+        click.echo(f"Saved lookup index: {index_path}")
     return data
 
 
@@ -2196,3 +2466,81 @@ def guide_plugin_to_rule(ctx: click.Context, rule_path: Path, save: bool = True)
         updated_rule.save_toml()
 
     return updated_rule
+
+
+@dev_group.group("perf")
+def perf_group() -> None:
+    """Commands for profiling the performance of detection-rules."""
+
+
+def parse_budgets(_: click.Context, __: click.Parameter, value: tuple[str, ...]) -> dict[str, float]:
+    """Parse STAGE=SECONDS budgets."""
+    budgets: dict[str, float] = {}
+    for budget in value:
+        name, _sep, seconds = budget.partition("=")
+        if name not in STAGES and name != TOTAL_STAGE:
+            raise click.BadParameter(f"unknown stage {name}, expected one of: {', '.join([*STAGES, TOTAL_STAGE])}")
+        try:
+            budgets[name] = float(seconds)
+        except ValueError:
+            raise click.BadParameter(f"{budget} is not in the form STAGE=SECONDS") from None
+    return budgets
+
+
+@perf_group.command("import-profile")
+@click.option(
+    "--stage", "-s", "stages", multiple=True, type=click.Choice(list(STAGES)), help="Stages to profile (default: all)"
+)
+@click.option(
+    "--rounds",
+    "-r",
+    type=click.IntRange(min=1),
+    default=3,
+    show_default=True,
+    help="Fresh interpreters to profile in, keeping the best result of each stage",
+)
+@click.option(
+    "--budget",
+    "-b",
+    "budgets",
+    multiple=True,
+    callback=parse_budgets,
+    help=f"Maximum seconds for a stage or the {TOTAL_STAGE}, as STAGE=SECONDS (e.g. -b {TOTAL_STAGE}=3)",
+)
+def import_profile(stages: tuple[str, ...], rounds: int, budgets: dict[str, float]) -> list[StageProfile]:
+    """Profile the wall time and memory of importing detection-rules and loading its data, stage by stage."""
+    names = [name for name in STAGES if not stages or name in stages]
+    try:
+        profiles = profile_imports(names, rounds=rounds)
+    except subprocess.CalledProcessError as exc:
+        raise click.ClickException(f"Profiling failed:\n{exc.stderr}") from exc
+
+    def format_memory(memory_mb: float | None) -> str:
+        return "-" if memory_mb is None else f"{memory_mb:.1f}"
+
+    fields = ["stage", "seconds", "memory_mb", "budget"]
+    rows = [
+        {
+            "stage": p.name,
+            "seconds": f"{p.seconds:.3f}",
+            "memory_mb": format_memory(p.memory_mb),
+            "budget": budgets.get(p.name, "-"),
+        }
+        for p in profiles
+    ]
+    memory = [p.memory_mb for p in profiles if p.memory_mb is not None]
+    rows.append(
+        {
+            "stage": TOTAL_STAGE,
+            "seconds": f"{sum(p.seconds for p in profiles):.3f}",
+            "memory_mb": format_memory(sum(memory) if memory else None),
+            "budget": budgets.get(TOTAL_STAGE, "-"),
+        }
+    )
+    table = Table.from_list(fields, rows)  # type: ignore[reportUnknownMemberType]
+    click.echo(f"Best of {rounds} round(s)\n{table}")
+
+    exceeded = check_budgets(profiles, budgets)
+    if exceeded:
+        raise click.ClickException("Budget exceeded:\n" + "\n".join(exceeded))
+    return profiles
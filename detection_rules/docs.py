@@ -21,7 +21,8 @@ import xlsxwriter  # type: ignore[reportMissingTypeStubs]
 import xlsxwriter.format  # type: ignore[reportMissingTypeStubs]
 from semver import Version
 
-from .attack import attack_tm, matrix, tactics, technique_lookup
+from . import attack
+from .attack import attack_tm
 from .packaging import Package
 from .rule import DeprecatedRule, ThreatMapping, TOMLRule
 from .rule_loader import DeprecatedCollection, RuleCollection
@@ -75,10 +76,10 @@ class PackageDocument(xlsxwriter.Workbook):
                     tactic = entry.tactic
                     techniques = entry.technique or []
                     for technique in techniques:
-                        if technique.id in matrix[tactic.name]:
+                        if technique.id in attack.matrix[tactic.name]:
                             coverage[tactic.name][technique.id][sub_dir] += 1
                         for subtechnique in technique.subtechnique or []:
-                            if subtechnique.id in matrix[tactic.name]:
+                            if subtechnique.id in attack.matrix[tactic.name]:
                                 coverage[tactic.name][subtechnique.id][sub_dir] += 1
 
         return coverage
@@ -140,10 +141,10 @@ class PackageDocument(xlsxwriter.Workbook):
         _ = worksheet.write(row, 5, f"Elastic / {attack_tm} Sub-techniques", self.default_header_format)
         row += 1
 
-        for tactic in tactics:
+        for tactic in attack.tactics:
             covered_ids = self._coverage[tactic]
-            tech_total = sum(1 for tid in matrix[tactic] if "." not in tid)
-            sub_total = sum(1 for tid in matrix[tactic] if "." in tid)
+            tech_total = sum(1 for tid in attack.matrix[tactic] if "." not in tid)
+            sub_total = sum(1 for tid in attack.matrix[tactic] if "." in tid)
             tech_covered = sum(1 for tid in covered_ids if "." not in tid)
             sub_covered = sum(1 for tid in covered_ids if "." in tid)
 
@@ -231,12 +232,12 @@ class PackageDocument(xlsxwriter.Workbook):
         bold = self.add_format({"font_size": 10, "bold": True, "text_wrap": True})
         technique_url = "https://attack.mitre.org/techniques/"
 
-        for column, tactic in enumerate(tactics):
+        for column, tactic in enumerate(attack.tactics):
             _ = worksheet.write(0, column, tactic, header)  # type: ignore[reportUnknownMemberType]
             _ = worksheet.set_column(column, column, 20)  # type: ignore[reportUnknownMemberType]
 
-            for row, technique_id in enumerate(matrix[tactic], 1):
-                technique = technique_lookup[technique_id]
+            for row, technique_id in enumerate(attack.matrix[tactic], 1):
+                technique = attack.technique_lookup[technique_id]
                 fmt = bold if technique_id in self._coverage[tactic] else default
 
                 coverage = self._coverage[tactic].get(technique_id)
@@ -254,7 +255,7 @@ class PackageDocument(xlsxwriter.Workbook):
                     tip=f"{technique_id}{coverage_str}",
                 )
 
-        _ = worksheet.autofilter(0, 0, max([len(v) for _, v in matrix.items()]) + 1, len(tactics) - 1)  # type: ignore[reportUnknownMemberType]
+        _ = worksheet.autofilter(0, 0, max([len(v) for _, v in attack.matrix.items()]) + 1, len(attack.tactics) - 1)  # type: ignore[reportUnknownMemberType]
 
 
 # product rule docs
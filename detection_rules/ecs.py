@@ -20,7 +20,7 @@ from semver import Version
 
 from .config import CUSTOM_RULES_DIR, parse_rules_config
 from .custom_schemas import get_custom_schemas
-from .integrations import load_integrations_schemas
+from .schema_store import SchemaIndex, get_schema_store
 from .utils import DateTimeEncoder, cached, get_etc_path, gzip_compress, load_etc_dump, read_gzip, unzip
 
 ECS_NAME = "ecs_schemas"
@@ -77,7 +77,7 @@ def get_schema_map() -> dict[str, Any]:
 
 @cached
 def get_schemas() -> dict[str, Any]:
-    """Get local schemas."""
+    """Get all local schemas, for the few callers which need every version."""
     schema_map = get_schema_map()
 
     for version, values in schema_map.items():
@@ -87,27 +87,65 @@ def get_schemas() -> dict[str, Any]:
     return schema_map
 
 
+@cached
+def get_versions() -> list[str]:
+    """Get the local schema versions from the names of their directories."""
+    return sorted(entry.name for entry in os.scandir(ECS_SCHEMAS_DIR) if entry.is_dir())
+
+
 def get_max_version(include_master: bool = False) -> str:
     """Get maximum available schema version."""
-    versions = get_schema_map().keys()
+    versions = get_versions()
 
-    if include_master and any(v.startswith("master") for v in versions):
-        paths = list(ECS_SCHEMAS_DIR.glob("master*"))
-        return paths[0].name
+    if include_master:
+        master_versions = [v for v in versions if v.startswith("master")]
+        if master_versions:
+            return master_versions[0]
 
     return str(max([Version.parse(v) for v in versions if not v.startswith("master")]))
 
 
-@cached
+@cached(maxsize=8)
 def get_schema(version: str | None = None, name: str = "ecs_flat") -> dict[str, Any]:
-    """Get schema by version."""
+    """Get schema by version, decompressing only the requested file."""
     if version == "master":
         version = get_max_version(include_master=True)
 
-    return get_schemas()[version or str(get_max_version())][name]
+    version = version or get_max_version()
+    path = ECS_SCHEMAS_DIR / version / f"{name}.json.gz"
+    if not path.is_file():
+        raise KeyError(f"Unknown ECS schema: {version} {name}")
 
+    return json.loads(read_gzip(path))
 
-@cached
+
+@cached(maxsize=32)
+def get_schema_index(version: str | None = None) -> SchemaIndex | None:
+    """Get the precompiled field types of an ECS version, if they have been built into the schema store."""
+    if version == "master":
+        version = get_max_version(include_master=True)
+
+    version = version or get_max_version()
+    return get_schema_store().load("ecs", version, ECS_SCHEMAS_DIR / version / "ecs_flat.json.gz")
+
+
+def build_schema_index(version: str) -> Path:
+    """Build the field types of an ECS version, including multi-fields, into the schema store."""
+    source = ECS_SCHEMAS_DIR / version / "ecs_flat.json.gz"
+    path = get_schema_store().save("ecs", version, source, flatten_multi_fields(json.loads(read_gzip(source))))
+    get_schema_index.clear()  # type: ignore[reportFunctionMemberAccess]
+    return path
+
+
+def get_flat_field_types(version: str | None = None) -> dict[str, Any]:
+    """Get the types of all ECS fields and multi-fields, from the schema store when available."""
+    index = get_schema_index(version)
+    if index is not None:
+        return index.to_dict()
+    return flatten_multi_fields(get_schema(version, name="ecs_flat"))
+
+
+@cached(maxsize=128)
 def get_eql_schema(version: str | None = None, index_patterns: list[str] | None = None) -> dict[str, Any]:
     """Return schema in expected format for eql."""
     schema = get_schema(version, name="ecs_flat")
@@ -156,13 +194,14 @@ def flatten(schema: dict[str, Any]) -> dict[str, Any]:
 @cached
 def get_all_flattened_schema() -> dict[str, Any]:
     """Load all schemas into a flattened dictionary."""
+    from .integrations import load_integrations_schemas  # avoid a circular import
+
     all_flattened_schema: dict[str, Any] = {}
     for schema in get_non_ecs_schema().values():
         all_flattened_schema.update(flatten(schema))
 
-    ecs_schemas = get_schemas()
-    for version in ecs_schemas:
-        for index, info in ecs_schemas[version]["ecs_flat"].items():
+    for version in get_versions():
+        for index, info in get_schema(version).items():
             all_flattened_schema.update({index: info["type"]})
 
     for integration_schema in load_integrations_schemas().values():
@@ -249,7 +288,7 @@ class KqlSchema2Eql(eql.Schema):
         return None, None
 
 
-@cached
+@cached(maxsize=128)
 def get_kql_schema(
     version: str | None = None,
     indexes: list[str] | None = None,
@@ -257,7 +296,7 @@ def get_kql_schema(
 ) -> dict[str, Any]:
     """Get schema for KQL."""
     indexes = indexes or []
-    converted = flatten_multi_fields(get_schema(version, name="ecs_flat"))
+    converted = get_flat_field_types(version)
 
     # non-ecs schema
     for index_name in indexes:
@@ -279,7 +318,7 @@ def get_kql_schema(
 
 def download_schemas(refresh_master: bool = True, refresh_all: bool = False, verbose: bool = True) -> None:
     """Download additional schemas from ecs releases."""
-    existing = [Version.parse(v) for v in get_schema_map()] if not refresh_all else []
+    existing = [Version.parse(v) for v in get_versions() if not v.startswith("master")] if not refresh_all else []
     url = "https://api.github.com/repos/elastic/ecs/releases"
     releases = requests.get(url, timeout=30)
 
@@ -318,6 +357,8 @@ def download_schemas(refresh_master: bool = True, refresh_all: bool = False, ver
             if verbose:
                 print("Saved files to {}: \n\t- {}".format(schema_dir, "\n\t- ".join(saved)))
 
+            get_versions.clear()  # type: ignore[reportFunctionMemberAccess]
+
     # handle working master separately
     if refresh_master:
         master_ver = requests.get(
@@ -349,6 +390,9 @@ def download_schemas(refresh_master: bool = True, refresh_all: bool = False, ver
         if verbose:
             print("Saved files to {}: \n\t- {}".format(master_dir, "ecs_flat.json.gz"))
 
+        get_versions.clear()  # type: ignore[reportFunctionMemberAccess]
+        get_schema.clear()  # type: ignore[reportFunctionMemberAccess]
+
 
 def download_endpoint_schemas(target: str, overwrite: bool = True) -> None:
     """Download endpoint custom schemas."""
@@ -8,20 +8,25 @@
 import json
 import shutil
 import sys
-from typing import Any
+from collections.abc import Mapping
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
 
 import eql  # type: ignore[reportMissingTypeStubs]
-from github import Github
 
+from .schema_store import get_schema_store
 from .utils import ETC_DIR, DateTimeEncoder, cached, gzip_compress, read_gzip
 
+if TYPE_CHECKING:
+    from github import Github
+
 ENDGAME_SCHEMA_DIR = ETC_DIR / "endgame_schemas"
 
 
 class EndgameSchemaManager:
     """Endgame Class to download, convert, and save endgame schemas from endgame-evecs."""
 
-    def __init__(self, github_client: Github, endgame_version: str) -> None:
+    def __init__(self, github_client: "Github", endgame_version: str) -> None:
         self.repo = github_client.get_repo("elastic/endgame-evecs")
         self.endgame_version = endgame_version
         self.endgame_schema = self.download_endgame_schema()
@@ -65,7 +70,7 @@ class EndgameSchema(eql.Schema):
         "text": eql.types.TypeHint.String,  # type: ignore[reportAttributeAccessIssue]
     }
 
-    def __init__(self, endgame_schema: dict[str, Any]) -> None:
+    def __init__(self, endgame_schema: Mapping[str, Any]) -> None:
         self.endgame_schema = endgame_schema
         eql.Schema.__init__(self, {}, allow_any=True, allow_generic=False, allow_missing=False)  # type: ignore[reportUnknownMemberType]
 
@@ -83,7 +88,7 @@ class EndgameSchema(eql.Schema):
 
 
 @cached
-def read_endgame_schema(endgame_version: str, warn: bool = False) -> dict[str, Any] | None:
+def read_endgame_schema(endgame_version: str, warn: bool = False) -> Mapping[str, Any] | None:
     """Load Endgame json schema. The schemas
     must be generated with the `download_endgame_schema()` method."""
     # expect versions to be in format of N.N.N or master/main
@@ -97,4 +102,18 @@ def read_endgame_schema(endgame_version: str, warn: bool = False) -> dict[str, A
             return None
         raise FileNotFoundError(str(endgame_schema_path))
 
+    # prefer the precompiled field types when they have been built into the schema store
+    index = get_schema_store().load("endgame", endgame_version, endgame_schema_path)
+    if index is not None:
+        return index
+
     return json.loads(read_gzip(endgame_schema_path))
+
+
+def build_schema_index(endgame_version: str) -> Path:
+    """Build the field types of an Endgame schema version into the schema store."""
+    source = ENDGAME_SCHEMA_DIR / endgame_version / "endgame_ecs_mapping.json.gz"
+    schema = json.loads(read_gzip(source))
+    path = get_schema_store().save("endgame", endgame_version, source, {k: str(v) for k, v in schema.items()})
+    read_endgame_schema.clear()  # type: ignore[reportFunctionMemberAccess]
+    return path
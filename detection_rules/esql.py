@@ -6,7 +6,9 @@
 """ESQL Query Parsing Classes."""
 
 import re
+from collections.abc import Callable, Iterator
 from dataclasses import dataclass
+from typing import Any
 
 
 @dataclass
@@ -58,3 +60,498 @@ def get_esql_query_event_dataset_integrations(query: str) -> list[EventDataset]:
             event_datasets.append(EventDataset(package=parts[0], integration=parts[1]))
 
     return event_datasets
+
+
+# Offline analysis of ES|QL queries, parsing the pipeline just enough to resolve the fields each command reads and the
+# columns it produces, so they can be checked against local mappings without a stack.
+# https://www.elastic.co/docs/reference/query-languages/esql/esql-commands
+
+ESQL_TOKEN_REGEX = re.compile(
+    r"""
+    (?P<comment>//[^\n]*|/\*.*?\*/)
+    |(?P<string>\"\"\".*?\"\"\"|"(?:\\.|[^"\\])*")
+    |(?P<quoted>`(?:``|[^`])*`)
+    |(?P<number>\d+(?:\.\d+)?(?:[eE][+-]?\d+)?)
+    |(?P<param>\?\w*)
+    |(?P<identifier>[A-Za-z_@][\w@]*(?:\.(?:[\w@]+|\*|`(?:``|[^`])*`))*\*?)
+    |(?P<operator>::|==|!=|<=|>=|=~|\S)
+    |(?P<space>\s+)
+    """,
+    re.VERBOSE | re.DOTALL,
+)
+ESQL_KEYWORDS = {
+    "and",
+    "as",
+    "asc",
+    "by",
+    "desc",
+    "false",
+    "first",
+    "in",
+    "is",
+    "last",
+    "like",
+    "metadata",
+    "not",
+    "null",
+    "nulls",
+    "on",
+    "or",
+    "rlike",
+    "true",
+    "where",
+    "with",
+}
+ESQL_METADATA_FIELD_TYPES = {
+    "_id": "keyword",
+    "_ignored": "keyword",
+    "_index": "keyword",
+    "_index_mode": "keyword",
+    "_score": "double",
+    "_source": "_source",
+    "_version": "long",
+}
+# commands named by two words, which are parsed as a single command
+ESQL_TWO_WORD_COMMANDS = {"inline stats", "lookup join"}
+# return types of functions, by name, where they do not depend on the argument types
+ESQL_FUNCTION_TYPES = {
+    **dict.fromkeys(["count", "count_distinct", "date_diff", "date_extract", "to_long", "to_unsigned_long"], "long"),
+    **dict.fromkeys(["bit_length", "byte_length", "length", "locate", "to_integer"], "integer"),
+    **dict.fromkeys(["avg", "median", "median_absolute_deviation", "percentile", "std_dev", "to_double"], "double"),
+    **dict.fromkeys(["date_parse", "date_trunc", "now", "to_datetime"], "date"),
+    **dict.fromkeys(["cidr_match", "ends_with", "is_finite", "starts_with", "to_boolean"], "boolean"),
+    **dict.fromkeys(["ip_prefix", "to_ip"], "ip"),
+    **dict.fromkeys(
+        [
+            "concat",
+            "date_format",
+            "from_base64",
+            "hash",
+            "left",
+            "ltrim",
+            "md5",
+            "mv_concat",
+            "repeat",
+            "replace",
+            "reverse",
+            "right",
+            "rtrim",
+            "sha1",
+            "sha256",
+            "space",
+            "substring",
+            "to_base64",
+            "to_lower",
+            "to_string",
+            "to_upper",
+            "trim",
+            "url_decode",
+            "url_encode",
+        ],
+        "keyword",
+    ),
+}
+# functions which return the type of their first argument
+ESQL_PASSTHROUGH_FUNCTIONS = {
+    "coalesce",
+    "greatest",
+    "least",
+    "max",
+    "min",
+    "mv_dedupe",
+    "mv_first",
+    "mv_last",
+    "mv_max",
+    "mv_min",
+    "mv_slice",
+    "mv_sort",
+    "sample",
+    "top",
+    "values",
+}
+GROK_TYPES = {"int": "integer", "long": "long", "float": "double", "double": "double", "boolean": "boolean"}
+DISSECT_KEY_REGEX = re.compile(r"%\{([^}]*)\}")
+GROK_KEY_REGEX = re.compile(r"%\{\w+:([^}:]+)(?::(\w+))?\}")
+GROK_NAMED_GROUP_REGEX = re.compile(r"\(\?P?<([\w.@]+)>")
+
+
+@dataclass
+class ESQLToken:
+    """A token of an ES|QL query."""
+
+    kind: str
+    value: str
+
+    @property
+    def name(self) -> str:
+        """Get the name of an identifier, without backquotes."""
+        return self.value.replace("``", "\0").replace("`", "").replace("\0", "`")
+
+    def is_keyword(self, *keywords: str) -> bool:
+        return self.kind == "identifier" and self.value.lower() in keywords
+
+
+@dataclass
+class ESQLCommand:
+    """A processing command of an ES|QL query, with the tokens of its arguments."""
+
+    name: str
+    tokens: list[ESQLToken]
+
+    @property
+    def text(self) -> str:
+        return " ".join(token.value for token in self.tokens)
+
+
+def tokenize_esql_query(query: str) -> list[ESQLToken]:
+    """Split an ES|QL query into tokens, dropping whitespace and comments."""
+    tokens: list[ESQLToken] = []
+    for match in ESQL_TOKEN_REGEX.finditer(query):
+        if match.lastgroup not in ("comment", "space"):
+            kind = "identifier" if match.lastgroup == "quoted" else str(match.lastgroup)
+            tokens.append(ESQLToken(kind, match.group()))
+    return tokens
+
+
+def split_top_level(tokens: list[ESQLToken], *separators: str) -> list[list[ESQLToken]]:
+    """Split tokens on separators (operators or keywords) which are not nested in brackets."""
+    parts: list[list[ESQLToken]] = [[]]
+    depth = 0
+    for token in tokens:
+        if token.kind == "operator" and token.value in "([{":
+            depth += 1
+        elif token.kind == "operator" and token.value in ")]}":
+            depth -= 1
+        elif depth == 0 and (token.value in separators if token.kind == "operator" else token.is_keyword(*separators)):
+            parts.append([])
+            continue
+        parts[-1].append(token)
+    return parts
+
+
+def parse_esql_commands(query: str) -> list[ESQLCommand]:
+    """Split an ES|QL query into its source and processing commands."""
+    commands: list[ESQLCommand] = []
+    for tokens in split_top_level(tokenize_esql_query(query), "|"):
+        if not tokens:
+            continue
+        name, *args = tokens
+        # two word commands, such as `INLINE STATS` and `LOOKUP JOIN`
+        if args and args[0].kind == "identifier" and f"{name.value} {args[0].value}".lower() in ESQL_TWO_WORD_COMMANDS:
+            commands.append(ESQLCommand(f"{name.value}{args[0].value}".lower(), args[1:]))
+        else:
+            commands.append(ESQLCommand(name.value.lower(), args))
+    return commands
+
+
+def get_field_references(tokens: list[ESQLToken]) -> list[str]:
+    """Get the names of the fields (or columns) referenced by an expression."""
+    references: list[str] = []
+    for index, token in enumerate(tokens):
+        if token.kind != "identifier" or token.is_keyword(*ESQL_KEYWORDS):
+            continue
+        previous = tokens[index - 1] if index else None
+        following = tokens[index + 1] if index + 1 < len(tokens) else None
+        # function names, type casts and time units of durations, such as `30 minutes`
+        if following is not None and following.value == "(":
+            continue
+        if previous is not None and (previous.value == "::" or previous.kind == "number"):
+            continue
+        references.append(token.name)
+    return references
+
+
+def match_column(pattern: str, name: str) -> bool:
+    """Check if a column name matches a name pattern with wildcards."""
+    return re.fullmatch(re.escape(pattern).replace(r"\*", ".*"), name) is not None
+
+
+def is_single_call(tokens: list[ESQLToken]) -> bool:
+    """Check if an expression is a single function call, and not an expression such as `f(a) + g(b)`."""
+    if len(tokens) < 3 or tokens[0].kind != "identifier" or tokens[1].value != "(":  # noqa: PLR2004
+        return False
+    depth = 0
+    for index, token in enumerate(tokens[1:], 1):
+        depth += {"(": 1, ")": -1}.get(token.value, 0) if token.kind == "operator" else 0
+        if depth == 0:
+            return index == len(tokens) - 1
+    return True
+
+
+def get_mapping_field_type(mappings: dict[str, Any], name: str) -> tuple[bool, str | None]:
+    """Find a field in a nested index mapping, returning whether it exists and its type, when known.
+
+    Subfields of leaf fields are accepted with an unknown type, as multi-fields are not part of the local mappings.
+    """
+    properties: dict[str, Any] | None = mappings
+    field_type: str | None = None
+    for part in name.split("."):
+        if properties is None:
+            return True, None
+        field: dict[str, Any] | None = properties.get(part)
+        if not isinstance(field, dict):
+            return False, None
+        field_type = field.get("type")
+        properties = field.get("properties")
+    return True, field_type
+
+
+@dataclass
+class ESQLAnalysis:
+    """Fields and columns of an ES|QL query resolved against index mappings."""
+
+    sources: list[str]
+    unknown_fields: list[str]
+    columns: list[dict[str, str]]
+    complete: bool = True
+
+
+class ESQLQueryAnalyzer:
+    """Resolve the fields an ES|QL query reads, and the columns it creates, against the mappings of its sources.
+
+    Only the structure of the pipeline is parsed: which fields every command reads and which columns it creates, keeps
+    or drops. Commands which add columns that cannot be known locally, like `LOOKUP JOIN` or `ENRICH` without `WITH`,
+    and commands which are not supported stop unknown fields from being reported for the rest of the query.
+    """
+
+    def __init__(self, query: str, mappings: dict[str, Any]) -> None:
+        self.query = query
+        self.mappings = mappings
+        self.sources: list[str] = []
+        self.unknown_fields: list[str] = []
+        self.complete = True
+        # columns created by the query, and the patterns restricting which mapped fields are still available
+        self.columns: dict[str, str | None] = {}
+        self.kept: list[list[str]] = []
+        self.dropped: list[str] = []
+
+    def analyze(self) -> ESQLAnalysis:
+        for command in parse_esql_commands(self.query):
+            handler: Callable[[ESQLCommand], None] | None = getattr(self, f"command_{command.name}", None)
+            if handler is None:
+                self.complete = False
+                break
+            handler(command)
+
+        columns = [
+            {"name": name, "type": column_type}
+            for name, column_type in self.columns.items()
+            if column_type and name not in ESQL_METADATA_FIELD_TYPES
+        ]
+        return ESQLAnalysis(self.sources, list(dict.fromkeys(self.unknown_fields)), columns, self.complete)
+
+    def is_mapped(self, name: str) -> bool:
+        """Check if a mapped field is still available as a column."""
+        if any(match_column(pattern, name) for pattern in self.dropped):
+            return False
+        if not all(any(match_column(pattern, name) for pattern in patterns) for patterns in self.kept):
+            return False
+        return get_mapping_field_type(self.mappings, name)[0]
+
+    def resolve(self, name: str) -> str | None:
+        """Get the type of a referenced column, recording it if unknown."""
+        if name in self.columns:
+            return self.columns[name]
+        if self.is_mapped(name):
+            return get_mapping_field_type(self.mappings, name)[1]
+        if self.complete:
+            self.unknown_fields.append(name)
+        return None
+
+    def read(self, tokens: list[ESQLToken]) -> None:
+        for name in get_field_references(tokens):
+            _ = self.resolve(name)
+
+    def infer_type(self, tokens: list[ESQLToken]) -> str | None:
+        """Infer the type of simple expressions: literals, columns and calls of functions with known return types."""
+        if len(tokens) == 1:
+            return self.infer_token_type(tokens[0])
+        if not is_single_call(tokens):
+            return None
+
+        function = tokens[0].value.lower()
+        if function in ESQL_FUNCTION_TYPES:
+            return ESQL_FUNCTION_TYPES[function]
+        if function in ESQL_PASSTHROUGH_FUNCTIONS:
+            return self.infer_type(split_top_level(tokens[2:-1], ",")[0])
+        return None
+
+    def infer_token_type(self, token: ESQLToken) -> str | None:
+        """Infer the type of a literal or a column."""
+        if token.kind == "string":
+            return "keyword"
+        if token.kind == "number":
+            return "integer" if token.value.isdigit() else "double"
+        if token.is_keyword("true", "false"):
+            return "boolean"
+        if token.kind == "identifier" and not token.is_keyword(*ESQL_KEYWORDS):
+            return self.resolve(token.name)
+        return None
+
+    def evaluate(self, tokens: list[ESQLToken]) -> Iterator[tuple[str, str | None]]:
+        """Read the `name = expression` or `expression` items of commands like `EVAL`, yielding their columns."""
+        for item in split_top_level(tokens, ","):
+            if len(item) > 2 and item[0].kind == "identifier" and item[1].value == "=":  # noqa: PLR2004
+                name, expression = item[0].name, item[2:]
+            elif len(item) == 1:
+                name, expression = item[0].name, item
+            elif item:
+                name, expression = " ".join(token.value for token in item), item
+            else:
+                continue
+
+            # aggregations may be filtered, as in `COUNT(*) WHERE ...`
+            expression, *conditions = split_top_level(expression, "where")
+            for condition in conditions:
+                self.read(condition)
+            self.read(expression)
+            yield name, self.infer_type(expression)
+
+    def define(self, name: str, column_type: str | None) -> None:
+        # a new column replaces any column with the same name
+        _ = self.columns.pop(name, None)
+        self.columns[name] = column_type
+
+    def command_from(self, command: ESQLCommand) -> None:
+        sources, *metadata = split_top_level(command.tokens, "metadata")
+        self.sources = [source for source in "".join(t.value for t in sources).split(",") if source]
+        for tokens in metadata:
+            for name in get_field_references(tokens):
+                self.define(name, ESQL_METADATA_FIELD_TYPES.get(name))
+
+    command_ts = command_from
+
+    def command_row(self, command: ESQLCommand) -> None:
+        self.kept.append([])
+        for name, column_type in self.evaluate(command.tokens):
+            self.define(name, column_type)
+
+    def command_eval(self, command: ESQLCommand) -> None:
+        # columns can be used by the expressions following them in the same command
+        for name, column_type in self.evaluate(command.tokens):
+            self.define(name, column_type)
+
+    def command_where(self, command: ESQLCommand) -> None:
+        self.read(command.tokens)
+
+    command_sort = command_where
+    command_mv_expand = command_where
+
+    def command_limit(self, _: ESQLCommand) -> None:
+        pass
+
+    command_sample = command_limit
+
+    def command_stats(self, command: ESQLCommand, inline: bool = False) -> None:
+        aggregations, *groups = split_top_level(command.tokens, "by")
+        created = dict(self.evaluate(aggregations))
+        for tokens in groups:
+            created.update(self.evaluate(tokens))
+
+        if inline:
+            for name, column_type in created.items():
+                self.define(name, column_type)
+        else:
+            # only the aggregations and groups are left
+            self.columns = created
+            self.kept.append([])
+
+    def command_inlinestats(self, command: ESQLCommand) -> None:
+        self.command_stats(command, inline=True)
+
+    def get_patterns(self, command: ESQLCommand) -> list[str]:
+        """Get the column name patterns of `KEEP` and `DROP`, reading the names without wildcards."""
+        patterns = ["".join(token.name for token in item) for item in split_top_level(command.tokens, ",") if item]
+        for pattern in patterns:
+            if "*" not in pattern:
+                _ = self.resolve(pattern)
+        return patterns
+
+    def command_keep(self, command: ESQLCommand) -> None:
+        patterns = self.get_patterns(command)
+        self.columns = {
+            name: column_type
+            for name, column_type in self.columns.items()
+            if any(match_column(pattern, name) for pattern in patterns)
+        }
+        self.kept.append(patterns)
+
+    def command_drop(self, command: ESQLCommand) -> None:
+        patterns = self.get_patterns(command)
+        self.columns = {
+            name: column_type
+            for name, column_type in self.columns.items()
+            if not any(match_column(pattern, name) for pattern in patterns)
+        }
+        self.dropped.extend(patterns)
+
+    def command_rename(self, command: ESQLCommand) -> None:
+        for item in split_top_level(command.tokens, ","):
+            # `old AS new`, or `new = old`
+            if len(item) != 3:  # noqa: PLR2004
+                continue
+            if item[1].is_keyword("as"):
+                old, new = item[0].name, item[2].name
+            elif item[1].value == "=":
+                new, old = item[0].name, item[2].name
+            else:
+                continue
+
+            column_type = self.resolve(old)
+            _ = self.columns.pop(old, None)
+            self.dropped.append(old)
+            self.define(new, column_type)
+
+    def get_pattern(self, command: ESQLCommand) -> str:
+        """Read the input column of `DISSECT` and `GROK`, and get their pattern."""
+        self.read(command.tokens[:1])
+        strings = [token.value for token in command.tokens[1:2] if token.kind == "string"]
+        return strings[0].strip('"') if strings else ""
+
+    def command_dissect(self, command: ESQLCommand) -> None:
+        for key in DISSECT_KEY_REGEX.findall(self.get_pattern(command)):
+            # skipped keys start with `?`, and other modifiers are not part of the name
+            name = key.lstrip("+*&").split("->")[0].strip()
+            if name and not name.startswith("?"):
+                self.define(name, "keyword")
+
+    def command_grok(self, command: ESQLCommand) -> None:
+        pattern = self.get_pattern(command)
+        for name, grok_type in GROK_KEY_REGEX.findall(pattern):
+            self.define(name, GROK_TYPES.get(grok_type, "keyword"))
+        # grok patterns may also use regex named groups
+        for name in GROK_NAMED_GROUP_REGEX.findall(pattern):
+            self.define(name, "keyword")
+
+    def command_completion(self, command: ESQLCommand) -> None:
+        # `COMPLETION [column =] prompt WITH {...}`
+        tokens = split_top_level(command.tokens, "with")[0]
+        if len(tokens) > 2 and tokens[0].kind == "identifier" and tokens[1].value == "=":  # noqa: PLR2004
+            name, tokens = tokens[0].name, tokens[2:]
+        else:
+            name = "completion"
+        self.read(tokens)
+        self.define(name, "keyword")
+
+    def command_enrich(self, command: ESQLCommand) -> None:
+        tokens, *with_tokens = split_top_level(command.tokens, "with")
+        for on_tokens in split_top_level(tokens, "on")[1:]:
+            self.read(on_tokens)
+        if not with_tokens:
+            # every enrich field of the policy is added
+            self.complete = False
+            return
+        for item in split_top_level(with_tokens[0], ","):
+            if item:
+                self.define(item[0].name, None)
+
+    def command_lookupjoin(self, command: ESQLCommand) -> None:
+        for on_tokens in split_top_level(command.tokens, "on")[1:]:
+            self.read(on_tokens)
+        # every field of the lookup index is added
+        self.complete = False
+
+
+def analyze_esql_query(query: str, mappings: dict[str, Any]) -> ESQLAnalysis:
+    """Analyze the fields and columns of an ES|QL query against the nested index mappings of its sources."""
+    return ESQLQueryAnalyzer(query, mappings).analyze()
@@ -22,15 +22,23 @@ __all__ = (
 )
 
 
+# test indices shared by remote validations through a pool, which outlive errors raised while validating a single rule
+pooled_test_indices: set[str] = set()
+
+
 def cleanup_empty_indices(
     elastic_client: Elasticsearch, index_patterns: Sequence[str] = ("rule-test-*", "test-*")
 ) -> None:
-    """Delete empty indices matching the given patterns."""
+    """Delete empty indices matching the given patterns, except for pooled test indices still in use."""
     if getdefault("skip_empty_index_cleanup")():
         return
     for pattern in index_patterns:
         indices = elastic_client.cat.indices(index=pattern, format="json")
-        empty_indices = [index["index"] for index in indices if index["docs.count"] == "0"]  # type: ignore[reportMissingTypeStubs]
+        empty_indices = [
+            index["index"]  # type: ignore[reportMissingTypeStubs]
+            for index in indices
+            if index["docs.count"] == "0" and index["index"] not in pooled_test_indices  # type: ignore[reportMissingTypeStubs]
+        ]
         for empty_index in empty_indices:
             _ = elastic_client.indices.delete(index=empty_index)
 
@@ -41,14 +49,15 @@ class EsqlKibanaBaseError(ClientError):
     def __init__(
         self,
         message: str,
-        elastic_client: Elasticsearch,
+        elastic_client: Elasticsearch | None = None,
     ) -> None:
-        cleanup_empty_indices(elastic_client)
+        if elastic_client:
+            cleanup_empty_indices(elastic_client)
         super().__init__(message, original_error=self)
 
 
 class EsqlSchemaError(EsqlKibanaBaseError):
-    """Error in ESQL schema. Validated via Kibana until AST is available."""
+    """Error in ESQL schema. Validated via Kibana, or locally against the index mappings."""
 
 
 class EsqlUnsupportedTypeError(EsqlKibanaBaseError):
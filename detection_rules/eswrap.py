@@ -5,10 +5,13 @@
 
 """Elasticsearch cli commands."""
 
+import gzip
 import json
 import sys
 import time
-from collections import defaultdict
+from collections import defaultdict, deque
+from collections.abc import Callable, Iterable, Iterator
+from contextlib import nullcontext, suppress
 from pathlib import Path
 from typing import IO, Any
 
@@ -29,6 +32,14 @@ COLLECTION_DIR = get_path(["collections"])
 MATCH_ALL: dict[str, dict[str, Any]] = {"bool": {"filter": [{"match_all": {}}]}}
 RULES_CONFIG = parse_rules_config()
 
+DEFAULT_MAX_CONCURRENT_SEARCHES = 8
+DEFAULT_MSEARCH_MAX_SEARCHES = 100
+DEFAULT_MSEARCH_MAX_BYTES = 5 * 1024 * 1024
+ASYNC_SEARCH_KEEP_ALIVE = "5m"
+ASYNC_SEARCH_POLL_INTERVAL = 0.5
+DEFAULT_STREAM_PAGE_SIZE = 1000
+PIT_KEEP_ALIVE = "2m"
+
 
 def add_range_to_dsl(dsl_filter: list[dict[str, Any]], start_time: str, end_time: str = "now") -> None:
     dsl_filter.append(
@@ -146,6 +157,70 @@ class Events:
                 f.writelines([json.dumps(e, sort_keys=True) + "\n" for e in events])
                 click.echo(f"{len(events)} events saved to: {path}")
 
+    @classmethod
+    def stream_save(
+        cls,
+        hits: Iterable[dict[str, Any]],
+        rta_name: str | None = None,
+        dump_dir: Path | None = None,
+        host_id: str | None = None,
+        compress: bool = False,
+    ) -> dict[str, Path]:
+        """Save collected events as they are read, to one ndjson file per agent type.
+
+        Events should already be sorted by timestamp, and are written without being held in memory. The dump
+        directory is resolved from the first event, the same way as `save`.
+        """
+        files: dict[str, IO[str]] = {}
+        paths: dict[str, Path] = {}
+        counts: dict[str, int] = defaultdict(int)
+
+        try:
+            for hit in hits:
+                event = hit["_source"]
+                if not isinstance(event["@timestamp"], str):
+                    event["@timestamp"] = unix_time_to_formatted(event["@timestamp"])
+
+                if dump_dir is None:
+                    host_os_family = event.get("host", {}).get("os", {}).get("family")
+                    if event.get("host", {}).get("id") != host_id or not host_os_family:
+                        click.echo(f"Unable to determine host.os.family for host_id: {host_id}")
+                        host_os_family = click.prompt(
+                            "Please enter the host.os.family for this host_id",
+                            type=click.Choice(["windows", "macos", "linux"]),
+                            default="windows",
+                        )
+                    dump_dir = cls._get_dump_dir(rta_name=rta_name, host_id=host_id, host_os_family=host_os_family)
+
+                source = event["agent"]["type"]
+                if source not in files:
+                    path = dump_dir / (source + (".ndjson.gz" if compress else ".ndjson"))
+                    files[source] = gzip.open(path, "wt") if compress else path.open("w")  # noqa: SIM115
+                    paths[source] = path
+
+                _ = files[source].write(json.dumps(event, sort_keys=True) + "\n")
+                counts[source] += 1
+        finally:
+            for f in files.values():
+                f.close()
+
+        if not paths:
+            raise ValueError("Nothing to save. Verify events are streaming and that the host id is correct")
+
+        for source, path in paths.items():
+            click.echo(f"{counts[source]} events saved to: {path}")
+        return paths
+
+    @classmethod
+    def load(cls, paths: Iterable[Path]) -> "Events":
+        """Load events saved to ndjson files, which may be gzip compressed."""
+        events: dict[str, list[Any]] = {}
+        for path in paths:
+            source = path.name.split(".")[0]
+            with gzip.open(path, "rt") if path.suffix == ".gz" else path.open() as f:
+                events[source] = [json.loads(line) for line in f if line.strip()]
+        return cls(events)
+
 
 class CollectEvents:
     """Event collector for elastic stack."""
@@ -248,20 +323,169 @@ class CollectEvents:
 
         return results
 
-    def search_from_rule(
+    def stream(  # noqa: PLR0913
+        self,
+        query: str | dict[str, Any],
+        language: str,
+        index: str | list[str] = "*",
+        start_time: str | None = None,
+        end_time: str | None = None,
+        *,
+        max_events: int | None = None,
+        page_size: int = DEFAULT_STREAM_PAGE_SIZE,
+    ) -> Iterator[dict[str, Any]]:
+        """Stream every matching hit in timestamp order, using a point in time and `search_after`.
+
+        Pages are requested until the results, or `max_events`, are exhausted, so only one page is held in memory.
+        """
+        if language == "eql":
+            raise ValueError("EQL searches cannot be streamed")
+
+        index_str, formatted_dsl, lucene_query = self._prep_query(
+            query=query, language=language, index=index, start_time=start_time, end_time=end_time
+        )
+        query_dsl = formatted_dsl["query"]
+        if lucene_query:
+            query_dsl["bool"]["filter"].append({"query_string": {"query": lucene_query}})
+
+        sort = [{"@timestamp": {"order": "asc", "unmapped_type": "date"}}, {"_shard_doc": "asc"}]
+        pit = self.client.open_point_in_time(index=index_str, keep_alive=PIT_KEEP_ALIVE, ignore_unavailable=True)
+        pit_id = pit["id"]
+        search_after = None
+        collected = 0
+
+        try:
+            while max_events is None or collected < max_events:
+                size = page_size if max_events is None else min(page_size, max_events - collected)
+                response = self.client.search(
+                    query=query_dsl,
+                    pit={"id": pit_id, "keep_alive": PIT_KEEP_ALIVE},
+                    size=size,
+                    sort=sort,
+                    search_after=search_after,
+                )
+                pit_id = response.get("pit_id", pit_id)
+                hits = response["hits"]["hits"]
+                yield from hits
+
+                collected += len(hits)
+                if len(hits) < size:
+                    break
+                search_after = hits[-1]["sort"]
+        finally:
+            _ = self.client.close_point_in_time(id=pit_id)
+
+    @staticmethod
+    def _chunk_multi_searches(
+        searches: list[tuple[TOMLRule, dict[str, Any], dict[str, Any]]],
+        max_searches: int,
+        max_bytes: int,
+    ) -> Iterator[list[tuple[TOMLRule, dict[str, Any], dict[str, Any]]]]:
+        """Split msearch requests into chunks of at most `max_searches` searches and about `max_bytes` of ndjson."""
+        chunk: list[tuple[TOMLRule, dict[str, Any], dict[str, Any]]] = []
+        chunk_bytes = 0
+        for search in searches:
+            _, header, body = search
+            search_bytes = len(json.dumps(header)) + len(json.dumps(body)) + 2
+            if chunk and (len(chunk) >= max_searches or chunk_bytes + search_bytes > max_bytes):
+                yield chunk
+                chunk, chunk_bytes = [], 0
+            chunk.append(search)
+            chunk_bytes += search_bytes
+
+        if chunk:
+            yield chunk
+
+    def _run_async_searches(
+        self,
+        searches: list[tuple[TOMLRule, str, dict[str, Any]]],
+        survey_results: dict[str, Any],
+        max_concurrent_searches: int,
+        on_complete: Callable[[int], None],
+    ) -> None:
+        """Submit async EQL and lucene searches, keeping up to `max_concurrent_searches` running and polling them."""
+        async_client = AsyncSearchClient(self.client)
+        pending = deque(searches)
+        running: dict[str, tuple[TOMLRule, str, float]] = {}
+
+        def complete(rule: TOMLRule, language: str, result: dict[str, Any], started: float) -> None:
+            unique_fields = ["process.name"] if language == "lucene" else rule.contents.data.unique_fields  # type: ignore[reportAttributeAccessIssue]
+            survey_results[rule.id] = parse_unique_field_results(rule.contents.data.type, unique_fields, result)  # type: ignore[reportUnknownArgumentType]
+            survey_results[rule.id]["search_time_ms"] = round((time.perf_counter() - started) * 1000)
+            on_complete(1)
+
+        def fail(rule: TOMLRule, error: elasticsearch.ApiError) -> None:
+            reason = error.info["error"]["reason"] if isinstance(error.info, dict) else str(error)  # type: ignore[reportUnknownMemberType]
+            survey_results[rule.id] = {"error_retrieving_results": True, "error": reason}
+            on_complete(1)
+
+        while pending or running:
+            while pending and len(running) < max_concurrent_searches:
+                rule, language, search_args = pending.popleft()
+                started = time.perf_counter()
+                try:
+                    # wait for 0 to try and force async with no immediate results (not guaranteed)
+                    if language == "eql":
+                        result = self.client.eql.search(
+                            **search_args, wait_for_completion_timeout="0ms", keep_alive=ASYNC_SEARCH_KEEP_ALIVE
+                        )
+                    else:
+                        result = async_client.submit(
+                            **search_args, wait_for_completion_timeout=0, keep_alive=ASYNC_SEARCH_KEEP_ALIVE
+                        )
+                except (elasticsearch.NotFoundError, elasticsearch.RequestError) as e:
+                    fail(rule, e)
+                    continue
+
+                if result.get("is_running") is True:
+                    running[result["id"]] = (rule, language, started)
+                else:
+                    complete(rule, language, result.body if language == "eql" else result["response"], started)
+
+            if not running:
+                continue
+
+            # poll every running search together, before submitting more
+            time.sleep(ASYNC_SEARCH_POLL_INTERVAL)
+            for search_id, (rule, language, started) in list(running.items()):
+                try:
+                    result = self.client.eql.get(id=search_id) if language == "eql" else async_client.get(id=search_id)
+                except (elasticsearch.NotFoundError, elasticsearch.RequestError) as e:
+                    del running[search_id]
+                    fail(rule, e)
+                    continue
+
+                if result.get("is_running") is True:
+                    continue
+
+                del running[search_id]
+                complete(rule, language, result.body if language == "eql" else result["response"], started)
+
+                # the stored results are no longer needed
+                with suppress(elasticsearch.NotFoundError):
+                    _ = self.client.eql.delete(id=search_id) if language == "eql" else async_client.delete(id=search_id)
+
+    def search_from_rule(  # noqa: PLR0913
         self,
         rules: RuleCollection,
         start_time: str | None = None,
         end_time: str = "now",
         size: int | None = None,
+        *,
+        max_concurrent_searches: int = DEFAULT_MAX_CONCURRENT_SEARCHES,
+        msearch_max_searches: int = DEFAULT_MSEARCH_MAX_SEARCHES,
+        msearch_max_bytes: int = DEFAULT_MSEARCH_MAX_BYTES,
+        show_progress: bool = False,
     ) -> dict[str, Any]:
-        """Search an elasticsearch instance using a rule."""
-        async_client = AsyncSearchClient(self.client)
+        """Search an elasticsearch instance using a rule.
+
+        KQL rules are batched into size-bounded msearch requests, while EQL and lucene rules are submitted as async
+        searches, with up to `max_concurrent_searches` running at once. The time taken by each search is added to its
+        results as `search_time_ms`.
+        """
         survey_results: dict[str, Any] = {}
-        multi_search: list[dict[str, Any]] = []
-        multi_search_rules: list[TOMLRule] = []
-        async_searches: list[tuple[TOMLRule, Any]] = []
-        eql_searches: list[tuple[TOMLRule, dict[str, Any]]] = []
+        multi_searches: list[tuple[TOMLRule, dict[str, Any], dict[str, Any]]] = []
+        async_searches: list[tuple[TOMLRule, str, dict[str, Any]]] = []
 
         for rule in rules:
             if not rule.contents.data.get("query"):
@@ -269,7 +493,6 @@ class CollectEvents:
 
             language = rule.contents.data.get("language")
             query = rule.contents.data.query  # type: ignore[reportAttributeAccessIssue]
-            rule_type = rule.contents.data.type
             index_str, formatted_dsl, _ = self._prep_query(
                 query=query,  # type: ignore[reportUnknownArgumentType]
                 language=language,  # type: ignore[reportUnknownArgumentType]
@@ -279,65 +502,54 @@ class CollectEvents:
             )
             formatted_dsl.update(size=size or self.max_events)
 
-            # prep for searches: msearch for kql | async search for lucene | eql client search for eql
+            # prep for searches: msearch for kql | async search for lucene | async eql search for eql
             if language == "kuery":
-                multi_search_rules.append(rule)
-                multi_search.append({"index": index_str, "allow_no_indices": "true", "ignore_unavailable": "true"})
-                multi_search.append(formatted_dsl)
+                header = {"index": index_str, "allow_no_indices": "true", "ignore_unavailable": "true"}
+                multi_searches.append((rule, header, formatted_dsl))
             elif language == "lucene":
-                # wait for 0 to try and force async with no immediate results (not guaranteed)
-                result = async_client.submit(
-                    body=formatted_dsl,
-                    q=query,  # type: ignore[reportUnknownArgumentType]
-                    index=index_str,
-                    allow_no_indices=True,
-                    ignore_unavailable=True,
-                    wait_for_completion_timeout=0,
-                )
-                if result["is_running"] is True:
-                    async_searches.append((rule, result["id"]))
-                else:
-                    survey_results[rule.id] = parse_unique_field_results(
-                        rule_type, ["process.name"], result["response"]
-                    )
+                lucene_args: dict[str, Any] = {
+                    "body": formatted_dsl,
+                    "q": query,
+                    "index": index_str,
+                    "allow_no_indices": True,
+                    "ignore_unavailable": True,
+                }
+                async_searches.append((rule, language, lucene_args))
             elif language == "eql":
-                eql_body: dict[str, Any] = {
+                eql_args: dict[str, Any] = {
                     "index": index_str,
-                    "params": {"ignore_unavailable": "true", "allow_no_indices": "true"},
-                    "body": {"query": query, "filter": formatted_dsl["filter"]},
+                    "query": query,
+                    "filter": formatted_dsl["filter"],
+                    "allow_no_indices": True,
+                    "ignore_unavailable": True,
                 }
-                eql_searches.append((rule, eql_body))
-
-        # assemble search results
-        multi_search_results = self.client.msearch(searches=multi_search)
-        for index, result in enumerate(multi_search_results["responses"]):
-            try:
-                rule = multi_search_rules[index]
-                survey_results[rule.id] = parse_unique_field_results(
-                    rule.contents.data.type,
-                    rule.contents.data.unique_fields,  # type: ignore[reportAttributeAccessIssje]
-                    result,
-                )
-            except KeyError:
-                survey_results[multi_search_rules[index].id] = {"error_retrieving_results": True}
-
-        for entry in eql_searches:
-            rule, search_args = entry
-            try:
-                result = self.client.eql.search(**search_args)
-                survey_results[rule.id] = parse_unique_field_results(
-                    rule.contents.data.type,
-                    rule.contents.data.unique_fields,  # type: ignore[reportAttributeAccessIssue]
-                    result,  # type: ignore[reportAttributeAccessIssue]
-                )
-            except (elasticsearch.NotFoundError, elasticsearch.RequestError) as e:
-                survey_results[rule.id] = {"error_retrieving_results": True, "error": e.info["error"]["reason"]}
+                async_searches.append((rule, language, eql_args))
 
-        for entry in async_searches:
-            rule: TOMLRule
-            rule, async_id = entry
-            result = async_client.get(id=async_id)["response"]
-            survey_results[rule.id] = parse_unique_field_results(rule.contents.data.type, ["process.name"], result)
+        progress = (
+            click.progressbar(length=len(multi_searches) + len(async_searches), label="Searching rules")
+            if show_progress
+            else nullcontext(None)
+        )
+        with progress as bar:
+            update: Callable[[int], None] = bar.update if bar else lambda _: None
+
+            # assemble search results
+            for chunk in self._chunk_multi_searches(multi_searches, msearch_max_searches, msearch_max_bytes):
+                multi_search = [line for _, header, body in chunk for line in (header, body)]
+                multi_search_results = self.client.msearch(searches=multi_search)
+                for (rule, _, _), result in zip(chunk, multi_search_results["responses"], strict=True):
+                    try:
+                        survey_results[rule.id] = parse_unique_field_results(
+                            rule.contents.data.type,
+                            rule.contents.data.unique_fields,  # type: ignore[reportAttributeAccessIssue]
+                            result,
+                        )
+                        survey_results[rule.id]["search_time_ms"] = result.get("took")
+                    except KeyError:
+                        survey_results[rule.id] = {"error_retrieving_results": True}
+                update(len(chunk))
+
+            self._run_async_searches(async_searches, survey_results, max_concurrent_searches, update)
 
         return survey_results
 
@@ -412,8 +624,9 @@ class CollectEvents:
 
 def evaluate(rule: TOMLRule, events: list[Any], normalize_kql_keywords: bool = False) -> list[Any]:
     """Evaluate a query against events."""
-    evaluator = kql.get_evaluator(kql.parse(rule.query), normalize_kql_keywords=normalize_kql_keywords)  # type: ignore[reportUnknownMemberType]
-    return list(filter(evaluator, events))  # type: ignore[reportUnknownMemberType]
+    parsed = kql.parse(rule.query, normalize_kql_keywords=normalize_kql_keywords)  # type: ignore[reportUnknownMemberType]
+    matches = kql.get_batch_evaluator(parsed)(events)  # type: ignore[reportUnknownMemberType]
+    return [event for event, matched in zip(events, matches, strict=True) if matched]  # type: ignore[reportUnknownVariableType]
 
 
 def combine_sources(sources: list[Any]) -> list[Any]:
@@ -438,7 +651,7 @@ class CollectEventsWithDSL(CollectEvents):
 
         return event_by_type
 
-    def run(self, dsl: dict[str, Any], indexes: str | list[str], start_time: str) -> Events:
+    def run(self, dsl: dict[str, Any], indexes: str | list[str], start_time: str, size: int = 5000) -> Events:
         """Collect the events."""
         results = self.search(
             dsl,
@@ -446,12 +659,47 @@ class CollectEventsWithDSL(CollectEvents):
             index=indexes,
             start_time=start_time,
             end_time="now",
-            size=5000,
+            size=size,
             sort=[{"@timestamp": {"order": "asc"}}],
         )
         events = self._group_events_by_type(results)
         return Events(events)
 
+    def stream_run(  # noqa: PLR0913
+        self,
+        dsl: dict[str, Any],
+        indexes: str | list[str],
+        start_time: str,
+        *,
+        max_events: int | None = None,
+        rta_name: str | None = None,
+        host_id: str | None = None,
+        compress: bool = False,
+    ) -> dict[str, Path]:
+        """Collect the events, writing them to the dump directory as they are read."""
+        hits = self.stream(
+            dsl,
+            language="dsl",
+            index=indexes,
+            start_time=start_time,
+            end_time="now",
+            max_events=max_events,
+        )
+        return Events.stream_save(hits, rta_name=rta_name, host_id=host_id, compress=compress)
+
+
+def parse_max_events(_: click.Context, __: click.Parameter, value: str | int | None) -> int | None:
+    """Parse the maximum number of events, where `none` means no limit."""
+    if value is None or str(value).lower() == "none":
+        return None
+    try:
+        max_events = int(value)
+    except ValueError:
+        raise click.BadParameter(f"{value} is not an integer or 'none'") from None
+    if max_events < 1:
+        raise click.BadParameter("must be at least 1")
+    return max_events
+
 
 @root.command("normalize-data")
 @click.argument("events-file", type=Path)
@@ -489,6 +737,15 @@ def es_group(ctx: click.Context, **kwargs: Any) -> None:
 @click.option("--rta-name", "-r", help="Name of RTA in order to save events directly to unit tests data directory")
 @click.option("--rule-id", help="Updates rule mapping in rule-mapping.yaml file (requires --rta-name)")
 @click.option("--view-events", is_flag=True, help="Print events after saving")
+@click.option(
+    "--max-events",
+    default="5000",
+    callback=parse_max_events,
+    show_default=True,
+    help="Maximum number of events to collect, or 'none' to collect every event (implies --stream)",
+)
+@click.option("--stream", is_flag=True, help="Write events to the dump directory as they are paged through")
+@click.option("--gzip", "compress", is_flag=True, help="Gzip the streamed ndjson files")
 @click.pass_context
 def collect_events(  # noqa: PLR0913, PLR0917
     ctx: click.Context,
@@ -498,11 +755,14 @@ def collect_events(  # noqa: PLR0913, PLR0917
     rta_name: str,
     rule_id: str,
     view_events: bool,
+    max_events: int | None,
+    stream: bool,
+    compress: bool,
 ) -> Events:
     """Collect events from Elasticsearch."""
     client: Elasticsearch = ctx.obj["es"]
-    dsl = kql.to_dsl(query) if query else MATCH_ALL  # type: ignore[reportUnknownMemberType]
-    dsl["bool"].setdefault("filter", []).append(  # type: ignore[reportUnknownMemberType]
+    dsl: dict[str, Any] = kql.to_dsl(query) if query else MATCH_ALL  # type: ignore[reportUnknownMemberType]
+    dsl["bool"].setdefault("filter", []).append(
         {
             "bool": {
                 "should": [{"match_phrase": {"host.id": host_id}}],
@@ -515,8 +775,21 @@ def collect_events(  # noqa: PLR0913, PLR0917
         start = time.time()
         click.pause("Press any key once detonation is complete ...")
         start_time = f"now-{round(time.time() - start) + 5}s"
-        events = collector.run(dsl, index or "*", start_time)  # type: ignore[reportUnknownArgument]
-        events.save(rta_name=rta_name, host_id=host_id)
+        if stream or max_events is None:
+            paths = collector.stream_run(
+                dsl,
+                index or "*",  # type: ignore[reportUnknownArgument]
+                start_time,
+                max_events=max_events,
+                rta_name=rta_name,
+                host_id=host_id,
+                compress=compress,
+            )
+            # only read the saved events back when they are needed
+            events = Events.load(paths.values()) if (rta_name and rule_id) or view_events else Events({})
+        else:
+            events = collector.run(dsl, index or "*", start_time, size=max_events)  # type: ignore[reportUnknownArgument]
+            events.save(rta_name=rta_name, host_id=host_id)
 
         if rta_name and rule_id:
             _ = events.evaluate_against_rule(rule_id)
@@ -524,7 +797,7 @@ def collect_events(  # noqa: PLR0913, PLR0917
         if view_events and events.events:
             events.echo_events(pager=True)
 
-    except AssertionError as e:
+    except (AssertionError, ValueError) as e:
         error_msg = "No events collected! Verify events are streaming and that the agent-hostname is correct"
         raise_client_error(error_msg, e, ctx=ctx)
 
@@ -0,0 +1,155 @@
+# Copyright Elasticsearch B.V. and/or licensed to Elasticsearch B.V. under one
+# or more contributor license agreements. Licensed under the Elastic License
+# 2.0; you may not use this file except in compliance with the Elastic License
+# 2.0.
+
+"""Profile the wall time and memory of importing detection-rules and loading its data."""
+
+import importlib
+import json
+import subprocess
+import sys
+import time
+from collections.abc import Callable, Iterable
+from dataclasses import dataclass
+from typing import Any
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+TOTAL_STAGE = "total"
+
+
+def _current_schema_versions() -> dict[str, Any]:
+    from semver import Version
+
+    from .config import load_current_package_version
+    from .schemas import get_stack_schemas
+
+    version = Version.parse(load_current_package_version(), optional_minor_and_patch=True)
+    return get_stack_schemas()[str(version)]
+
+
+def _load_rules_config() -> None:
+    from .config import parse_rules_config
+
+    _ = parse_rules_config()
+
+
+def _load_integrations_manifests() -> None:
+    from .integrations import load_integrations_manifests
+
+    _ = load_integrations_manifests()
+
+
+def _load_ecs_schema() -> None:
+    from . import ecs
+
+    _ = ecs.get_schema(_current_schema_versions()["ecs"])
+
+
+def _load_beats_schema() -> None:
+    from . import beats
+
+    _ = beats.read_beats_schema(_current_schema_versions()["beats"])
+
+
+def _load_endgame_schema() -> None:
+    from . import endgame
+
+    _ = endgame.read_endgame_schema(_current_schema_versions()["endgame"])
+
+
+def _load_attack() -> None:
+    from . import attack
+
+    _ = attack.get_attack_lookups()
+
+
+# stages run in order in the same interpreter, so each one only accounts for what the previous ones did not load
+STAGES: dict[str, Callable[[], Any]] = {
+    "kql": lambda: importlib.import_module("kql"),
+    "kibana": lambda: importlib.import_module("kibana"),
+    "rules_config": _load_rules_config,
+    "detection_rules": lambda: importlib.import_module(".main", __package__),
+    "integrations_manifests": _load_integrations_manifests,
+    "ecs_schema": _load_ecs_schema,
+    "beats_schema": _load_beats_schema,
+    "endgame_schema": _load_endgame_schema,
+    "attack": _load_attack,
+}
+
+
+@dataclass
+class StageProfile:
+    """Wall time and peak memory growth of a profiled stage."""
+
+    name: str
+    seconds: float
+    memory_mb: float | None = None
+
+
+def _peak_rss_mb() -> float | None:
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak / 1024**2 if sys.platform == "darwin" else peak / 1024
+
+
+def run_stages(names: Iterable[str]) -> list[StageProfile]:
+    """Run the stages in the current interpreter and profile each one."""
+    profiles: list[StageProfile] = []
+    for name in names:
+        before = _peak_rss_mb()
+        start = time.perf_counter()
+        _ = STAGES[name]()
+        elapsed = time.perf_counter() - start
+        after = _peak_rss_mb()
+        memory = after - before if after is not None and before is not None else None
+        profiles.append(StageProfile(name, elapsed, memory))
+    return profiles
+
+
+def profile_imports(names: Iterable[str] | None = None, rounds: int = 1) -> list[StageProfile]:
+    """Profile the stages in fresh interpreters, keeping the best time and memory of each stage over the rounds."""
+    names = list(names or STAGES)
+    best: dict[str, StageProfile] = {}
+
+    for _ in range(rounds):
+        result = subprocess.run(
+            [sys.executable, "-m", __name__, *names],
+            capture_output=True,
+            check=True,
+            text=True,
+        )
+        # stages may print on their own, so the profiles are always written last
+        for entry in json.loads(result.stdout.splitlines()[-1]):
+            profile = StageProfile(**entry)
+            current = best.get(profile.name)
+            if current is None:
+                best[profile.name] = profile
+                continue
+
+            current.seconds = min(current.seconds, profile.seconds)
+            if profile.memory_mb is not None and current.memory_mb is not None:
+                current.memory_mb = min(current.memory_mb, profile.memory_mb)
+
+    return [best[name] for name in names]
+
+
+def check_budgets(profiles: list[StageProfile], budgets: dict[str, float]) -> list[str]:
+    """Get a message for every stage, or the total, which took longer than its budget in seconds."""
+    seconds = {p.name: p.seconds for p in profiles}
+    seconds[TOTAL_STAGE] = sum(p.seconds for p in profiles)
+    return [
+        f"{name} took {seconds[name]:.3f}s, budget is {budget:.3f}s"
+        for name, budget in budgets.items()
+        if name in seconds and seconds[name] > budget
+    ]
+
+
+if __name__ == "__main__":
+    _ = sys.stdout.write("\n" + json.dumps([vars(p) for p in run_stages(sys.argv[1:])]) + "\n")
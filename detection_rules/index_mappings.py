@@ -5,18 +5,25 @@
 
 """Validation logic for rules containing queries."""
 
+import hashlib
+import json
+import os
 import re
+import threading
 import time
-from collections.abc import Callable
+from collections import Counter, OrderedDict, defaultdict
+from collections.abc import Callable, Generator
+from contextlib import contextmanager
 from copy import deepcopy
-from typing import Any
+from pathlib import Path
+from typing import Any, Self
 
 from elastic_transport import ObjectApiResponse
 from elasticsearch import Elasticsearch  # type: ignore[reportMissingTypeStubs]
 from elasticsearch.exceptions import BadRequestError
 from semver import Version
 
-from . import ecs, integrations, misc, utils
+from . import ecs, integrations, utils
 from .config import load_current_package_version
 from .esql import EventDataset
 from .esql_errors import (
@@ -27,15 +34,42 @@ from .esql_errors import (
     EsqlUnknownIndexError,
     EsqlUnsupportedTypeError,
     cleanup_empty_indices,
+    pooled_test_indices,
 )
 from .integrations import (
+    MANIFEST_FILE_PATH,
+    SCHEMA_FILE_PATH,
     load_integrations_manifests,
     load_integrations_schemas,
 )
 from .rule import RuleMeta
 from .schemas import get_stack_schemas
 from .schemas.definitions import HTTP_STATUS_BAD_REQUEST
-from .utils import combine_dicts
+from .utils import cached, combine_dicts, get_etc_path, get_path
+
+DEFAULT_TEST_INDEX_POOL_SIZE = 500
+TEST_INDEX_DELETE_BATCH_SIZE = 100
+MAPPING_CACHE_DIR_ENV = "DR_ESQL_MAPPING_CACHE_DIR"
+DEFAULT_MAPPING_CACHE_DIR = get_path([".cache", "detection_rules", "esql_mappings"])
+
+# the local schemas used to build the indices and mappings which rules are validated against
+SCHEMA_FINGERPRINT_FILES = (
+    SCHEMA_FILE_PATH,
+    MANIFEST_FILE_PATH,
+    get_etc_path(["non-ecs-schema.json"]),
+    get_etc_path(["stack-schema-map.yaml"]),
+)
+
+
+@cached
+def get_schema_fingerprint() -> str:
+    """Hash the local schemas which remote validation results depend on."""
+    digest = hashlib.sha256()
+    for path in SCHEMA_FINGERPRINT_FILES:
+        digest.update(path.name.encode("utf-8"))
+        if path.exists():
+            digest.update(path.read_bytes())
+    return digest.hexdigest()
 
 
 def delete_nested_key_from_dict(d: dict[str, Any], compound_key: str) -> None:
@@ -334,10 +368,11 @@ def create_remote_indices(
     existing_mappings: dict[str, Any],
     index_lookup: dict[str, Any],
     log: Callable[[str], None],
+    suffix: str | None = None,
 ) -> str:
     """Create remote indices for validation and return the index string."""
 
-    suffix = str(int(time.time() * 1000))
+    suffix = suffix or str(int(time.time() * 1000))
     test_index = f"rule-test-index-{suffix}"
     response = create_index_with_index_mapping(elastic_client, test_index, existing_mappings)
     log(f"Index `{test_index}` created: {response}")
@@ -377,7 +412,7 @@ def execute_query_against_indices(
         if "verification_exception" in error_msg:
             raise EsqlTypeMismatchError(str(e), elastic_client) from None
         raise EsqlKibanaBaseError(str(e), elastic_client) from None
-    if delete_indices or not misc.getdefault("skip_empty_index_cleanup")():
+    if delete_indices:
         for index_str in test_index_str.split(","):
             response = elastic_client.indices.delete(index=index_str.strip())
             log(f"Test index `{index_str}` deleted: {response}")
@@ -387,6 +422,108 @@ def execute_query_against_indices(
     return query_columns, response
 
 
+class ValidationIndexPool:
+    """Test indices for remote ES|QL validation, shared by every rule which needs the same mappings.
+
+    Indices are keyed by a fingerprint of their mappings, and kept until `cleanup` (or the end of a `with` block),
+    or until the least recently used ones are evicted once the pool holds more than `max_indices`. Pooled indices are
+    skipped by `cleanup_empty_indices`, so an error while validating one rule does not delete indices others reuse.
+    """
+
+    def __init__(self, elastic_client: Elasticsearch, max_indices: int = DEFAULT_TEST_INDEX_POOL_SIZE) -> None:
+        self.elastic_client = elastic_client
+        self.max_indices = max_indices
+        self.created = 0
+        self.reused = 0
+        self._entries: OrderedDict[str, list[str]] = OrderedDict()
+        self._in_use: Counter[str] = Counter()
+        self._lock = threading.Lock()
+        self._key_locks: defaultdict[str, threading.Lock] = defaultdict(threading.Lock)
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(self, *_: object) -> None:
+        self.cleanup()
+
+    @staticmethod
+    def fingerprint(existing_mappings: dict[str, Any], index_lookup: dict[str, Any]) -> str:
+        """Get the fingerprint of the combined mappings of a set of test indices."""
+        return utils.dict_hash({"existing_mappings": existing_mappings, "index_lookup": index_lookup})
+
+    @contextmanager
+    def indices(
+        self, existing_mappings: dict[str, Any], index_lookup: dict[str, Any], log: Callable[[str], None]
+    ) -> Generator[str]:
+        """Get the index string of test indices with the mappings, creating them if they are not pooled yet."""
+        key = self.fingerprint(existing_mappings, index_lookup)
+        with self._lock:
+            key_lock = self._key_locks[key]
+            self._in_use[key] += 1
+
+        try:
+            with key_lock:
+                with self._lock:
+                    names = self._entries.get(key)
+                    if names is not None:
+                        self._entries.move_to_end(key)
+                        self.reused += 1
+
+                if names is None:
+                    # keep names unique when indices with different mappings are created at the same time
+                    suffix = f"{int(time.time() * 1000)}-{key[:8]}"
+                    full_index_str = create_remote_indices(
+                        self.elastic_client, existing_mappings, index_lookup, log, suffix=suffix
+                    )
+                    names = [name.strip() for name in full_index_str.split(",")]
+                    with self._lock:
+                        self._entries[key] = names
+                        self.created += 1
+                        pooled_test_indices.update(names)
+                    self._evict(log)
+                else:
+                    log(f"Reusing test indices `{', '.join(names)}`")
+
+            yield ", ".join(names)
+        finally:
+            with self._lock:
+                self._in_use[key] -= 1
+
+    def _evict(self, log: Callable[[str], None]) -> None:
+        """Delete the least recently used test indices not in use, while the pool holds too many."""
+        evicted: list[str] = []
+        with self._lock:
+            total = sum(len(names) for names in self._entries.values())
+            for key in list(self._entries):
+                if total <= self.max_indices:
+                    break
+                if self._in_use[key]:
+                    continue
+                names = self._entries.pop(key)
+                total -= len(names)
+                evicted.extend(names)
+                pooled_test_indices.difference_update(names)
+
+        if evicted:
+            self._delete(evicted)
+            log(f"Evicted test indices `{', '.join(evicted)}`")
+
+    def _delete(self, names: list[str]) -> None:
+        for start in range(0, len(names), TEST_INDEX_DELETE_BATCH_SIZE):
+            batch = ",".join(names[start : start + TEST_INDEX_DELETE_BATCH_SIZE])
+            _ = self.elastic_client.indices.delete(index=batch, ignore_unavailable=True)
+
+    def cleanup(self) -> None:
+        """Delete every pooled test index, in batches."""
+        with self._lock:
+            names = [name for entry in self._entries.values() for name in entry]
+            self._entries.clear()
+            self._key_locks.clear()
+            pooled_test_indices.difference_update(names)
+
+        self._delete(names)
+
+
 def find_nested_multifields(mapping: dict[str, Any], path: str = "") -> list[Any]:
     """Recursively search for nested multi-fields in Elasticsearch mappings."""
     nested_multifields = []
@@ -435,13 +572,16 @@ def find_flattened_fields_with_subfields(mapping: dict[str, Any], path: str = ""
     return flattened_fields_with_subfields
 
 
+@cached
 def get_ecs_schema_mappings(current_version: Version) -> dict[str, Any]:
-    """Get the ECS schema in an index mapping format (nested schema) handling scaled floats."""
+    """Get the ECS schema in an index mapping format (nested schema) handling scaled floats.
+
+    The mappings are shared by every caller and must not be modified.
+    """
     ecs_version = get_stack_schemas()[str(current_version)]["ecs"]
-    ecs_schemas = ecs.get_schemas()
     ecs_schema_flattened: dict[str, Any] = {}
     ecs_schema_scaled_floats: dict[str, Any] = {}
-    for index, info in ecs_schemas[ecs_version]["ecs_flat"].items():
+    for index, info in ecs.get_schema(ecs_version).items():
         if info["type"] == "scaled_float":
             ecs_schema_scaled_floats.update({index: info["scaling_factor"]})
         ecs_schema_flattened.update({index: info["type"]})
@@ -459,18 +599,24 @@ def get_ecs_schema_mappings(current_version: Version) -> dict[str, Any]:
 
 
 def prepare_mappings(  # noqa: PLR0913, PLR0917
-    elastic_client: Elasticsearch,
+    elastic_client: Elasticsearch | None,
     indices: list[str],
     event_dataset_integrations: list[EventDataset],
     metadata: RuleMeta,
     stack_version: str,
     log: Callable[[str], None],
 ) -> tuple[dict[str, Any], dict[str, Any], dict[str, Any]]:
-    """Prepare index mappings for the given indices and rule integrations."""
-    existing_mappings, index_lookup = get_existing_mappings(elastic_client, indices)
+    """Prepare index mappings for the given indices and rule integrations.
 
-    # Collect mappings for the integrations
-    rule_integrations = get_rule_integrations(metadata)
+    Without an Elasticsearch client, only the local schemas are used and there are no existing mappings.
+    """
+    existing_mappings: dict[str, Any] = {}
+    index_lookup: dict[str, Any] = {}
+    if elastic_client is not None:
+        existing_mappings, index_lookup = get_existing_mappings(elastic_client, indices)
+
+    # Collect mappings for the integrations, copied as event dataset packages are added to them
+    rule_integrations = list(get_rule_integrations(metadata))
 
     # Collect mappings for all relevant integrations for the given stack version
     package_manifests = load_integrations_manifests()
@@ -527,3 +673,126 @@ def prepare_mappings(  # noqa: PLR0913, PLR0917
     utils.combine_dicts(combined_mappings, deepcopy(non_ecs_schema))
 
     return existing_mappings, index_lookup, combined_mappings
+
+
+class MappingCache:
+    """Prepared mappings for remote ES|QL validation, shared by every rule and stack version needing the same ones.
+
+    Mappings are keyed by the indices, event dataset integrations, rule integrations and stack version (which
+    determines the integration package versions), along with the cluster and a fingerprint of the local schemas.
+    With a `directory`, they are also persisted so later validation runs can skip preparing them again.
+    Cached mappings are shared between callers and must not be modified.
+    """
+
+    def __init__(self, directory: Path | None = None, persist: bool = False) -> None:
+        self.directory: Path | None = None
+        if persist or directory:
+            self.directory = directory or Path(os.environ.get(MAPPING_CACHE_DIR_ENV) or DEFAULT_MAPPING_CACHE_DIR)
+        self.hits = 0
+        self.misses = 0
+        self._entries: dict[str, tuple[dict[str, Any], dict[str, Any], dict[str, Any]]] = {}
+        self._clusters: dict[int, str] = {}
+        self._lock = threading.Lock()
+        self._key_locks: defaultdict[str, threading.Lock] = defaultdict(threading.Lock)
+
+    def cluster(self, elastic_client: Elasticsearch | None) -> str:
+        """Get the identity of the cluster which the existing index templates are simulated on."""
+        if elastic_client is None:
+            return ""
+        with self._lock:
+            cluster = self._clusters.get(id(elastic_client))
+        if cluster is None:
+            info = elastic_client.info()
+            cluster = f"{info['cluster_uuid']}-{info['version']['number']}"
+            with self._lock:
+                self._clusters[id(elastic_client)] = cluster
+        return cluster
+
+    def key(
+        self,
+        elastic_client: Elasticsearch | None,
+        indices: list[str],
+        event_dataset_integrations: list[EventDataset],
+        metadata: RuleMeta,
+        stack_version: str,
+    ) -> str:
+        """Get the key of the mappings prepared for a rule."""
+        custom_schemas = ecs.get_custom_schemas()
+        return utils.dict_hash(
+            {
+                "cluster": self.cluster(elastic_client),
+                "indices": indices,
+                "event_datasets": [str(integration) for integration in event_dataset_integrations],
+                "integrations": get_rule_integrations(metadata),
+                "stack_version": stack_version,
+                "package_version": load_current_package_version(),
+                "custom_schemas": {index: custom_schemas.get(index, {}) for index in indices},
+                "schema": get_schema_fingerprint(),
+            }
+        )
+
+    def prepare(  # noqa: PLR0913, PLR0917
+        self,
+        elastic_client: Elasticsearch | None,
+        indices: list[str],
+        event_dataset_integrations: list[EventDataset],
+        metadata: RuleMeta,
+        stack_version: str,
+        log: Callable[[str], None],
+    ) -> tuple[dict[str, Any], dict[str, Any], dict[str, Any]]:
+        """Get the prepared mappings from the cache, or prepare and cache them, like `prepare_mappings`."""
+        key = self.key(elastic_client, indices, event_dataset_integrations, metadata, stack_version)
+        with self._lock:
+            key_lock = self._key_locks[key]
+
+        # rules needing the same mappings at the same time wait for them to be prepared once
+        with key_lock:
+            with self._lock:
+                entry = self._entries.get(key)
+            if entry is None:
+                entry = self._load(key)
+
+            if entry is None:
+                entry = prepare_mappings(
+                    elastic_client, indices, event_dataset_integrations, metadata, stack_version, log
+                )
+                self._save(key, entry)
+                with self._lock:
+                    self.misses += 1
+            else:
+                log(f"Using cached mappings for {stack_version} stack")
+                with self._lock:
+                    self.hits += 1
+
+            with self._lock:
+                self._entries[key] = entry
+        return entry
+
+    def _load(self, key: str) -> tuple[dict[str, Any], dict[str, Any], dict[str, Any]] | None:
+        if self.directory is None:
+            return None
+        try:
+            contents = (self.directory / f"{key}.json").read_text()
+            existing_mappings, index_lookup, combined_mappings = json.loads(contents)
+        except (FileNotFoundError, json.JSONDecodeError, ValueError):
+            return None
+        return existing_mappings, index_lookup, combined_mappings
+
+    def _save(self, key: str, entry: tuple[dict[str, Any], dict[str, Any], dict[str, Any]]) -> None:
+        """Persist mappings, replacing the file atomically so concurrent readers never see a partial write."""
+        if self.directory is None:
+            return
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self.directory / f"{key}.json"
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        _ = tmp_path.write_text(json.dumps(entry))
+        _ = tmp_path.replace(path)
+
+    def clear(self) -> None:
+        """Remove every cached mapping, in memory and on disk."""
+        with self._lock:
+            self._entries.clear()
+            self._key_locks.clear()
+        if self.directory is not None:
+            for path in self.directory.glob("*.json"):
+                path.unlink(missing_ok=True)
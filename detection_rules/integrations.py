@@ -9,9 +9,10 @@ import fnmatch
 import gzip
 import json
 from collections import defaultdict
-from collections.abc import Iterable, Iterator
+from collections.abc import Iterable, Iterator, Mapping
 from dataclasses import dataclass
 from pathlib import Path
+from types import MappingProxyType
 from typing import TYPE_CHECKING, Any
 
 import kql  # type: ignore[reportMissingTypeStubs]
@@ -23,6 +24,7 @@ from semver import Version
 from . import ecs
 from .beats import flatten_ecs_schema
 from .config import load_current_package_version
+from .schema_store import KEY_SEP, SchemaIndex, get_schema_store
 from .schemas import definitions
 from .utils import cached, get_etc_path, read_gzip, unzip
 
@@ -34,6 +36,9 @@ MANIFEST_FILE_PATH = get_etc_path(["integration-manifests.json.gz"])
 DEFAULT_MAX_RULE_VERSIONS = 1
 SCHEMA_FILE_PATH = get_etc_path(["integration-schemas.json.gz"])
 
+# merged schemas are shared by every rule and stack version which resolves to the same package version and ECS version
+MERGED_SCHEMA_CACHE_MAXSIZE = 1024
+
 
 _notified_integrations: set[str] = set()
 
@@ -50,6 +55,31 @@ def load_integrations_schemas() -> dict[str, Any]:
     return json.loads(read_gzip(get_etc_path(["integration-schemas.json.gz"])))
 
 
+@cached
+def get_integration_schema_index() -> SchemaIndex | None:
+    """Get the precompiled integration field types, keyed by package, version and dataset, if they have been built."""
+    return get_schema_store().load("integrations", SCHEMA_FILE_PATH.name.removesuffix(".json.gz"), SCHEMA_FILE_PATH)
+
+
+def build_schema_index() -> Path:
+    """Build the integration field types into the schema store, keyed by package, version and dataset."""
+    field_types: dict[str, str] = {}
+    for package, versions in load_integrations_schemas().items():
+        for version, datasets in versions.items():
+            for dataset, schema in datasets.items():
+                # machine learning jobs are a list of job ids rather than fields
+                if not isinstance(schema, dict):
+                    continue
+
+                for field, field_type in schema.items():  # type: ignore[reportUnknownVariableType]
+                    field_types[KEY_SEP.join((package, version, dataset, str(field)))] = str(field_type)  # type: ignore[reportUnknownArgumentType]
+
+    name = SCHEMA_FILE_PATH.name.removesuffix(".json.gz")
+    path = get_schema_store().save("integrations", name, SCHEMA_FILE_PATH, field_types)
+    get_integration_schema_index.clear()  # type: ignore[reportFunctionMemberAccess]
+    return path
+
+
 class IntegrationManifestSchema(Schema):
     name = fields.Str(required=True)
     version = fields.Str(required=True)
@@ -512,8 +542,6 @@ def get_integration_schema_data(
                 max(parsed_stack_version.patch, patch_floor),
             )
 
-            ecs_schema = ecs.flatten_multi_fields(ecs.get_schema(ecs_version, name="ecs_flat"))
-
             for pk_int in package_integrations:
                 package = pk_int["package"]
                 integration = pk_int["integration"]
@@ -525,7 +553,7 @@ def get_integration_schema_data(
                     integration,
                     min_stack,
                     packages_manifest,
-                    ecs_schema,
+                    ecs_version,
                     data,
                 )
 
@@ -546,9 +574,9 @@ def get_integration_schema_fields(  # noqa: PLR0913, PLR0917
     integration: str,
     min_stack: Version,
     packages_manifest: dict[str, Any],
-    ecs_schema: dict[str, Any],
+    ecs_version: str | None,
     data: Any,  # type: ignore[reportRedeclaration]
-) -> tuple[dict[str, Any], str]:
+) -> tuple[Mapping[str, str], str]:
     data: QueryRuleData = data  # type: ignore[reportAssignmentType]  # noqa: PLW0127
     """Extracts the integration fields to schema based on package integrations."""
     package_schemas = integrations_schemas.get(package, {}) if integration else None
@@ -561,13 +589,32 @@ def get_integration_schema_fields(  # noqa: PLR0913, PLR0917
     )
     notify_user_if_update_available(data, notice, integration)
 
-    schema = collect_schema_fields(integrations_schemas, package, package_version, integration)
-    schema.update(ecs_schema)
-
-    integration_schema = {key: kql.parser.elasticsearch_type_family(value) for key, value in schema.items()}
+    integration_schema = get_merged_integration_schema(
+        integrations_schemas, package, package_version, integration, ecs_version
+    )
     return integration_schema, package_version
 
 
+@cached(maxsize=MERGED_SCHEMA_CACHE_MAXSIZE)
+def get_merged_integration_schema(
+    integrations_schemas: dict[str, Any],
+    package: str,
+    package_version: str,
+    integration: str | None,
+    ecs_version: str | None,
+) -> Mapping[str, str]:
+    """Get the fields of an integration merged with the ECS fields, mapped to their type families.
+
+    The schema is built once per package version, integration and ECS version, and is shared, so it is returned as a
+    read-only view which callers must copy before adding fields to it.
+    """
+    schema = dict(collect_schema_fields(integrations_schemas, package, package_version, integration))
+    if ecs_version:
+        schema.update(ecs.get_flat_field_types(ecs_version))
+
+    return MappingProxyType({key: kql.parser.elasticsearch_type_family(value) for key, value in schema.items()})  # type: ignore[reportUnknownMemberType, reportUnknownArgumentType]
+
+
 def notify_user_if_update_available(
     data: Any,  # type: ignore[reportRedeclaration]
     notice: list[str],
@@ -5,8 +5,11 @@
 
 """Kibana cli commands."""
 
+import itertools
 import re
 import sys
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
 from pathlib import Path
 from typing import Any, cast
 
@@ -32,6 +35,9 @@ from .schemas import definitions  # noqa: TC001
 from .utils import CUSTOM_RULES_KQL, format_command_options, rulename_to_filename
 
 RULES_CONFIG = parse_rules_config()
+EXPORT_WRITE_WORKERS = 4
+EXPORT_WRITE_QUEUE_SIZE = EXPORT_WRITE_WORKERS * 4
+FIND_PREFETCH_PAGES = 4
 
 
 @root.group("kibana")
@@ -101,13 +107,38 @@ def upload_rule(ctx: click.Context, rules: RuleCollection, replace_id: bool) ->
     is_flag=True,
     help="Overwrite action connectors in existing rules",
 )
+@click.option(
+    "--batch-size",
+    "-bs",
+    type=click.IntRange(min=1),
+    help="Import in chunks of at most this many objects (rules, exceptions and action connectors)",
+)
+@click.option("--batch-bytes", "-bb", type=click.IntRange(min=1), help="Import in chunks of at most this many bytes")
+@click.option(
+    "--workers",
+    "-w",
+    type=click.IntRange(min=1),
+    default=1,
+    show_default=True,
+    help="Number of rule chunks imported concurrently",
+)
+@click.option(
+    "--journal",
+    "-j",
+    type=click.Path(dir_okay=False, path_type=Path),
+    help="File recording completed chunks, so a failed import run with the same options can be resumed",
+)
 @click.pass_context
-def kibana_import_rules(  # noqa: PLR0915
+def kibana_import_rules(  # noqa: PLR0913, PLR0915, PLR0917
     ctx: click.Context,
     rules: RuleCollection,
     overwrite: bool = False,
     overwrite_exceptions: bool = False,
     overwrite_action_connectors: bool = False,
+    batch_size: int | None = None,
+    batch_bytes: int | None = None,
+    workers: int = 1,
+    journal: Path | None = None,
 ) -> tuple[dict[str, Any], list[RuleResource]]:
     """Import rules into Kibana."""
 
@@ -135,7 +166,8 @@ def kibana_import_rules(  # noqa: PLR0915
             error_message = error_details.get("message", "<missing error message>")
             status_code = error_details.get("status_code", "unknown status")
             rule_id = error.get("rule_id")
-            display_rule_id = rule_id or "<unknown rule_id>"
+            # errors of exception lists and action connectors are keyed by their list_id or id
+            display_rule_id = rule_id or error.get("list_id") or error.get("id") or "<unknown rule_id>"
             click.echo(f" - {display_rule_id}: ({status_code}) {error_message}")
 
             if "references a non existent exception list" in error_message:
@@ -196,6 +228,10 @@ def kibana_import_rules(  # noqa: PLR0915
             overwrite=overwrite,
             overwrite_exceptions=overwrite_exceptions,
             overwrite_action_connectors=overwrite_action_connectors,
+            batch_size=batch_size,
+            batch_bytes=batch_bytes,
+            workers=workers,
+            journal=journal,
         )
 
     if successful_rule_ids:
@@ -309,7 +345,11 @@ def kibana_export_rules(  # noqa: PLR0912, PLR0913, PLR0915, PLR0917
     with kibana:
         # Look up rule IDs by name if --rule-name was provided
         if rule_name:
-            found = RuleResource.find(filter=f"alert.attributes.name:{rule_name}")  # type: ignore[reportUnknownMemberType]
+            found = RuleResource.find(  # type: ignore[reportUnknownMemberType]
+                filter=f"alert.attributes.name:{rule_name}",
+                fields=["rule_id"],
+                prefetch=FIND_PREFETCH_PAGES,
+            )
             rule_id = [r["rule_id"] for r in found]  # type: ignore[reportUnknownVariableType]
             if not rule_id:
                 click.echo(
@@ -323,116 +363,165 @@ def kibana_export_rules(  # noqa: PLR0912, PLR0913, PLR0915, PLR0917
             else (f"({CUSTOM_RULES_KQL}){f' and ({export_query})' if export_query else ''}")
         )
 
+        # stream the export, so rules are converted and written while the rest of the response is still being read
         results = (  # type: ignore[reportUnknownVariableType]
-            RuleResource.bulk_export(rule_ids=list(rule_id), query=query)  # type: ignore[reportArgumentType]
+            RuleResource.stream_bulk_export(rule_ids=list(rule_id), query=query)  # type: ignore[reportArgumentType]
             if query
-            else RuleResource.export_rules(list(rule_id), exclude_export_details=not kibana_include_details)  # type: ignore[reportArgumentType]
+            else RuleResource.stream_export_rules(list(rule_id), exclude_export_details=not kibana_include_details)  # type: ignore[reportArgumentType]
         )
+        # the export details line alone does not mean any rules were found
+        first_result = next((r for r in results if "exported_rules_count" not in r), None)  # type: ignore[reportUnknownVariableType]
+
     # Handle Exceptions Directory Location
-    if results and exceptions_directory:
+    if first_result and exceptions_directory:
         exceptions_directory.mkdir(parents=True, exist_ok=True)
     exceptions_directory = exceptions_directory or RULES_CONFIG.exception_dir
     if not exceptions_directory and export_exceptions:
         click.echo("Warning: Exceptions export requested, but no exceptions directory found")
 
     # Handle Actions Connector Directory Location
-    if results and action_connectors_directory:
+    if first_result and action_connectors_directory:
         action_connectors_directory.mkdir(parents=True, exist_ok=True)
     action_connectors_directory = action_connectors_directory or RULES_CONFIG.action_connector_dir
     if not action_connectors_directory and export_action_connectors:
         click.echo("Warning: Action Connector export requested, but no Action Connector directory found")
 
-    if results:
+    if first_result:
         directory.mkdir(parents=True, exist_ok=True)
     else:
         click.echo("No rules found to export")
         return []
 
-    rules_results = results  # type: ignore[reportUnknownVariableType]
-    action_connector_results = []
-    exception_results = []
-    results_len = len(results)  # type: ignore[reportUnknownVariableType]
-    if kibana_include_details:
-        # Assign counts to variables
-        results_len = results_len - 1
-        rules_count = results[-1]["exported_rules_count"]  # type: ignore[reportUnknownVariableType]
-        exception_list_count = results[-1]["exported_exception_list_count"]  # type: ignore[reportUnknownVariableType]
-        exception_list_item_count = results[-1]["exported_exception_list_item_count"]  # type: ignore[reportUnknownVariableType]
-        action_connector_count = results[-1]["exported_action_connector_count"]  # type: ignore[reportUnknownVariableType]
-
-        # Parse rules results and exception results from API return
-        rules_results = results[:rules_count]  # type: ignore[reportUnknownVariableType]
-        exception_results = results[rules_count : rules_count + exception_list_count + exception_list_item_count]  # type: ignore[reportUnknownVariableType]
-        rules_and_exceptions_count = rules_count + exception_list_count + exception_list_item_count  # type: ignore[reportUnknownVariableType]
-        action_connector_results = results[  # type: ignore[reportUnknownVariableType]
-            rules_and_exceptions_count : rules_and_exceptions_count + action_connector_count
-        ]
+    def save_rule(rule: TOMLRule) -> None:
+        if save_as_yaml:
+            rule_path = rule.path
+            if isinstance(rule_path, Path):
+                rule.save_yaml(directory / rule_path.name)
+            else:
+                _raise_missing_path(f"Can't save rule {rule.name} ({rule.id}) without a path")
+        else:
+            rule.save_toml()
 
     errors: list[str] = []
     exported: list[TOMLRule] = []
-    exception_list_rule_table: dict[str, list[dict[str, Any]]] = {}
-    action_connector_rule_table: dict[str, list[dict[str, Any]]] = {}
-    for rule_resource in rules_results:  # type: ignore[reportUnknownVariableType]
+    saved: list[TOMLRule] = []
+    pending_saves: deque[tuple[TOMLRule, Future[None]]] = deque()
+
+    def wait_for_save() -> None:
+        rule, future = pending_saves.popleft()
         try:
-            if strip_version:
-                rule_resource.pop("revision", None)  # type: ignore[reportUnknownMemberType]
-                rule_resource.pop("version", None)  # type: ignore[reportUnknownMemberType]
-            rule_resource["author"] = rule_resource.get("author") or default_author or [rule_resource.get("created_by")]  # type: ignore[reportUnknownMemberType]
-            if isinstance(rule_resource["author"], str):
-                rule_resource["author"] = [rule_resource["author"]]
-            # Inherit maturity and optionally local dates from the rule if it already exists
-            params: dict[str, Any] = {
-                "rule": rule_resource,
-                "maturity": "development",
-            }
-            threat = rule_resource.get("threat")  # type: ignore[reportUnknownMemberType]
-            first_tactic = threat[0].get("tactic").get("name") if threat else ""  # type: ignore[reportUnknownMemberType]
-            # Check if flag or config is set to not include tactic in the filename
-            no_tactic_filename = no_tactic_filename or RULES_CONFIG.no_tactic_filename
-            # Check if the flag is set to not include tactic in the filename
-            tactic_name = first_tactic if not no_tactic_filename else None  # type: ignore[reportUnknownMemberType]
-            rule_name = rulename_to_filename(rule_resource.get("name"), tactic_name=tactic_name)  # type: ignore[reportUnknownMemberType]
-
-            save_path = directory / f"{rule_name}"
-
-            # Get local rule data if use_existing_rule_dirs is enabled. If not enabled rules variable will be None.
-            local_rule: dict[str, Any] = params.get("rule", {})
-            input_rule_id: str | None = None
-
-            if local_rule:
-                input_rule_id = cast("definitions.UUIDString", local_rule.get("rule_id"))
-
-            if input_rule_id and input_rule_id in raw_rule_collection.id_map:
-                save_path = raw_rule_collection.id_map[input_rule_id].path or save_path
-            params.update(
-                update_metadata_from_file(
-                    save_path, {"creation_date": local_creation_date, "updated_date": local_updated_date}
-                )
-            )
-            contents = TOMLRuleContents.from_rule_resource(**params)  # type: ignore[reportArgumentType]
-            rule = TOMLRule(contents=contents, path=save_path)
+            future.result()
         except Exception as e:
             if skip_errors:
-                print(f"- skipping {rule_resource.get('name')} - {type(e).__name__}")  # type: ignore[reportUnknownMemberType]
-                errors.append(f"- {rule_resource.get('name')} - {e}")  # type: ignore[reportUnknownMemberType]
-                continue
+                print(f"- skipping {rule.contents.data.name} - {type(e).__name__}")
+                errors.append(f"- {rule.contents.data.name} - {e}")
+                return
             raise
-        if rule.contents.data.exceptions_list:
-            # For each item in rule.contents.data.exceptions_list to the exception_list_rule_table under the list_id
-            for exception in rule.contents.data.exceptions_list:
-                exception_id = exception["list_id"]
-                if exception_id not in exception_list_rule_table:
-                    exception_list_rule_table[exception_id] = []
-                exception_list_rule_table[exception_id].append({"id": rule.id, "name": rule.name})
-        if rule.contents.data.actions:
-            # use connector ids as rule source
-            for action in rule.contents.data.actions:
-                action_id = action["id"]
-                if action_id not in action_connector_rule_table:
-                    action_connector_rule_table[action_id] = []
-                action_connector_rule_table[action_id].append({"id": rule.id, "name": rule.name})
-
-        exported.append(rule)
+        saved.append(rule)
+
+    def queue_save(writer: ThreadPoolExecutor, rule: TOMLRule) -> None:
+        # bound the number of queued writes, so converted rules are not held in memory waiting to be saved
+        pending_saves.append((rule, writer.submit(save_rule, rule)))
+        if len(pending_saves) >= EXPORT_WRITE_QUEUE_SIZE:
+            wait_for_save()
+
+    # Check if flag or config is set to not include tactic in the filename
+    no_tactic_filename = no_tactic_filename or RULES_CONFIG.no_tactic_filename
+    action_connector_results: list[dict[str, Any]] = []
+    exception_results: list[dict[str, Any]] = []
+    exception_list_rule_table: dict[str, list[dict[str, Any]]] = {}
+    action_connector_rule_table: dict[str, list[dict[str, Any]]] = {}
+    results_len = 0
+
+    with ThreadPoolExecutor(max_workers=EXPORT_WRITE_WORKERS) as writer:
+        for rule_resource in itertools.chain([first_result], results):  # type: ignore[reportUnknownVariableType]
+            if kibana_include_details:
+                # The export is ordered rules, exceptions, action connectors and then the export details, which are
+                # told apart by their shape so that nothing needs to be buffered until the details are read
+                if "exported_rules_count" in rule_resource:
+                    continue
+                if rule_resource.get("type") == "action":  # type: ignore[reportUnknownMemberType]
+                    results_len += 1
+                    action_connector_results.append(rule_resource)  # type: ignore[reportUnknownArgumentType]
+                    continue
+                if "list_id" in rule_resource:
+                    results_len += 1
+                    exception_results.append(rule_resource)  # type: ignore[reportUnknownArgumentType]
+                    continue
+
+            results_len += 1
+            try:
+                if strip_version:
+                    rule_resource.pop("revision", None)  # type: ignore[reportUnknownMemberType]
+                    rule_resource.pop("version", None)  # type: ignore[reportUnknownMemberType]
+                rule_resource["author"] = (
+                    rule_resource.get("author") or default_author or [rule_resource.get("created_by")]  # type: ignore[reportUnknownMemberType]
+                )
+                if isinstance(rule_resource["author"], str):
+                    rule_resource["author"] = [rule_resource["author"]]
+                # Inherit maturity and optionally local dates from the rule if it already exists
+                params: dict[str, Any] = {
+                    "rule": rule_resource,
+                    "maturity": "development",
+                }
+                threat = rule_resource.get("threat")  # type: ignore[reportUnknownMemberType]
+                first_tactic = threat[0].get("tactic").get("name") if threat else ""  # type: ignore[reportUnknownMemberType]
+                # Check if the flag is set to not include tactic in the filename
+                tactic_name = first_tactic if not no_tactic_filename else None  # type: ignore[reportUnknownMemberType]
+                rule_name = rulename_to_filename(rule_resource.get("name"), tactic_name=tactic_name)  # type: ignore[reportUnknownMemberType]
+
+                save_path = directory / f"{rule_name}"
+
+                # Get local rule data if use_existing_rule_dirs is enabled. If not enabled rules variable will be None.
+                local_rule: dict[str, Any] = params.get("rule", {})
+                input_rule_id: str | None = None
+
+                if local_rule:
+                    input_rule_id = cast("definitions.UUIDString", local_rule.get("rule_id"))
+
+                if input_rule_id and input_rule_id in raw_rule_collection.id_map:
+                    save_path = raw_rule_collection.id_map[input_rule_id].path or save_path
+                params.update(
+                    update_metadata_from_file(
+                        save_path, {"creation_date": local_creation_date, "updated_date": local_updated_date}
+                    )
+                )
+                contents = TOMLRuleContents.from_rule_resource(**params)  # type: ignore[reportArgumentType]
+                rule = TOMLRule(contents=contents, path=save_path)
+            except Exception as e:
+                if skip_errors:
+                    print(f"- skipping {rule_resource.get('name')} - {type(e).__name__}")  # type: ignore[reportUnknownMemberType]
+                    errors.append(f"- {rule_resource.get('name')} - {e}")  # type: ignore[reportUnknownMemberType]
+                    continue
+                raise
+            if rule.contents.data.exceptions_list:
+                # For each item in rule.contents.data.exceptions_list to the exception_list_rule_table under the list_id
+                for exception in rule.contents.data.exceptions_list:
+                    exception_id = exception["list_id"]
+                    if exception_id not in exception_list_rule_table:
+                        exception_list_rule_table[exception_id] = []
+                    exception_list_rule_table[exception_id].append({"id": rule.id, "name": rule.name})
+            if rule.contents.data.actions:
+                # use connector ids as rule source
+                for action in rule.contents.data.actions:
+                    action_id = action["id"]
+                    if action_id not in action_connector_rule_table:
+                        action_connector_rule_table[action_id] = []
+                    action_connector_rule_table[action_id].append({"id": rule.id, "name": rule.name})
+
+            exported.append(rule)
+
+            # a failed conversion only skips that rule when skipping errors, so it can be saved straight away
+            if skip_errors:
+                queue_save(writer, rule)
+
+        # otherwise a failed conversion aborts the export, so nothing is saved until every rule has converted
+        if not skip_errors:
+            for rule in exported:
+                queue_save(writer, rule)
+
+        while pending_saves:
+            wait_for_save()
 
     # Parse exceptions results from API return
     exceptions = []
@@ -475,26 +564,6 @@ def kibana_export_rules(  # noqa: PLR0912, PLR0913, PLR0915, PLR0917
             click.echo(line)
         errors.extend(ac_errors)
 
-    saved: list[TOMLRule] = []
-    for rule in exported:
-        try:
-            if save_as_yaml:
-                rule_path = rule.path
-                if isinstance(rule_path, Path):
-                    rule.save_yaml(directory / rule_path.name)
-                else:
-                    _raise_missing_path(f"Can't save rule {rule.name} ({rule.id}) without a path")
-            else:
-                rule.save_toml()
-        except Exception as e:
-            if skip_errors:
-                print(f"- skipping {rule.contents.data.name} - {type(e).__name__}")
-                errors.append(f"- {rule.contents.data.name} - {e}")
-                continue
-            raise
-
-        saved.append(rule)
-
     saved_exceptions: list[TOMLException] = []
     for exception in exceptions:
         try:
@@ -6,6 +6,7 @@
 """CLI commands for detection_rules."""
 
 import dataclasses
+import importlib
 import json
 import os
 import time
@@ -59,9 +60,56 @@ if TYPE_CHECKING:
 RULES_CONFIG = parse_rules_config()
 RULES_DIRS = RULES_CONFIG.rule_dirs
 
+# subcommands registered on `root` by other modules, imported only when invoked: name -> (module, short help)
+LAZY_COMMANDS: dict[str, tuple[str, str]] = {
+    "custom-rules": (".custom_rules", "Commands for supporting custom rules."),
+    "dev": (".devtools", "Commands related to the Elastic Stack rules release lifecycle."),
+    "es": (".eswrap", "Commands for integrating with Elasticsearch."),
+    "kibana": (".kbwrap", "Commands for integrating with Kibana."),
+    "normalize-data": (".eswrap", "Normalize Elasticsearch data timestamps and sort."),
+}
+
+
+class LazyGroup(click.Group):
+    """Click group which imports the modules of registered subcommands only when they are needed."""
+
+    def __init__(self, *args: Any, lazy_commands: dict[str, tuple[str, str]] | None = None, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self.lazy_commands = lazy_commands or {}
+
+    def list_commands(self, ctx: click.Context) -> list[str]:
+        return sorted({*super().list_commands(ctx), *self.lazy_commands})
+
+    def get_command(self, ctx: click.Context, cmd_name: str) -> click.Command | None:
+        if cmd_name not in self.commands and cmd_name in self.lazy_commands:
+            # the module registers its commands on import
+            module, _ = self.lazy_commands[cmd_name]
+            _ = importlib.import_module(module, __package__)
+        return super().get_command(ctx, cmd_name)
+
+    def format_commands(self, ctx: click.Context, formatter: click.HelpFormatter) -> None:
+        """List loaded commands with their own help and lazy commands with their registered help."""
+        names = self.list_commands(ctx)
+        if not names:
+            return
+
+        limit = formatter.width - 6 - max(len(name) for name in names)
+        rows: list[tuple[str, str]] = []
+        for name in names:
+            command = self.commands.get(name)
+            if command is None:
+                rows.append((name, click.utils.make_default_short_help(self.lazy_commands[name][1], limit)))
+            elif not command.hidden:
+                rows.append((name, command.get_short_help_str(limit)))
+
+        with formatter.section("Commands"):
+            formatter.write_dl(rows)
+
 
 @click.group(
     "detection-rules",
+    cls=LazyGroup,
+    lazy_commands=LAZY_COMMANDS,
     context_settings={
         "help_option_names": ["-h", "--help"],
         "max_content_width": int(os.getenv("DR_CLI_MAX_WIDTH", 240)),  # noqa: PLW1508
@@ -742,10 +790,42 @@ def validate_rule(_: click.Context, path: str) -> TOMLRule | DeprecatedRule:
 
 
 @root.command("validate-all")
-def validate_all() -> None:
+@click.option(
+    "--processes",
+    "-p",
+    type=click.IntRange(min=0),
+    help="Number of worker processes used to load and validate rules (defaults to DR_LOADER_PROCESSES or serial)",
+)
+@click.option(
+    "--since",
+    help="Only validate rules affected by the changes since this git ref (e.g. origin/main)",
+)
+def validate_all(processes: int | None = None, since: str | None = None) -> None:
     """Check if all rules validates against a schema."""
-    _ = RuleCollection.default()
-    click.echo("Rule validation successful")
+    if not since:
+        _ = RuleCollection.default(processes=processes)
+        click.echo("Rule validation successful")
+        return
+
+    from .affected_rules import get_affected_rules
+
+    # loading the raw rules is cheap compared to validating them, and still catches rule ID and name collisions
+    raw_rules = RawRuleCollection(ext_patterns=["*.toml"])
+    raw_rules.load_directories(RULES_DIRS + RULES_CONFIG.bbr_rules_dirs)
+    affected = get_affected_rules(since, rules=raw_rules)
+
+    if affected.validate_all:
+        click.echo(f"Validating all rules, due to changes since {since} in:")
+        for path in affected.global_changes:
+            click.echo(f" - {path}")
+        _ = RuleCollection.default(processes=processes)
+        click.echo("Rule validation successful")
+        return
+
+    rules = RuleCollection(processes=processes)
+    rules.load_files(sorted(affected.paths))
+    total = len(raw_rules) + len(raw_rules.deprecated)
+    click.echo(f"Rule validation successful for {len(affected.paths)} of {total} rules affected since {since}")
 
 
 @root.command("rule-search")
@@ -805,7 +885,7 @@ def search_rules(  # noqa: PLR0913, PLR0917
 
     filtered: list[dict[str, Any]] = []
     if language == "kql":
-        evaluator = get_evaluator(query) if query else lambda _: True  # type: ignore[reportUnknownLambdaType]
+        evaluator = get_evaluator(query, compiled=True) if query else lambda _: True  # type: ignore[reportUnknownLambdaType]
         filtered = list(filter(evaluator, flattened_rules))  # type: ignore[reportCallIssue]
     elif language == "eql":
         parsed = parse_query(query, implied_any=True, implied_base=True)  # type: ignore[reportUnknownVariableType]
@@ -5,12 +5,14 @@
 
 """Misc support."""
 
+import atexit
 import os
+import threading
 import unittest
 from collections.abc import Callable
 from functools import wraps
 from pathlib import Path
-from typing import IO, Any, NoReturn
+from typing import IO, Any, NoReturn, cast
 
 import click
 import requests
@@ -339,6 +341,24 @@ client_options = {
             flag_value=True,
             default=getdefault("ignore_ssl_errors"),
         ),
+        "pool_maxsize": click.Option(
+            ["--pool-maxsize"],
+            type=int,
+            default=getdefault("pool_maxsize"),
+            help="Kibana connections kept alive for concurrent requests",
+        ),
+        "max_retries": click.Option(
+            ["--max-retries"],
+            type=int,
+            default=getdefault("max_retries"),
+            help="Retries of failed connections and 429/502/503/504 responses from Kibana",
+        ),
+        "gzip_min_bytes": click.Option(
+            ["--gzip-min-bytes"],
+            type=int,
+            default=getdefault("gzip_min_bytes"),
+            help="Gzip Kibana request bodies of at least this many bytes",
+        ),
     },
     "elasticsearch": {
         "cloud_id": click.Option(["--cloud-id"], default=getdefault("cloud_id")),
@@ -360,6 +380,85 @@ kibana_options = list(client_options["kibana"].values())
 elasticsearch_options = list(client_options["elasticsearch"].values())
 
 
+def resolve_option_defaults(options: list[click.Option]) -> dict[str, Any]:
+    """Resolve the defaults of client options, from the environment and user config, converted to the option types."""
+    ctx = click.Context(click.Command("client"))
+    return {
+        option.name: option.type_cast_value(ctx, option.get_default(ctx))
+        for option in options
+        if option.name is not None
+    }
+
+
+class ClientRegistry:
+    """Authenticated clients shared by everything in the process.
+
+    A client is created, and authenticated, once for every set of options, and the Kibana status is only requested
+    once per client. Clients must not be closed by their users, as they are all closed by `close` at exit.
+    """
+
+    def __init__(self) -> None:
+        self._elasticsearch_clients: dict[tuple[tuple[str, str], ...], Elasticsearch] = {}
+        self._kibana_clients: dict[tuple[tuple[str, str], ...], Kibana] = {}
+        self._lock = threading.RLock()
+
+    @staticmethod
+    def key(options: dict[str, Any]) -> tuple[tuple[str, str], ...]:
+        return tuple(sorted((name, repr(value)) for name, value in options.items()))
+
+    def get_elasticsearch_client(self, **options: Any) -> Elasticsearch:
+        """Get the Elasticsearch client for the options, authenticating it if this is the first time."""
+        key = self.key(options)
+        with self._lock:
+            if key not in self._elasticsearch_clients:
+                self._elasticsearch_clients[key] = get_elasticsearch_client(**options)
+            return self._elasticsearch_clients[key]
+
+    def get_kibana_client(self, **options: Any) -> Kibana:
+        """Get the Kibana client for the options, creating it if this is the first time."""
+        key = self.key(options)
+        with self._lock:
+            if key not in self._kibana_clients:
+                self._kibana_clients[key] = get_kibana_client(**options)
+            return self._kibana_clients[key]
+
+    def get_default_elasticsearch_client(self) -> Elasticsearch:
+        """Get the Elasticsearch client for the default options."""
+        return self.get_elasticsearch_client(**resolve_option_defaults(elasticsearch_options))
+
+    def get_default_kibana_client(self) -> Kibana:
+        """Get the Kibana client for the default options."""
+        return self.get_kibana_client(**resolve_option_defaults(kibana_options))
+
+    def get_kibana_status(self, kibana_client: Kibana) -> dict[str, Any]:
+        """Get the status of Kibana, which is kept by the client until it logs out."""
+        with self._lock:
+            status = getattr(kibana_client, "status", None)
+            if not status:
+                status = kibana_client.status = kibana_client.get("/api/status", {})  # type: ignore[reportUnknownMemberType]
+            return status  # type: ignore[reportUnknownVariableType]
+
+    def close(self) -> None:
+        """Close every client."""
+        with self._lock:
+            elasticsearch_clients = list(self._elasticsearch_clients.values())
+            kibana_clients = list(self._kibana_clients.values())
+            self._elasticsearch_clients.clear()
+            self._kibana_clients.clear()
+
+        for kibana_client in kibana_clients:
+            es_client = cast("Elasticsearch | None", kibana_client.elasticsearch)  # type: ignore[reportUnknownMemberType]
+            if es_client:
+                es_client.close()
+            kibana_client.session.close()
+        for elastic_client in elasticsearch_clients:
+            elastic_client.close()
+
+
+client_registry = ClientRegistry()
+_ = atexit.register(client_registry.close)
+
+
 def add_client(client_types: list[str], add_to_ctx: bool = True, add_func_arg: bool = True) -> Callable[..., Any]:
     """Wrapper to add authed client."""
 
@@ -3,12 +3,19 @@
 # 2.0; you may not use this file except in compliance with the Elastic License
 # 2.0.
 
+import json
+import os
+import threading
+import time
+from collections import defaultdict
 from collections.abc import Callable
-from dataclasses import dataclass
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass
 from datetime import UTC, datetime
 from functools import cached_property
-from multiprocessing.pool import ThreadPool
-from typing import Any
+from pathlib import Path
+from types import TracebackType
+from typing import Any, Self
 
 import elasticsearch
 from elasticsearch import Elasticsearch
@@ -17,10 +24,17 @@ from marshmallow import ValidationError
 from requests import HTTPError
 
 from .config import load_current_package_version
-from .misc import ClientError, get_elasticsearch_client, get_kibana_client, getdefault
+from .index_mappings import MappingCache, get_schema_fingerprint
+from .misc import ClientError, client_registry, getdefault
 from .rule import TOMLRule, TOMLRuleContents
 from .rule_validators import ESQLValidator
 from .schemas import definitions
+from .utils import dict_hash, get_path
+
+REMOTE_VALIDATION_STORE_DIR_ENV = "DR_REMOTE_VALIDATION_STORE_DIR"
+DEFAULT_REMOTE_VALIDATION_STORE_DIR = get_path([".cache", "detection_rules", "remote_validation"])
+TOO_MANY_REQUESTS = 429
+TOO_MANY_REQUESTS_BACKOFF = 1.0
 
 
 @dataclass
@@ -36,8 +50,141 @@ class RemoteValidationResult:
     engine_results: dict[str, Any]
 
 
+def is_too_many_requests(exc: BaseException) -> bool:
+    """Check if an error, or the error it was raised from, is a 429 response from Elasticsearch or Kibana."""
+    error: BaseException | None = exc
+    while error is not None:
+        if isinstance(error, elasticsearch.ApiError) and error.meta.status == TOO_MANY_REQUESTS:
+            return True
+        if isinstance(error, HTTPError) and getattr(error.response, "status_code", None) == TOO_MANY_REQUESTS:
+            return True
+        error = error.__cause__
+    return False
+
+
+class RemoteValidationStore:
+    """Local store of successful remote validation results.
+
+    Results are keyed by the rule content hash, the stack version and the schema fingerprint, so rules which have not
+    changed since they were last validated against the same stack and schemas can be skipped.
+    """
+
+    def __init__(self, directory: Path | None = None) -> None:
+        self.directory = directory or Path(
+            os.environ.get(REMOTE_VALIDATION_STORE_DIR_ENV) or DEFAULT_REMOTE_VALIDATION_STORE_DIR
+        )
+
+    @staticmethod
+    def key(contents: TOMLRuleContents, stack_version: str, schema_fingerprint: str | None = None) -> str:
+        """Get the key of a rule's results."""
+        return dict_hash(
+            {
+                "rule": contents.get_hash(include_integrations=True),
+                "stack_version": stack_version,
+                "schema": schema_fingerprint or get_schema_fingerprint(),
+            }
+        )
+
+    def get(self, key: str) -> dict[str, Any] | None:
+        """Get stored results, if any."""
+        try:
+            return json.loads((self.directory / f"{key}.json").read_text())
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def put(self, key: str, results: dict[str, Any]) -> None:
+        """Store results, replacing the file atomically so concurrent readers never see a partial write."""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self.directory / f"{key}.json"
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        _ = tmp_path.write_text(json.dumps(results, sort_keys=True))
+        _ = tmp_path.replace(path)
+
+    def clear(self) -> None:
+        """Remove every stored result."""
+        for path in self.directory.glob("*.json"):
+            path.unlink(missing_ok=True)
+
+
+class AdaptiveConcurrencyLimiter:
+    """Limit concurrent requests, halving the limit on 429 responses and growing it back as requests succeed."""
+
+    def __init__(self, max_limit: int) -> None:
+        self.max_limit = max(1, max_limit)
+        self.limit = self.max_limit
+        self.active = 0
+        self._successes = 0
+        self._condition = threading.Condition()
+
+    def __enter__(self) -> Self:
+        with self._condition:
+            _ = self._condition.wait_for(lambda: self.active < self.limit)
+            self.active += 1
+        return self
+
+    def __exit__(
+        self, exc_type: type[BaseException] | None, exc: BaseException | None, tb: TracebackType | None
+    ) -> None:
+        with self._condition:
+            self.active -= 1
+            self._condition.notify_all()
+
+    def backoff(self) -> None:
+        """Halve the limit after a 429."""
+        with self._condition:
+            self.limit = max(1, self.limit // 2)
+            self._successes = 0
+
+    def success(self) -> None:
+        """Grow the limit by one after as many successes in a row as the current limit."""
+        with self._condition:
+            self._successes += 1
+            if self.limit < self.max_limit and self._successes >= self.limit:
+                self.limit += 1
+                self._successes = 0
+                self._condition.notify_all()
+
+
+class RemoteValidationLatencies:
+    """Thread-safe latencies of remote validations, per rule type."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._latencies: dict[str, list[float]] = defaultdict(list)
+        self._cached: dict[str, int] = defaultdict(int)
+
+    def record(self, rule_type: str, seconds: float | None) -> None:
+        """Record the latency of a validation, or `None` for a result loaded from the store."""
+        with self._lock:
+            if seconds is None:
+                self._cached[rule_type] += 1
+            else:
+                self._latencies[rule_type].append(seconds)
+
+    def summary(self) -> list[dict[str, Any]]:
+        """Get the validated and cached counts, and the latency in milliseconds, for each rule type."""
+        with self._lock:
+            rows: list[dict[str, Any]] = []
+            for rule_type in sorted(set(self._latencies) | set(self._cached)):
+                latencies = sorted(self._latencies.get(rule_type, []))
+                rows.append(
+                    {
+                        "rule_type": rule_type,
+                        "validated": len(latencies),
+                        "cached": self._cached.get(rule_type, 0),
+                        "mean_ms": round(1000 * sum(latencies) / len(latencies)) if latencies else None,
+                        "p50_ms": round(1000 * latencies[len(latencies) // 2]) if latencies else None,
+                        "max_ms": round(1000 * latencies[-1]) if latencies else None,
+                    }
+                )
+            return rows
+
+
 class RemoteConnector:
-    """Base client class for remote validation and testing."""
+    """Base client class for remote validation and testing.
+
+    Clients come from the process client registry, so connectors with the same options share authenticated clients.
+    """
 
     MAX_RETRIES = 5
 
@@ -52,12 +199,12 @@ class RemoteConnector:
             try:
                 if "max_retries" not in es_kwargs:
                     es_kwargs["max_retries"] = self.MAX_RETRIES
-                self.es_client = get_elasticsearch_client(**es_kwargs, **kwargs)
+                self.es_client = client_registry.get_elasticsearch_client(**es_kwargs, **kwargs)
             except ClientError:
                 self.es_client = None
 
             try:
-                self.kibana_client = get_kibana_client(**kibana_kwargs, **kwargs)
+                self.kibana_client = client_registry.get_kibana_client(**kibana_kwargs, **kwargs)
             except HTTPError:
                 self.kibana_client = None
 
@@ -75,7 +222,7 @@ class RemoteConnector:
         """Return an authenticated Elasticsearch client."""
         if "max_retries" not in kwargs:
             kwargs["max_retries"] = self.MAX_RETRIES
-        self.es_client = get_elasticsearch_client(
+        self.es_client = client_registry.get_elasticsearch_client(
             cloud_id=cloud_id,
             ignore_ssl_errors=ignore_ssl_errors,
             elasticsearch_url=elasticsearch_url,
@@ -97,7 +244,7 @@ class RemoteConnector:
         **kwargs: Any,
     ) -> Kibana:
         """Return an authenticated Kibana client."""
-        self.kibana_client = get_kibana_client(
+        self.kibana_client = client_registry.get_kibana_client(
             cloud_id=cloud_id,
             ignore_ssl_errors=ignore_ssl_errors,
             kibana_url=kibana_url,
@@ -113,6 +260,16 @@ class RemoteValidator(RemoteConnector):
 
     def __init__(self, parse_config: bool = False) -> None:
         super().__init__(parse_config=parse_config)
+        self.latencies = RemoteValidationLatencies()
+        # ES|QL rules needing the same mappings share them for the lifetime of the validator
+        self.mapping_cache = MappingCache()
+
+    @cached_property
+    def remote_stack_version(self) -> str:
+        """Get the version of the stack rules are validated against."""
+        if getattr(self, "es_client", None):
+            return self.es_client.info()["version"]["number"]  # type: ignore[reportOptionalMemberAccess]
+        return load_current_package_version()
 
     @cached_property
     def get_validate_methods(self) -> list[str]:
@@ -161,20 +318,57 @@ class RemoteValidator(RemoteConnector):
             engine_results,
         )
 
-    def validate_rules(self, rules: list[TOMLRule], threads: int = 5) -> dict[str, RemoteValidationResult]:
-        """Validate a collection of rules via threads."""
+    def validate_rules(
+        self,
+        rules: list[TOMLRule],
+        threads: int = 5,
+        store: RemoteValidationStore | None = None,
+    ) -> dict[str, RemoteValidationResult]:
+        """Validate a collection of rules via threads.
+
+        With a `store`, rules already validated against the same stack version and schemas are skipped, and new
+        successful results are saved. Up to `threads` rules are validated at once, which is halved whenever
+        Elasticsearch or Kibana respond with a 429 and grows back as validations succeed. Latencies are recorded in
+        `latencies`.
+        """
         responses = {}
+        limiter = AdaptiveConcurrencyLimiter(threads)
+        stack_version = self.remote_stack_version if store else None
 
         def request(c: TOMLRuleContents) -> None:
-            try:
-                responses[c.data.rule_id] = self.validate_rule(c)
-            except ValidationError as e:
-                responses[c.data.rule_id] = e.messages  # type: ignore[reportUnknownMemberType]
-
-        pool = ThreadPool(processes=threads)
-        _ = pool.map(request, [r.contents for r in rules])
-        pool.close()
-        pool.join()
+            key = store.key(c, stack_version) if store and stack_version else None
+            if store and key:
+                stored = store.get(key)
+                if stored is not None:
+                    responses[c.data.rule_id] = RemoteValidationResult(**stored)
+                    self.latencies.record(c.data.type, None)
+                    return
+
+            for attempt in range(self.MAX_RETRIES + 1):
+                with limiter:
+                    start = time.perf_counter()
+                    try:
+                        result = self.validate_rule(c)
+                    except ValidationError as e:
+                        self.latencies.record(c.data.type, time.perf_counter() - start)
+                        responses[c.data.rule_id] = e.messages  # type: ignore[reportUnknownMemberType]
+                        return
+                    except Exception as e:
+                        if attempt == self.MAX_RETRIES or not is_too_many_requests(e):
+                            raise
+                        limiter.backoff()
+                    else:
+                        limiter.success()
+                        self.latencies.record(c.data.type, time.perf_counter() - start)
+                        responses[c.data.rule_id] = result
+                        if store and key:
+                            store.put(key, asdict(result))
+                        return
+
+                time.sleep(TOO_MANY_REQUESTS_BACKOFF * 2**attempt)
+
+        with ThreadPoolExecutor(max_workers=max(1, threads)) as pool:
+            _ = list(pool.map(request, [r.contents for r in rules]))
 
         return responses  # type: ignore[reportUnknownVariableType]
 
@@ -190,7 +384,9 @@ class RemoteValidator(RemoteConnector):
         if index_replacement:
             try:
                 validator = ESQLValidator(contents.data.query)  # type: ignore[reportIncompatibleMethodOverride]
-                response = validator.remote_validate_rule_contents(self.kibana_client, self.es_client, contents)
+                response = validator.remote_validate_rule_contents(
+                    self.kibana_client, self.es_client, contents, mapping_cache=self.mapping_cache
+                )
             except Exception as exc:
                 if isinstance(exc, elasticsearch.BadRequestError):
                     raise ValidationError(f"ES|QL query failed: {exc} for rule: {rule_id}, query: \n{query}") from exc
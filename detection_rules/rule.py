@@ -749,10 +749,12 @@ class QueryValidator:
             package = pk_int["package"]
             integration = pk_int["integration"]
             schema, _ = get_integration_schema_fields(
-                integrations_schemas, package, integration, min_stack, packages_manifest, {}, data
+                integrations_schemas, package, integration, min_stack, packages_manifest, None, data
             )
             int_schema.update(schema)
 
+        from .rule_validators import ESQLValidator  # avoid a circular import
+
         required: list[dict[str, Any]] = []
         unique_fields: list[str] = self.unique_fields or []
         if isinstance(self, ESQLValidator):
@@ -821,6 +823,8 @@ class QueryRuleData(BaseRuleData):
 
     @cached_property
     def validator(self) -> QueryValidator | None:
+        from .rule_validators import EQLValidator, ESQLValidator, KQLValidator  # avoid a circular import
+
         query = self.query or ""
         if self.language == "kuery":
             if not query.strip() and self.filters and CUSTOM_RULES_DIR:
@@ -1154,6 +1158,8 @@ class ThreatMatchRuleData(QueryRuleData):
             if not self.threat_language:
                 raise ValidationError("`threat_language` required when a `threat_query` is defined")
 
+            from .rule_validators import EQLValidator, KQLValidator  # avoid a circular import
+
             if self.threat_language == "kuery":
                 threat_query_validator = KQLValidator(self.threat_query)
             elif self.threat_language == "eql":
@@ -2126,7 +2132,3 @@ def parse_datasets(datasets: list[str], package_manifest: dict[str, Any]) -> lis
         if package in package_manifest:
             packaged_integrations.append({"package": package, "integration": integration})
     return packaged_integrations
-
-
-# avoid a circular import
-from .rule_validators import EQLValidator, ESQLValidator, KQLValidator  # noqa: E402
@@ -0,0 +1,167 @@
+# Copyright Elasticsearch B.V. and/or licensed to Elasticsearch B.V. under one
+# or more contributor license agreements. Licensed under the Elastic License
+# 2.0; you may not use this file except in compliance with the Elastic License
+# 2.0.
+
+"""Persistent on-disk cache of parsed and validated rules."""
+
+import contextlib
+import hashlib
+import os
+import pickle
+import shutil
+from dataclasses import dataclass, field
+from importlib import metadata
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+from .config import THREAT_MAPPING_FRAMEWORK_ENV, THREAT_MAPPING_VERSION_ENV, parse_rules_config
+from .utils import ETC_DIR, OPTIONAL_ELASTIC_VALIDATION_BYPASS_ENV, cached, get_path
+
+if TYPE_CHECKING:
+    from .rule import DeprecatedRuleContents, TOMLRuleContents
+
+
+RULE_CACHE_ENV = "DR_RULE_CACHE"
+RULE_CACHE_DIR_ENV = "DR_RULE_CACHE_DIR"
+DEFAULT_RULE_CACHE_DIR = get_path([".cache", "detection_rules"])
+CODE_DIR = Path(__file__).resolve().parent
+
+# environment variables which change the outcome of rule validation
+VALIDATION_ENV_VARS = (
+    *OPTIONAL_ELASTIC_VALIDATION_BYPASS_ENV.values(),
+    "CUSTOM_RULES_DIR",
+    "DETECTION_RULES_TEST_CONFIG",
+    "DR_REMOTE_ESQL_VALIDATION",
+    THREAT_MAPPING_FRAMEWORK_ENV,
+    THREAT_MAPPING_VERSION_ENV,
+)
+
+
+def _get_dist_version(dist: str) -> str:
+    """Best-effort lookup of an installed distribution version."""
+    try:
+        return metadata.version(dist)
+    except metadata.PackageNotFoundError:
+        return "unknown"
+
+
+def _update_with_files(hasher: Any, paths: list[Path], base_dir: Path) -> None:
+    """Add the names and contents of files to a hash."""
+    for path in sorted(paths):
+        name = path.relative_to(base_dir) if path.is_relative_to(base_dir) else path
+        hasher.update(name.as_posix().encode("utf-8"))
+        hasher.update(path.read_bytes())
+
+
+@cached
+def get_validation_fingerprint() -> str:
+    """Fingerprint everything, other than the rule file itself, that affects the outcome of rule validation.
+
+    This covers the tool version and source, the schemas in etc/, the rules config files (including
+    version.lock.json, stack-schema-map.yaml and packages.yaml) and any environment variables which toggle validation.
+    """
+    import kql  # type: ignore[reportMissingTypeStubs]
+
+    rules_config = parse_rules_config()
+    hasher = hashlib.sha256()
+
+    for dist in ("detection_rules", "detection-rules-kql"):
+        hasher.update(f"{dist}=={_get_dist_version(dist)}".encode())
+
+    kql_dir = Path(kql.__file__).resolve().parent
+    _update_with_files(hasher, list(CODE_DIR.rglob("*.py")), CODE_DIR)
+    _update_with_files(hasher, [p for p in kql_dir.rglob("*") if p.suffix in (".py", ".g")], kql_dir)
+    _update_with_files(hasher, [p for p in ETC_DIR.rglob("*") if p.is_file()], ETC_DIR)
+
+    config_files = [
+        rules_config.deprecated_rules_file,
+        rules_config.packages_file,
+        rules_config.stack_schema_map_file,
+        rules_config.version_lock_file,
+        rules_config.auto_gen_schema_file,
+    ]
+    _update_with_files(hasher, [p for p in config_files if p and p.is_file()], ETC_DIR)
+
+    for env_var in VALIDATION_ENV_VARS:
+        hasher.update(f"{env_var}={os.getenv(env_var)}".encode())
+
+    return hasher.hexdigest()
+
+
+@dataclass
+class RuleCache:
+    """Cache of validated rule contents, keyed by the SHA-256 of the rule file and the validation fingerprint.
+
+    Only successfully validated rules are stored, so a rule which fails validation is always validated again.
+    """
+
+    directory: Path = DEFAULT_RULE_CACHE_DIR
+    fingerprint: str = field(default_factory=get_validation_fingerprint)
+
+    @property
+    def entries_dir(self) -> Path:
+        """Directory holding the entries which are valid for the current fingerprint."""
+        return self.directory / "rules" / self.fingerprint
+
+    @staticmethod
+    def file_hash(path: Path) -> str:
+        """Get the SHA-256 of a rule file."""
+        return hashlib.sha256(path.read_bytes()).hexdigest()
+
+    def get(self, file_hash: str) -> "TOMLRuleContents | DeprecatedRuleContents | None":
+        """Retrieve previously validated rule contents, if they exist."""
+        entry = self.entries_dir / f"{file_hash}.pickle"
+        if not entry.exists():
+            return None
+
+        try:
+            return pickle.loads(entry.read_bytes())  # noqa: S301
+        except Exception:  # noqa: BLE001
+            # a corrupt or incompatible entry is treated as a miss and rebuilt
+            entry.unlink(missing_ok=True)
+            return None
+
+    def put(self, file_hash: str, contents: "TOMLRuleContents | DeprecatedRuleContents") -> None:
+        """Store validated rule contents.
+
+        The cache is only an optimization, so contents which cannot be stored, such as in a read-only checkout or on a
+        full disk, are skipped and validated again on the next load.
+        """
+        entry = self.entries_dir / f"{file_hash}.pickle"
+        tmp_entry = entry.with_suffix(f".{os.getpid()}.tmp")
+        try:
+            if not self.entries_dir.exists():
+                self.prune()
+                self.entries_dir.mkdir(parents=True, exist_ok=True)
+
+            _ = tmp_entry.write_bytes(pickle.dumps(contents))
+            _ = tmp_entry.replace(entry)
+        except (OSError, pickle.PicklingError, TypeError, AttributeError):
+            with contextlib.suppress(OSError):
+                tmp_entry.unlink(missing_ok=True)
+
+    def prune(self) -> None:
+        """Remove entries which were stored for any other fingerprint."""
+        rules_dir = self.directory / "rules"
+        if not rules_dir.exists():
+            return
+
+        for path in rules_dir.iterdir():
+            if path.is_dir() and path.name != self.fingerprint:
+                shutil.rmtree(path, ignore_errors=True)
+
+    def clear(self) -> None:
+        """Remove all cached entries."""
+        shutil.rmtree(self.directory / "rules", ignore_errors=True)
+
+
+def get_rule_cache() -> RuleCache | None:
+    """Get the rule cache if it is enabled with `DR_RULE_CACHE` or `DR_RULE_CACHE_DIR`."""
+    cache_dir = os.getenv(RULE_CACHE_DIR_ENV)
+    if cache_dir:
+        return RuleCache(directory=Path(cache_dir).expanduser())
+
+    if os.getenv(RULE_CACHE_ENV, "").strip().lower() in ("", "0", "false", "no"):
+        return None
+    return RuleCache()
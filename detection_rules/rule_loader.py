@@ -5,7 +5,11 @@
 
 """Load rule metadata transform between rule and api formats."""
 
+import contextlib
 import json
+import multiprocessing
+import os
+import pickle
 from collections import OrderedDict
 from collections.abc import Callable, Iterable, Iterator
 from dataclasses import dataclass, field
@@ -17,17 +21,18 @@ from typing import TYPE_CHECKING, Any
 import click
 import pytoml  # type: ignore[reportMissingTypeStubs]
 import requests
-from github.File import File
-from github.PullRequest import PullRequest
 from marshmallow.exceptions import ValidationError
 
 from . import utils
 from .config import parse_rules_config
-from .ghwrap import GithubClient
 from .rule import DeprecatedRule, DeprecatedRuleContents, DictRule, TOMLRule, TOMLRuleContents
+from .rule_cache import RuleCache, get_rule_cache
 from .utils import cached, get_path
 
 if TYPE_CHECKING:
+    from github.File import File
+    from github.PullRequest import PullRequest
+
     from .schemas import definitions
     from .version_lock import VersionLock
 
@@ -36,6 +41,44 @@ RULES_CONFIG = parse_rules_config()
 DEFAULT_PREBUILT_RULES_DIRS = RULES_CONFIG.rule_dirs
 DEFAULT_PREBUILT_BBR_DIRS = RULES_CONFIG.bbr_rules_dirs
 FILE_PATTERN = r"^([a-z0-9_])+\.(json|toml)$"
+LOADER_PROCESSES_ENV = "DR_LOADER_PROCESSES"
+
+
+def get_loader_processes(processes: int | None = None) -> int:
+    """Resolve the number of worker processes used to load rules, falling back to the environment.
+
+    A value of 0 or 1 loads rules serially in the current process, which remains the default.
+    """
+    if processes is None:
+        env_value = os.getenv(LOADER_PROCESSES_ENV, "").strip().lower()
+        if env_value == "auto":
+            return os.cpu_count() or 1
+        processes = int(env_value) if env_value else 0
+
+    if processes < 0:
+        raise ValueError(f"Invalid number of loader processes: {processes}")
+    return processes
+
+
+def _picklable_error(error: Exception) -> Exception:
+    """Ensure an exception raised in a worker process can be sent back to the parent process."""
+    try:
+        _ = pickle.loads(pickle.dumps(error))  # noqa: S301
+    except Exception:  # noqa: BLE001
+        return ValueError(f"{type(error).__name__}: {error}")
+    return error
+
+
+LoadedContents = tuple[Path, TOMLRuleContents | DeprecatedRuleContents | None, Exception | None]
+
+
+def _load_rule_contents_worker(path: Path) -> LoadedContents:
+    """Parse and validate a single rule file, for use within a worker process."""
+    try:
+        obj = RuleCollection.deserialize_toml_string(path.read_text(encoding="utf-8"))
+        return path, RuleCollection.contents_from_dict(obj), None
+    except Exception as e:  # noqa: BLE001
+        return path, None, _picklable_error(e)
 
 
 def path_getter(value: str) -> Callable[[dict[str, Any]], Any]:
@@ -415,7 +458,15 @@ class RuleCollection(BaseCollection[TOMLRule]):
     __default = None
     __default_bbr = None
 
-    def __init__(self, rules: list[TOMLRule] | None = None) -> None:
+    def __init__(
+        self,
+        rules: list[TOMLRule] | None = None,
+        processes: int | None = None,
+        cache: RuleCache | None = None,
+    ) -> None:
+        """Create a new rule collection, optionally loading files with a pool of worker processes or a rule cache."""
+        self.processes = processes
+        self.cache = cache or get_rule_cache()
         self.id_map: dict[definitions.UUIDString, TOMLRule] = {}
         self.file_map: dict[Path, TOMLRule] = {}
         self.name_map: dict[definitions.RuleName, TOMLRule] = {}
@@ -511,39 +562,64 @@ class RuleCollection(BaseCollection[TOMLRule]):
         self.deprecated.name_map[rule.name] = rule
         self.deprecated.rules.append(rule)
 
-    def load_dict(self, obj: dict[str, Any], path: Path | None = None) -> TOMLRule | DeprecatedRule:
+    @staticmethod
+    def contents_from_dict(obj: dict[str, Any]) -> TOMLRuleContents | DeprecatedRuleContents:
+        """Deserialize and validate rule contents from a dictionary."""
         # bypass rule object load (load_dict) and load as a dict only
         if obj.get("metadata", {}).get("maturity", "") == "deprecated":
-            contents = DeprecatedRuleContents.from_dict(obj)
-            if not RULES_CONFIG.bypass_version_lock:
-                contents.set_version_lock(self._version_lock)
+            return DeprecatedRuleContents.from_dict(obj)
+        return TOMLRuleContents.from_dict(obj)
+
+    def add_contents(
+        self, contents: TOMLRuleContents | DeprecatedRuleContents, path: Path | None = None
+    ) -> TOMLRule | DeprecatedRule:
+        """Add already validated rule contents to the collection."""
+        if not RULES_CONFIG.bypass_version_lock:
+            contents.set_version_lock(self._version_lock)  # type: ignore[reportArgumentType]
+
+        if isinstance(contents, DeprecatedRuleContents):
             if not path:
                 raise ValueError("No path value provided")
             deprecated_rule = DeprecatedRule(path, contents)
             self.add_deprecated_rule(deprecated_rule)
             return deprecated_rule
-        contents = TOMLRuleContents.from_dict(obj)
-        if not RULES_CONFIG.bypass_version_lock:
-            contents.set_version_lock(self._version_lock)
+
         rule = TOMLRule(path=path, contents=contents)
         self.add_rule(rule)
         return rule
 
+    def load_dict(self, obj: dict[str, Any], path: Path | None = None) -> TOMLRule | DeprecatedRule:
+        return self.add_contents(self.contents_from_dict(obj), path=path)
+
+    def _load_from_default(self, path: Path) -> TOMLRule | DeprecatedRule | None:
+        """Add a rule already loaded by the default collection, if available."""
+        # use the default rule loader as a cache.
+        # if it already loaded the rule, then we can just use it from that
+        if self.__default is not None and self is not self.__default:
+            if path in self.__default.file_map:
+                rule = self.__default.file_map[path]
+                self.add_rule(rule)
+                return rule
+            if path in self.__default.deprecated.file_map:
+                deprecated_rule = self.__default.deprecated.file_map[path]
+                self.add_deprecated_rule(deprecated_rule)
+                return deprecated_rule
+        return None
+
     def load_file(self, path: Path) -> TOMLRule | DeprecatedRule:
         try:
             path = path.resolve()
+            rule = self._load_from_default(path)
+            if rule is not None:
+                return rule
 
-            # use the default rule loader as a cache.
-            # if it already loaded the rule, then we can just use it from that
-            if self.__default is not None and self is not self.__default:
-                if path in self.__default.file_map:
-                    rule = self.__default.file_map[path]
-                    self.add_rule(rule)
-                    return rule
-                if path in self.__default.deprecated.file_map:
-                    deprecated_rule = self.__default.deprecated.file_map[path]
-                    self.add_deprecated_rule(deprecated_rule)
-                    return deprecated_rule
+            if self.cache is not None:
+                file_hash = self.cache.file_hash(path)
+                contents = self.cache.get(file_hash)
+                if contents is None:
+                    contents = self.contents_from_dict(self._load_toml_file(path))
+                    self.cache.put(file_hash, contents)
+                return self.add_contents(contents, path=path)
 
             obj = self._load_toml_file(path)
             return self.load_dict(obj, path=path)
@@ -598,53 +674,134 @@ class RuleCollection(BaseCollection[TOMLRule]):
                 self.errors[path] = e
                 continue
 
-    def load_files(self, paths: Iterable[Path]) -> None:
-        """Load multiple files into the collection."""
+    def load_files(self, paths: Iterable[Path], processes: int | None = None) -> None:
+        """Load multiple files into the collection.
+
+        When more than one process is requested (via the argument, the collection or `DR_LOADER_PROCESSES`), the TOML
+        parsing and rule validation is sharded across a pool of worker processes, while the results are added to the
+        collection in the original order so that collisions are detected exactly as they are when loading serially.
+        """
+        paths = [path.resolve() for path in paths]
+        processes = get_loader_processes(processes if processes is not None else self.processes)
+
+        if processes <= 1 or len(paths) <= 1:
+            for path in paths:
+                _ = self.load_file(path)
+            return
+
+        self._load_files_parallel(paths, processes)
+
+    def _load_files_parallel(self, paths: list[Path], processes: int) -> None:
+        """Parse and validate rule files in worker processes and merge them into the collection."""
+        file_hashes: dict[Path, str] = {}
+        cached_contents: dict[Path, TOMLRuleContents | DeprecatedRuleContents] = {}
+        pending: list[Path] = []
+
         for path in paths:
-            _ = self.load_file(path)
+            if self._is_default_cached(path):
+                continue
 
-    def load_directory(
+            if self.cache is not None:
+                file_hashes[path] = self.cache.file_hash(path)
+                contents = self.cache.get(file_hashes[path])
+                if contents is not None:
+                    cached_contents[path] = contents
+                    continue
+
+            pending.append(path)
+
+        processes = min(processes, len(pending)) or 1
+        chunksize = max(1, len(pending) // (processes * 4))
+
+        with contextlib.ExitStack() as stack:
+            results: Iterator[LoadedContents] = iter(())
+            if pending:
+                pool = stack.enter_context(multiprocessing.Pool(processes=processes))
+                results = pool.imap(_load_rule_contents_worker, pending, chunksize=chunksize)
+
+            for path in paths:
+                if self._is_default_cached(path):
+                    _ = self.load_file(path)
+                    continue
+
+                if path in cached_contents:
+                    loaded_path, contents = path, cached_contents[path]
+                else:
+                    loaded_path, contents, error = next(results)
+                    if contents is None:
+                        print(f"Error loading rule in {loaded_path}")
+                        raise error or ValueError(f"No contents loaded from {loaded_path}")
+
+                    if self.cache is not None:
+                        self.cache.put(file_hashes[loaded_path], contents)
+
+                try:
+                    _ = self.add_contents(contents, path=loaded_path)
+                except Exception:
+                    print(f"Error loading rule in {loaded_path}")
+                    raise
+
+    def _is_default_cached(self, path: Path) -> bool:
+        """Check if a rule file was already loaded by the default collection."""
+        if self.__default is None or self is self.__default:
+            return False
+        return path in self.__default.file_map or path in self.__default.deprecated.file_map
+
+    def _get_filtered_paths(
         self,
         directory: Path,
         recursive: bool = True,
         obj_filter: Callable[..., bool] | None = None,
-    ) -> None:
+    ) -> list[Path]:
         paths = self._get_paths(directory, recursive=recursive)
         if obj_filter is not None:
             paths = [path for path in paths if obj_filter(self._load_toml_file(path))]
+        return paths
 
-        self.load_files(paths)
+    def load_directory(
+        self,
+        directory: Path,
+        recursive: bool = True,
+        obj_filter: Callable[..., bool] | None = None,
+        processes: int | None = None,
+    ) -> None:
+        paths = self._get_filtered_paths(directory, recursive=recursive, obj_filter=obj_filter)
+        self.load_files(paths, processes=processes)
 
     def load_directories(
         self,
         directories: Iterable[Path],
         recursive: bool = True,
         obj_filter: Callable[..., bool] | None = None,
+        processes: int | None = None,
     ) -> None:
-        for path in directories:
-            self.load_directory(path, recursive=recursive, obj_filter=obj_filter)
+        # gather the paths up front so that a single worker pool is shared across all directories
+        paths: list[Path] = []
+        for directory in directories:
+            paths.extend(self._get_filtered_paths(directory, recursive=recursive, obj_filter=obj_filter))
+
+        self.load_files(paths, processes=processes)
 
     def freeze(self) -> None:
         """Freeze the rule collection and make it immutable going forward."""
         self.frozen = True
 
     @classmethod
-    def default(cls) -> "RuleCollection":
+    def default(cls, processes: int | None = None) -> "RuleCollection":
         """Return the default rule collection, which retrieves from rules/."""
         if cls.__default is None:
-            collection = RuleCollection()
-            collection.load_directories(DEFAULT_PREBUILT_RULES_DIRS)
-            collection.load_directories(DEFAULT_PREBUILT_BBR_DIRS)
+            collection = RuleCollection(processes=processes)
+            collection.load_directories(DEFAULT_PREBUILT_RULES_DIRS + DEFAULT_PREBUILT_BBR_DIRS)
             collection.freeze()
             cls.__default = collection
 
         return cls.__default
 
     @classmethod
-    def default_bbr(cls) -> "RuleCollection":
+    def default_bbr(cls, processes: int | None = None) -> "RuleCollection":
         """Return the default BBR collection, which retrieves from building_block_rules/."""
         if cls.__default_bbr is None:
-            collection = RuleCollection()
+            collection = RuleCollection(processes=processes)
             collection.load_directories(DEFAULT_PREBUILT_BBR_DIRS)
             collection.freeze()
             cls.__default_bbr = collection
@@ -702,6 +859,7 @@ def load_github_pr_rules(
     verbose: bool = True,
 ) -> tuple[dict[str, TOMLRule], dict[str, list[TOMLRule]], dict[str, list[str]]]:
     """Load all rules active as a GitHub PR."""
+    from .ghwrap import GithubClient
 
     github = GithubClient(token=token)
     repo = github.client.get_repo(repo_name)
@@ -718,7 +876,7 @@ def load_github_pr_rules(
     if verbose:
         click.echo("Downloading rules from GitHub PRs")
 
-    def download_worker(pr_info: tuple[PullRequest, File]) -> None:
+    def download_worker(pr_info: tuple["PullRequest", "File"]) -> None:
         pull, rule_file = pr_info
         response = requests.get(rule_file.raw_url, timeout=10)
         try:
@@ -759,11 +917,13 @@ __all__ = (
     "DEFAULT_PREBUILT_BBR_DIRS",
     "DEFAULT_PREBUILT_RULES_DIRS",
     "FILE_PATTERN",
+    "LOADER_PROCESSES_ENV",
     "DeprecatedCollection",
     "DeprecatedRule",
     "RawRuleCollection",
     "RuleCollection",
     "dict_filter",
+    "get_loader_processes",
     "load_github_pr_rules",
     "metadata_filter",
     "production_filter",
@@ -5,9 +5,10 @@
 
 """Validation logic for rules containing queries."""
 
+import os
 import re
 import typing
-from collections.abc import Callable
+from collections.abc import Callable, Hashable, Mapping
 from dataclasses import dataclass
 from enum import Enum
 from functools import cached_property, wraps
@@ -32,9 +33,11 @@ from . import ecs, endgame, misc, utils
 from .beats import get_datasets_and_modules, parse_beats_from_index
 from .config import CUSTOM_RULES_DIR, load_current_package_version, parse_rules_config
 from .custom_schemas import update_auto_generated_schema
-from .esql import get_esql_query_event_dataset_integrations
-from .esql_errors import EsqlTypeMismatchError
+from .esql import analyze_esql_query, get_esql_query_event_dataset_integrations
+from .esql_errors import EsqlSchemaError, EsqlTypeMismatchError
 from .index_mappings import (
+    MappingCache,
+    ValidationIndexPool,
     create_remote_indices,
     execute_query_against_indices,
     get_rule_integrations,
@@ -62,6 +65,13 @@ EQL_ERROR_TYPES = (
 KQL_ERROR_TYPES = kql.KqlCompileError | kql.KqlParseError
 RULES_CONFIG = parse_rules_config()
 
+# a rule validates its query against one schema per stack version and integration, many of which are identical, and
+# rules for the same integrations share them as well, so each query and schema pair is only parsed once per process
+VALIDATION_CACHE_MAXSIZE = 8192
+
+# mappings for local ES|QL validation, shared by every rule with the same indices and integrations
+local_esql_mapping_cache = MappingCache()
+
 
 @dataclass(frozen=True)
 class ValidationTarget:
@@ -69,6 +79,8 @@ class ValidationTarget:
 
     query_text: str
     schema: Any
+    # the inputs the schema is built from, which key cached validation outcomes instead of the schema contents
+    schema_key: Hashable
     err_trailer: str
     min_stack_version: str
     kind: str  # "integration" or "stack"
@@ -77,6 +89,63 @@ class ValidationTarget:
     integration_types: list[str] | None = None
 
 
+def index_schema_key(data: QueryRuleData) -> tuple[Hashable, ...]:
+    """Key the index, custom index and endpoint fields added to a schema, which only depend on the rule indices."""
+    return tuple(data.index_or_dataview), bool(data.index and CUSTOM_RULES_DIR)
+
+
+def integration_schema_key(data: QueryRuleData, stack_version: str, integrations: list[dict[str, Any]]) -> Hashable:
+    """Key the combined schema of integrations by the package versions and ECS version it is built from."""
+    inputs = tuple((i["package"], i["integration"], i["package_version"], i["ecs_version"]) for i in integrations)
+    return "integration", stack_version, inputs, *index_schema_key(data)
+
+
+def _validation_key(query_text: str, _schema: Any, schema_key: Hashable, *args: Any) -> Hashable:
+    # schemas are rebuilt for every rule, so they are keyed by their inputs rather than serializing their contents
+    return query_text, schema_key, *args
+
+
+def _detach_error(exc: Exception) -> Exception:
+    """Drop the traceback and context of a cached error, which would otherwise keep the parser's frames alive."""
+    exc.__context__ = None
+    exc.__cause__ = None
+    return exc.with_traceback(None)
+
+
+def _copy_error(exc: Exception) -> Exception:
+    """Copy a cached error, so raising it does not attach a traceback to the shared instance."""
+    copied = exc.__class__.__new__(exc.__class__, *exc.args)
+    copied.__dict__.update(exc.__dict__)
+    return copied
+
+
+@utils.cached(maxsize=VALIDATION_CACHE_MAXSIZE, key=_validation_key)
+def parse_kql_with_schema(query_text: str, schema: dict[str, Any], _schema_key: Hashable) -> kql.KqlParseError | None:  # type: ignore[reportUnknownParameterType, reportUnknownMemberType]
+    """Parse KQL query text against a schema and return the parse error, if any."""
+    try:
+        _ = kql.parse(query_text, schema=schema, normalize_kql_keywords=RULES_CONFIG.normalize_kql_keywords)  # type: ignore[reportUnknownMemberType]
+    except kql.KqlParseError as exc:  # type: ignore[reportUnknownMemberType]
+        return _detach_error(exc)  # type: ignore[reportReturnType, reportUnknownArgumentType]
+    return None
+
+
+@utils.cached(maxsize=VALIDATION_CACHE_MAXSIZE, key=_validation_key)
+def parse_eql_with_schema(
+    query_text: str,
+    schema: "ecs.KqlSchema2Eql | endgame.EndgameSchema",
+    _schema_key: Hashable,
+    min_stack_version: str,
+) -> Exception | None:
+    """Parse EQL query text against a schema and return the error, if any."""
+    try:
+        config = set_eql_config(min_stack_version)
+        with config, schema, eql.parser.elasticsearch_syntax, eql.parser.ignore_missing_functions:
+            _ = eql.parse_query(query_text)  # type: ignore[reportUnknownMemberType]
+    except Exception as exc:  # noqa: BLE001
+        return _detach_error(exc)
+    return None
+
+
 class ExtendedTypeHint(Enum):
     IP = "ip"
 
@@ -171,7 +240,7 @@ class KQLValidator(QueryValidator):
         return kql.to_eql(self.query)  # type: ignore[reportUnknownVariableType]
 
     def _prepare_integration_schema(
-        self, base_schema: dict[str, Any], stack_version: str, data: QueryRuleData
+        self, base_schema: Mapping[str, Any], stack_version: str, data: QueryRuleData
     ) -> dict[str, Any]:
         """Augment a base integration schema with index/custom/endpoint fields."""
         schema = dict(base_schema)
@@ -199,6 +268,7 @@ class KQLValidator(QueryValidator):
             combined_by_stack: dict[str, dict[str, Any]] = {}
             ecs_by_stack: dict[str, str] = {}
             packages_by_stack: dict[str, set[str]] = {}
+            integrations_by_stack: dict[str, list[dict[str, Any]]] = {}
 
             for integ in get_integration_schema_data(data, meta, package_integrations):
                 stack_version = integ["stack_version"]
@@ -208,6 +278,7 @@ class KQLValidator(QueryValidator):
 
                 _ = ecs_by_stack.setdefault(stack_version, ecs_version)
                 _ = packages_by_stack.setdefault(stack_version, set()).add(package)
+                integrations_by_stack.setdefault(stack_version, []).append(integ)
                 combined_by_stack.setdefault(stack_version, {}).update(schema)
 
             for stack_version, schema_dict in combined_by_stack.items():
@@ -223,6 +294,7 @@ class KQLValidator(QueryValidator):
                     ValidationTarget(
                         query_text=self.query,
                         schema=schema_dict,
+                        schema_key=integration_schema_key(data, stack_version, integrations_by_stack[stack_version]),
                         err_trailer=err_trailer,
                         min_stack_version=str(meta.min_stack_version or load_current_package_version()),
                         beat_types=None,
@@ -250,6 +322,8 @@ class KQLValidator(QueryValidator):
                     ValidationTarget(
                         query_text=self.query,
                         schema=schema,
+                        # the beats fields are picked by the fields of the query
+                        schema_key=("stack", self.query, beats_version, ecs_version, tuple(data.index_or_dataview)),
                         err_trailer=err_trailer,
                         min_stack_version=str(meta.min_stack_version or load_current_package_version()),
                         beat_types=beat_types,
@@ -281,6 +355,7 @@ class KQLValidator(QueryValidator):
             for t in ordered_targets:
                 exc = self.validate_query_text_with_schema(
                     schema=t.schema,
+                    schema_key=t.schema_key,
                     err_trailer=t.err_trailer,
                     beat_types=t.beat_types,
                     integration_types=t.integration_types,
@@ -310,18 +385,14 @@ class KQLValidator(QueryValidator):
         self,
         *,
         schema: dict[str, Any],
+        schema_key: Hashable,
         err_trailer: str,
         beat_types: list[str] | None,
         integration_types: list[str] | None,
     ) -> KQL_ERROR_TYPES | None:
         """Validate the KQL query text against a given schema and return an enriched error if it fails."""
-        try:
-            kql.parse(  # type: ignore[reportUnknownMemberType]
-                self.query,
-                schema=schema,
-                normalize_kql_keywords=RULES_CONFIG.normalize_kql_keywords,
-            )
-        except kql.KqlParseError as exc:
+        exc = parse_kql_with_schema(self.query, schema, schema_key)
+        if exc is not None:
             # Compose an informative trailer
             trailer_parts: list[str] = []
             if exc.error_msg == "Unknown field" and beat_types:
@@ -348,8 +419,7 @@ class KQLValidator(QueryValidator):
                 len(exc.caret.lstrip()),
                 trailer=trailer or None,  # type: ignore[reportUnknownArgumentType]
             )
-        else:
-            return None
+        return None
 
 
 class EQLValidator(QueryValidator):
@@ -418,11 +488,12 @@ class EQLValidator(QueryValidator):
             combined_by_stack: dict[str, dict[str, Any]] = {}
             ecs_by_stack: dict[str, str] = {}
             packages_by_stack: dict[str, set[str]] = {}
+            integrations_by_stack: dict[str, list[dict[str, Any]]] = {}
             for integ in get_integration_schema_data(data, meta, packaged):
                 stack_version = integ["stack_version"]
                 ecs_version = integ["ecs_version"]
                 package = integ["package"]
-                schema = integ["schema"]
+                schema = dict(integ["schema"])
                 # prepare with index/custom/endpoint fields
                 if data.index_or_dataview:
                     for index_name in data.index_or_dataview:  # type: ignore[reportArgumentType]
@@ -436,6 +507,7 @@ class EQLValidator(QueryValidator):
 
                 _ = ecs_by_stack.setdefault(stack_version, ecs_version)
                 packages_by_stack.setdefault(stack_version, set()).add(package)
+                integrations_by_stack.setdefault(stack_version, []).append(integ)
                 combined_by_stack.setdefault(stack_version, {}).update(schema)
 
             for stack_version, schema_dict in combined_by_stack.items():
@@ -450,6 +522,7 @@ class EQLValidator(QueryValidator):
                     ValidationTarget(
                         query_text=query_text,
                         schema=ecs.KqlSchema2Eql(schema_dict),
+                        schema_key=integration_schema_key(data, stack_version, integrations_by_stack[stack_version]),
                         err_trailer=err_trailer,
                         min_stack_version=min_stack_str,
                         beat_types=None,
@@ -475,6 +548,8 @@ class EQLValidator(QueryValidator):
                     ValidationTarget(
                         query_text=query_text,
                         schema=ecs.KqlSchema2Eql(kql_schema),
+                        # the beats fields are picked by the fields of the whole query
+                        schema_key=("stack", self.query, beats_version, ecs_version, tuple(data.index_or_dataview)),
                         err_trailer=err_trailer,
                         min_stack_version=min_stack_str,
                         beat_types=beat_types,
@@ -490,6 +565,7 @@ class EQLValidator(QueryValidator):
                             ValidationTarget(
                                 query_text=query_text,
                                 schema=endgame_schema,
+                                schema_key=("endgame", endgame_version, tuple(data.index_or_dataview)),
                                 err_trailer=err_trailer,
                                 min_stack_version=min_stack_str,
                                 beat_types=None,
@@ -513,7 +589,7 @@ class EQLValidator(QueryValidator):
                         package_version = integ["package_version"]
                         stack_version = integ["stack_version"]
                         ecs_version = integ["ecs_version"]
-                        schema_dict = integ["schema"]
+                        schema_dict = dict(integ["schema"])
 
                         # prepare schema
                         if data.index_or_dataview:
@@ -536,6 +612,7 @@ class EQLValidator(QueryValidator):
                             ValidationTarget(
                                 query_text=synthetic_sequence,
                                 schema=ecs.KqlSchema2Eql(schema_dict),
+                                schema_key=integration_schema_key(data, stack_version, [integ]),
                                 err_trailer=err_trailer,
                                 min_stack_version=min_stack_str,
                                 beat_types=None,
@@ -616,6 +693,7 @@ class EQLValidator(QueryValidator):
                 exc, field = self.validate_query_text_with_schema(
                     t.query_text,
                     t.schema,
+                    schema_key=t.schema_key,
                     err_trailer=t.err_trailer,
                     min_stack_version=t.min_stack_version,
                     beat_types=t.beat_types,
@@ -652,14 +730,13 @@ class EQLValidator(QueryValidator):
         min_stack_version: str,
         beat_types: list[str] | None = None,
         integration_types: list[str] | None = None,
+        *,
+        schema_key: Hashable,
     ) -> tuple[EQL_ERROR_TYPES | ValueError | None, str | None]:
         """Validate the provided EQL query text against the schema (variant of validate_query_with_schema)."""
-        try:
-            config = set_eql_config(min_stack_version)
-            with config, schema, eql.parser.elasticsearch_syntax, eql.parser.ignore_missing_functions:
-                _ = eql.parse_query(query_text)  # type: ignore[reportUnknownMemberType]
-        except eql.EqlParseError as exc:
-            message = exc.error_msg
+        exc = parse_eql_with_schema(query_text, schema, schema_key, min_stack_version)
+        if isinstance(exc, eql.EqlParseError):
+            message: str = exc.error_msg  # type: ignore[reportUnknownMemberType]
             trailer_parts: list[str] = []
             # If the error is an unknown field and the field was referenced as optional (prefixed with '?'),
             # treat this target as non-fatal to honor EQL optional semantics.
@@ -702,9 +779,9 @@ class EQLValidator(QueryValidator):
                 len(exc.caret.lstrip()),
                 trailer=trailer,
             ), field
-        except Exception as exc:  # noqa: BLE001
+        if exc is not None:
             print(err_trailer)
-            return exc, None  # type: ignore[reportReturnType]
+            return _copy_error(exc), None  # type: ignore[reportReturnType]
         return None, None
 
     def validate_rule_type_configurations(self, data: EQLRuleData, meta: RuleMeta) -> tuple[list[str], bool]:
@@ -836,22 +913,11 @@ class ESQLValidator(QueryValidator):
     def validate(self, data: "QueryRuleData", rule_meta: RuleMeta, force_remote_validation: bool = False) -> None:  # type: ignore[reportIncompatibleMethodOverride]
         """Validate an ESQL query while checking TOMLRule."""
         if misc.getdefault("remote_esql_validation")() or force_remote_validation:
-            resolved_kibana_options = {
-                str(option.name): option.default() if callable(option.default) else option.default
-                for option in misc.kibana_options
-                if option.name is not None
-            }
-
-            resolved_elastic_options = {
-                option.name: option.default() if callable(option.default) else option.default
-                for option in misc.elasticsearch_options
-                if option.name is not None
-            }
-
-            with (
-                misc.get_kibana_client(**resolved_kibana_options) as kibana_client,  # type: ignore[reportUnknownVariableType]
-                misc.get_elasticsearch_client(**resolved_elastic_options) as elastic_client,  # type: ignore[reportUnknownVariableType]
-            ):
+            # clients are authenticated once and shared by every rule validated in the process
+            kibana_client = misc.client_registry.get_default_kibana_client()
+            elastic_client = misc.client_registry.get_default_elasticsearch_client()
+
+            with kibana_client:
                 query = data.query
                 # QueryRuleData permits None for custom filter-only KQL rules; ES|QL still requires a query.
                 if query is None:
@@ -864,9 +930,56 @@ class ESQLValidator(QueryValidator):
                     rule_meta,
                     data.rule_id,
                 )
+        elif (
+            os.environ.get("DR_BYPASS_ESQL_SCHEMA_VALIDATION") is None
+            and rule_meta.query_schema_validation is not False
+            and rule_meta.maturity != "deprecated"
+            and data.query
+        ):
+            self.local_validate_rule(data.query, rule_meta, data.rule_id)
+
+    def local_validate_rule(self, query: str, metadata: RuleMeta, rule_id: str = "", verbosity: int = 0) -> None:
+        """Validate the fields and columns of an ES|QL query locally, without an Elastic Stack.
+
+        Fields are checked against the same ECS, non-ECS, custom and integration mappings which remote validation builds
+        its test indices from, for the latest stack version.
+        """
+        self.rule_id = rule_id
+        self.verbosity = verbosity
+
+        _, indices = self.get_esql_query_indices(query)
+        if not indices:
+            # source commands like `ROW` do not read any index
+            return
+
+        stack_version = get_latest_stack_version()
+        event_dataset_integrations = get_esql_query_event_dataset_integrations(query)
+        _, _, combined_mappings = local_esql_mapping_cache.prepare(
+            None, indices, event_dataset_integrations, metadata, stack_version, self.log
+        )
 
-    def remote_validate_rule_contents(
-        self, kibana_client: Kibana, elastic_client: Elasticsearch, contents: TOMLRuleContents, verbosity: int = 0
+        analysis = analyze_esql_query(query, combined_mappings)
+        if analysis.unknown_fields:
+            unknown = ", ".join(f"`{field}`" for field in analysis.unknown_fields)
+            raise EsqlSchemaError(
+                f"Unknown column(s) {unknown} in the mappings of {', '.join(indices)} for stack version "
+                f"{stack_version}. To bypass local ES|QL schema validation, set the environment variable "
+                "`DR_BYPASS_ESQL_SCHEMA_VALIDATION`."
+            )
+        if not analysis.complete:
+            self.log("Columns added by unsupported commands were not validated")
+
+        _ = self.validate_columns_index_mapping(analysis.columns, combined_mappings, version=stack_version, query=query)
+
+    def remote_validate_rule_contents(  # noqa: PLR0913
+        self,
+        kibana_client: Kibana,
+        elastic_client: Elasticsearch,
+        contents: TOMLRuleContents,
+        verbosity: int = 0,
+        *,
+        index_pool: ValidationIndexPool | None = None,
+        mapping_cache: MappingCache | None = None,
     ) -> ObjectApiResponse[Any]:
         """Remote validate a rule's ES|QL query using an Elastic Stack."""
         return self.remote_validate_rule(
@@ -876,6 +989,8 @@ class ESQLValidator(QueryValidator):
             metadata=contents.metadata,
             rule_id=contents.data.rule_id,
             verbosity=verbosity,
+            index_pool=index_pool,
+            mapping_cache=mapping_cache,
         )
 
     def remote_validate_rule(  # noqa: PLR0913, PLR0917
@@ -886,15 +1001,22 @@ class ESQLValidator(QueryValidator):
         metadata: RuleMeta,
         rule_id: str = "",
         verbosity: int = 0,
+        index_pool: ValidationIndexPool | None = None,
+        mapping_cache: MappingCache | None = None,
     ) -> ObjectApiResponse[Any]:
-        """Uses remote validation from an Elastic Stack to validate ES|QL a given rule"""
+        """Uses remote validation from an Elastic Stack to validate ES|QL a given rule
+
+        With an `index_pool`, test indices are shared with other rules needing the same mappings instead of being
+        created and deleted for this rule alone. With a `mapping_cache`, mappings are only prepared once for every
+        rule and stack version needing the same ones.
+        """
 
         self.rule_id = rule_id
         self.verbosity = verbosity
 
         # Validate that all fields (columns) are either dynamic fields or correctly mapped
         # against the combined mapping of all the indices
-        kibana_details: dict[str, Any] = kibana_client.get("/api/status", {})  # type: ignore[reportUnknownVariableType]
+        kibana_details = misc.client_registry.get_kibana_status(kibana_client)
         if "version" not in kibana_details:
             raise ValueError("Failed to retrieve Kibana details.")
         stack_version = get_latest_stack_version()
@@ -910,19 +1032,28 @@ class ESQLValidator(QueryValidator):
         )
 
         # Get mappings for all matching existing index templates
-        existing_mappings, index_lookup, combined_mappings = prepare_mappings(
+        prepare = mapping_cache.prepare if mapping_cache else prepare_mappings
+        existing_mappings, index_lookup, combined_mappings = prepare(
             elastic_client, indices, event_dataset_integrations, metadata, stack_version, self.log
         )
         self.log(f"Collected mappings: {len(existing_mappings)}")
         self.log(f"Combined mappings prepared: {len(combined_mappings)}")
 
-        # Create remote indices
-        full_index_str = create_remote_indices(elastic_client, existing_mappings, index_lookup, self.log)
+        if index_pool is None:
+            # Create remote indices
+            full_index_str = create_remote_indices(elastic_client, existing_mappings, index_lookup, self.log)
 
-        # Replace all sources with the test indices
-        query = query.replace(indices_str, full_index_str)  # type: ignore[reportUnknownVariableType]
+            # Replace all sources with the test indices
+            query = query.replace(indices_str, full_index_str)  # type: ignore[reportUnknownVariableType]
 
-        query_columns, response = execute_query_against_indices(elastic_client, query, full_index_str, self.log)  # type: ignore[reportUnknownVariableType]
+            query_columns, response = execute_query_against_indices(elastic_client, query, full_index_str, self.log)  # type: ignore[reportUnknownVariableType]
+        else:
+            # Reuse pooled indices with the same mappings, which are deleted when the pool is cleaned up
+            with index_pool.indices(existing_mappings, index_lookup, self.log) as full_index_str:
+                query = query.replace(indices_str, full_index_str)  # type: ignore[reportUnknownVariableType]
+                query_columns, response = execute_query_against_indices(  # type: ignore[reportUnknownVariableType]
+                    elastic_client, query, full_index_str, self.log, delete_indices=False
+                )
         self.esql_unique_fields = query_columns
 
         # Build a mapping lookup for all stack versions to validate against.
@@ -944,7 +1075,7 @@ class ESQLValidator(QueryValidator):
             version = str(parsed.replace(patch=max(parsed.patch, inferred_patch)))  # noqa: PLW2901
             if version in mappings_lookup:
                 continue
-            _, _, combined_mappings = prepare_mappings(
+            _, _, combined_mappings = prepare(
                 elastic_client, indices, event_dataset_integrations, metadata, version, self.log
             )
             mappings_lookup[version] = combined_mappings
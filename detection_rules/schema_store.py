@@ -0,0 +1,223 @@
+# Copyright Elasticsearch B.V. and/or licensed to Elasticsearch B.V. under one
+# or more contributor license agreements. Licensed under the Elastic License
+# 2.0; you may not use this file except in compliance with the Elastic License
+# 2.0.
+
+"""Precompiled field type indexes of the bundled schemas, which are memory-mapped and loaded per version."""
+
+import hashlib
+import mmap
+import os
+import struct
+from array import array
+from collections.abc import ItemsView, Iterator, Mapping
+from dataclasses import dataclass
+from pathlib import Path
+
+from .utils import get_path
+
+SCHEMA_STORE_DIR_ENV = "DR_SCHEMA_STORE_DIR"
+DEFAULT_SCHEMA_STORE_DIR = get_path([".cache", "detection_rules", "schemas"])
+SCHEMA_STORE_KINDS = ("ecs", "beats", "endgame", "integrations")
+
+# separates the components of composite keys, such as beat, module, dataset and field
+KEY_SEP = "\x1f"
+
+# the file is a header, the type names, the offsets of the sorted field names, their type ids and the names themselves.
+# offsets and type ids use the native byte order, since the store is built on the machine which reads it.
+# the header records the size and sha256 of the source file, so an index is rebuilt whenever its content changes
+_MAGIC = b"DRSCHIDX"
+_FORMAT_VERSION = 2
+_HEADER = struct.Struct("=8sIIIIQ32s")
+_UPPER_BOUND = b"\xff"  # never occurs in UTF-8, so it sorts after every key with a given prefix
+
+
+def _align(size: int) -> int:
+    return (size + 3) & ~3
+
+
+class _IndexData:
+    """Decoded layout of an index file."""
+
+    def __init__(self, buffer: mmap.mmap | bytes) -> None:
+        _, _, count, type_count, types_size, self.source_size, self.source_digest = _HEADER.unpack_from(buffer)
+        view = memoryview(buffer)
+
+        types_start = _HEADER.size
+        offsets_start = _align(types_start + types_size)
+        type_ids_start = offsets_start + 4 * (count + 1)
+        names_start = _align(type_ids_start + 2 * count)
+
+        types = bytes(view[types_start : types_start + types_size]).decode()
+        self.types = types.split("\n") if type_count else []
+        self.offsets = view[offsets_start:type_ids_start].cast("I")
+        self.type_ids = view[type_ids_start : type_ids_start + 2 * count].cast("H")
+        self.names = view[names_start:]
+        self.count = count
+
+    def name(self, i: int) -> bytes:
+        return bytes(self.names[self.offsets[i] : self.offsets[i + 1]])
+
+    def bisect(self, target: bytes, lo: int, hi: int) -> int:
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.name(mid) < target:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+
+class SchemaIndex(Mapping[str, str]):
+    """Read-only mapping of field names to types, backed by a memory-mapped index file.
+
+    Names are stored sorted, so a lookup is a binary search which only reads the pages it touches. Composite keys,
+    joined with `KEY_SEP`, can be narrowed to a view of the fields under a prefix with `subset`.
+    """
+
+    def __init__(self, data: _IndexData, prefix: bytes = b"", lo: int = 0, hi: int | None = None) -> None:
+        self._data = data
+        self._prefix = prefix
+        self._lo = lo
+        self._hi = data.count if hi is None else hi
+
+    @classmethod
+    def from_buffer(cls, buffer: mmap.mmap | bytes) -> "SchemaIndex":
+        """Load an index from the contents of an index file."""
+        if buffer[: len(_MAGIC)] != _MAGIC or _HEADER.unpack_from(buffer)[1] != _FORMAT_VERSION:
+            raise ValueError("Not a schema index or an unsupported format version")
+        return cls(_IndexData(buffer))
+
+    def __getitem__(self, key: str) -> str:
+        target = self._prefix + key.encode()
+        i = self._data.bisect(target, self._lo, self._hi)
+        if i < self._hi and self._data.name(i) == target:
+            return self._data.types[self._data.type_ids[i]]
+        raise KeyError(key)
+
+    def __iter__(self) -> Iterator[str]:
+        start = len(self._prefix)
+        for i in range(self._lo, self._hi):
+            yield self._data.name(i)[start:].decode()
+
+    def __len__(self) -> int:
+        return self._hi - self._lo
+
+    def items(self) -> ItemsView[str, str]:
+        return _SchemaIndexItems(self)
+
+    def iter_items(self) -> Iterator[tuple[str, str]]:
+        """Iterate over the fields and their types in order, without a lookup per field."""
+        start = len(self._prefix)
+        types, type_ids = self._data.types, self._data.type_ids
+        for i in range(self._lo, self._hi):
+            yield self._data.name(i)[start:].decode(), types[type_ids[i]]
+
+    def to_dict(self) -> dict[str, str]:
+        """Copy the fields and their types into a dict."""
+        return dict(self.iter_items())
+
+    def subset(self, *parts: str) -> "SchemaIndex":
+        """Get a view of the keys under a composite prefix, with the prefix removed."""
+        prefix = self._prefix + "".join(part + KEY_SEP for part in parts).encode()
+        lo = self._data.bisect(prefix, self._lo, self._hi)
+        hi = self._data.bisect(prefix + _UPPER_BOUND, lo, self._hi)
+        return SchemaIndex(self._data, prefix, lo, hi)
+
+    def children(self) -> list[str]:
+        """Get the distinct first components of the composite keys in this view."""
+        found: list[str] = []
+        for key in self:
+            child = key.split(KEY_SEP, 1)[0]
+            if not found or found[-1] != child:
+                found.append(child)
+        return found
+
+
+class _SchemaIndexItems(ItemsView[str, str]):
+    """Items view which reads the index sequentially."""
+
+    _mapping: SchemaIndex
+
+    def __iter__(self) -> Iterator[tuple[str, str]]:
+        return self._mapping.iter_items()
+
+
+def _source_digest(source: Path) -> bytes:
+    return hashlib.sha256(source.read_bytes()).digest()
+
+
+def write_schema_index(path: Path, fields: Mapping[str, str], source: Path) -> None:
+    """Write a field type index, recording the source file it was built from."""
+    encoded = sorted((name.encode(), field_type) for name, field_type in fields.items())
+    types = sorted({field_type for _, field_type in encoded})
+    type_ids = {field_type: i for i, field_type in enumerate(types)}
+    types_blob = "\n".join(types).encode()
+
+    offsets = array("I", [0])
+    for name, _ in encoded:
+        offsets.append(offsets[-1] + len(name))
+    ids = array("H", [type_ids[field_type] for _, field_type in encoded])
+
+    header = _HEADER.pack(
+        _MAGIC,
+        _FORMAT_VERSION,
+        len(encoded),
+        len(types),
+        len(types_blob),
+        source.stat().st_size,
+        _source_digest(source),
+    )
+
+    chunks = [header, types_blob]
+    chunks.append(b"\0" * (_align(len(header) + len(types_blob)) - len(header) - len(types_blob)))
+    chunks.extend([offsets.tobytes(), ids.tobytes()])
+    chunks.append(b"\0" * (_align(2 * len(ids)) - 2 * len(ids)))
+    chunks.extend(name for name, _ in encoded)
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+    _ = tmp_path.write_bytes(b"".join(chunks))
+    _ = tmp_path.replace(path)
+
+
+@dataclass
+class SchemaStore:
+    """Directory of field type indexes, one file per schema kind and version."""
+
+    directory: Path = DEFAULT_SCHEMA_STORE_DIR
+
+    def path(self, kind: str, version: str) -> Path:
+        """Get the path of the index for a schema version."""
+        return self.directory / kind / f"{version}.idx"
+
+    def load(self, kind: str, version: str, source: Path) -> SchemaIndex | None:
+        """Memory-map an index, unless it is missing or was built from a different version of the source file."""
+        path = self.path(kind, version)
+        if not path.is_file() or not source.is_file():
+            return None
+
+        with path.open("rb") as f:
+            header = f.read(_HEADER.size)
+            if len(header) < _HEADER.size:
+                return None
+
+            magic, format_version, *_, source_size, source_digest = _HEADER.unpack(header)
+            if (magic, format_version, source_size) != (_MAGIC, _FORMAT_VERSION, source.stat().st_size):
+                return None
+            if source_digest != _source_digest(source):
+                return None
+
+            return SchemaIndex.from_buffer(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+
+    def save(self, kind: str, version: str, source: Path, fields: Mapping[str, str]) -> Path:
+        """Build the index for a schema version."""
+        path = self.path(kind, version)
+        write_schema_index(path, fields, source)
+        return path
+
+
+def get_schema_store() -> SchemaStore:
+    """Get the schema store, which can be relocated with `DR_SCHEMA_STORE_DIR`."""
+    directory = os.getenv(SCHEMA_STORE_DIR_ENV)
+    return SchemaStore(Path(directory).expanduser()) if directory else SchemaStore()
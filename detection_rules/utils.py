@@ -7,29 +7,37 @@
 
 import base64
 import contextlib
+import dataclasses
 import functools
 import gzip
 import hashlib
+import inspect
 import io
 import json
 import os
 import re
 import shutil
 import subprocess
+import threading
+import time
+import weakref
 import zipfile
-from collections.abc import Callable, Generator
-from dataclasses import astuple, is_dataclass
+from collections import OrderedDict
+from collections.abc import Callable, Generator, Hashable
+from dataclasses import astuple, dataclass, is_dataclass
 from datetime import UTC, date, datetime
 from pathlib import Path
 from string import Template
-from typing import Any
+from typing import TYPE_CHECKING, Any
 
 import click
 import eql.utils  # type: ignore[reportMissingTypeStubs]
 import pytoml  # type: ignore[reportMissingTypeStubs]
 import yaml
 from eql.utils import load_dump  # type: ignore[reportMissingTypeStubs]
-from github.Repository import Repository
+
+if TYPE_CHECKING:
+    from github.Repository import Repository
 
 CURR_DIR = Path(__file__).resolve().parent
 ROOT_DIR = CURR_DIR.parent
@@ -162,6 +170,7 @@ OPTIONAL_ELASTIC_VALIDATION_BYPASS_ENV: dict[str, str] = {
     "bypass_timeline_template_validation": "DR_BYPASS_TIMELINE_TEMPLATE_VALIDATION",
     "bypass_esql_keep_validation": "DR_BYPASS_ESQL_KEEP_VALIDATION",
     "bypass_esql_metadata_validation": "DR_BYPASS_ESQL_METADATA_VALIDATION",
+    "bypass_esql_schema_validation": "DR_BYPASS_ESQL_SCHEMA_VALIDATION",
 }
 
 
@@ -320,37 +329,185 @@ def freeze(obj: Any) -> Any:
     if isinstance(obj, dict):
         items = obj.items()  # type: ignore[reportUnknownVariableType]
         return freeze(sorted(items))  # type: ignore[reportUnknownVariableType]
+    if isinstance(obj, set):
+        return frozenset(freeze(o) for o in obj)  # type: ignore[reportUnknownVariableType]
     return obj
 
 
-_cache: dict[int, dict[tuple[Any, Any], Any]] = {}
+DEFAULT_CACHE_MAXSIZE = 256
 
+# dicts larger than this (e.g. schemas) are keyed by identity, since freezing them costs more than a lookup saves
+FREEZE_MAX_ITEMS = 64
 
-# Should be replaced with `functools.cache`
-# https://docs.python.org/3/library/functools.html#functools.cache
-def cached(f: Callable[..., Any]) -> Callable[..., Any]:
-    """Helper function to memoize functions."""
-    func_key = id(f)
+_MISSING = object()
+_KWARGS_MARK = object()
+_cached_functions: "weakref.WeakSet[Callable[..., Any]]" = weakref.WeakSet()
 
-    @functools.wraps(f)
-    def wrapped(*args: Any, **kwargs: Any) -> Any:
-        _ = _cache.setdefault(func_key, {})
-        cache_key = freeze(args), freeze(kwargs)
 
-        if cache_key not in _cache[func_key]:
-            _cache[func_key][cache_key] = f(*args, **kwargs)
+@dataclass
+class CacheStats:
+    """Counters for a function memoized with `cached`."""
+
+    name: str
+    maxsize: int | None
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    currsize: int = 0
+    miss_seconds: float = 0.0
+
+    @property
+    def calls(self) -> int:
+        return self.hits + self.misses
+
+    @property
+    def hit_ratio(self) -> float:
+        return self.hits / self.calls if self.calls else 0.0
+
+    @property
+    def saved_seconds(self) -> float:
+        """Estimated time saved by cache hits, based on the average cost of a miss."""
+        return self.hits * self.miss_seconds / self.misses if self.misses else 0.0
+
+
+class _IdentityKey:
+    """Hashable stand-in for an argument which is compared by identity rather than by value."""
+
+    __slots__ = ("obj",)
+
+    def __init__(self, obj: Any) -> None:
+        # the reference keeps the id from being reused for as long as the cache entry exists
+        self.obj = obj
+
+    def __hash__(self) -> int:
+        return id(self.obj)
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, _IdentityKey) and other.obj is self.obj
 
-        return _cache[func_key][cache_key]
+
+def _freeze_cache_arg(obj: Any) -> Any:
+    """Convert an unhashable argument into a cache key."""
+    if isinstance(obj, dict) and len(obj) > FREEZE_MAX_ITEMS:  # type: ignore[reportUnknownArgumentType]
+        return _IdentityKey(obj)
+
+    frozen = freeze(obj)
+    try:
+        _ = hash(frozen)
+    except TypeError:
+        return _IdentityKey(obj)
+    return frozen
+
+
+def _make_cache_key(args: tuple[Any, ...], kwargs: dict[str, Any]) -> Hashable:
+    """Build a cache key, freezing the arguments only when they are not already hashable."""
+    key = (*args, _KWARGS_MARK, *sorted(kwargs.items())) if kwargs else args
+    try:
+        _ = hash(key)
+    except TypeError:
+        frozen_kwargs = [(k, _freeze_cache_arg(v)) for k, v in sorted(kwargs.items())]
+        frozen_args = tuple(_freeze_cache_arg(a) for a in args)
+        return (*frozen_args, _KWARGS_MARK, *frozen_kwargs) if kwargs else frozen_args
+    return key
+
+
+def cached(
+    f: Callable[..., Any] | None = None,
+    *,
+    maxsize: int | None = DEFAULT_CACHE_MAXSIZE,
+    key: Callable[..., Hashable] | None = None,
+) -> Any:
+    """Helper function to memoize functions, as `@cached` or `@cached(maxsize=...)`.
+
+    Each function keeps its own cache, which evicts the least recently used result once it holds `maxsize` entries
+    (`None` for unbounded). Arguments are used as the key directly when they are hashable and are otherwise frozen,
+    except for large dicts which are keyed by identity. A `key` function, called with the same arguments (minus
+    `self`), can be given instead to derive the key, such as a fingerprint of an argument which is compared by value.
+
+    Methods (functions whose first parameter is `self`) keep a separate cache per instance, which is only weakly tied
+    to the instance, so it is released along with the instance instead of keeping it alive.
+    """
+    if f is None:
+        return functools.partial(cached, maxsize=maxsize, key=key)
+    if maxsize is not None and maxsize < 1:
+        raise ValueError(f"maxsize must be positive or None, got {maxsize}")
+
+    params = list(inspect.signature(f).parameters)
+    per_instance = bool(params) and params[0] == "self"
+
+    stats = CacheStats(name=f"{f.__module__}.{f.__qualname__}", maxsize=maxsize)
+    lock = threading.Lock()
+    shared: OrderedDict[Hashable, Any] = OrderedDict()
+    instances: dict[int, OrderedDict[Hashable, Any]] = {}
+
+    def get_entries(args: tuple[Any, ...]) -> tuple[OrderedDict[Hashable, Any], tuple[Any, ...]]:
+        if not (per_instance and args):
+            return shared, args
+
+        instance_id = id(args[0])
+        entries = instances.get(instance_id)
+        if entries is None:
+            try:
+                _ = weakref.finalize(args[0], instances.pop, instance_id, None)
+            except TypeError:
+                # instances without weakref support are keyed by value, like any other argument
+                return shared, args
+            entries = instances[instance_id] = OrderedDict()
+        return entries, args[1:]
+
+    @functools.wraps(f)
+    def wrapped(*args: Any, **kwargs: Any) -> Any:
+        with lock:
+            entries, key_args = get_entries(args)
+        cache_key = key(*key_args, **kwargs) if key else _make_cache_key(key_args, kwargs)
+
+        with lock:
+            value = entries.get(cache_key, _MISSING)
+            if value is not _MISSING:
+                entries.move_to_end(cache_key)
+                stats.hits += 1
+                return value
+
+        start = time.perf_counter()
+        value = f(*args, **kwargs)
+        elapsed = time.perf_counter() - start
+
+        with lock:
+            stats.misses += 1
+            stats.miss_seconds += elapsed
+            entries[cache_key] = value
+            if maxsize is not None and len(entries) > maxsize:
+                _ = entries.popitem(last=False)
+                stats.evictions += 1
+        return value
 
     def clear() -> None:
-        _ = _cache.pop(func_key, None)
+        with lock:
+            shared.clear()
+            instances.clear()
+
+    def cache_stats() -> CacheStats:
+        with lock:
+            currsize = len(shared) + sum(len(entries) for entries in instances.values())
+            return dataclasses.replace(stats, currsize=currsize)
 
     wrapped.clear = clear  # type: ignore[reportAttributeAccessIssue]
+    wrapped.cache_stats = cache_stats  # type: ignore[reportAttributeAccessIssue]
+    _cached_functions.add(wrapped)
     return wrapped
 
 
+def get_cache_stats() -> list[CacheStats]:
+    """Get the counters of every memoized function."""
+    return sorted(
+        (f.cache_stats() for f in list(_cached_functions)),  # type: ignore[reportFunctionMemberAccess]
+        key=lambda s: s.name,
+    )
+
+
 def clear_caches() -> None:
-    _cache.clear()
+    for f in list(_cached_functions):
+        f.clear()  # type: ignore[reportFunctionMemberAccess]
 
 
 def rulename_to_filename(name: str, tactic_name: str | None = None, ext: str = ".toml") -> str:
@@ -392,7 +549,7 @@ def load_rule_contents(rule_file: Path, single_only: bool = False) -> list[Any]:
     raise ValueError(f"Expected a list or dictionary in {rule_file}")
 
 
-def load_json_from_branch(repo: Repository, file_path: str, branch: str) -> dict[str, Any]:
+def load_json_from_branch(repo: "Repository", file_path: str, branch: str) -> dict[str, Any]:
     """Load JSON file from a specific branch."""
     content_files = repo.get_contents(file_path, ref=branch)
 
@@ -431,7 +588,7 @@ def check_double_bumps(changes: list[tuple[str, str, int, int]]) -> list[tuple[s
 
 
 def check_version_lock_double_bumps(
-    repo: Repository,
+    repo: "Repository",
     file_path: str,
     base_branch: str,
     branch: str = "",
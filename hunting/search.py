@@ -9,7 +9,7 @@ from typing import Any
 
 import click
 
-from detection_rules.attack import tactics_map, technique_lookup
+from detection_rules import attack
 
 from .utils import load_all_toml, load_index_file
 
@@ -20,14 +20,14 @@ class QueryIndex:
         self.base_path = base_path
         self.hunting_index = load_index_file()
         self.mitre_technique_ids: set[str] = set()
-        self.reverse_tactics_map = {v: k for k, v in tactics_map.items()}
+        self.reverse_tactics_map = {v: k for k, v in attack.tactics_map.items()}
 
     def _process_mitre_filter(self, mitre_filter: tuple[str, ...]) -> None:
         """Process the MITRE filter to gather all matching techniques."""
         for filter_item in mitre_filter:
             if filter_item in self.reverse_tactics_map:
                 self._process_tactic_id(filter_item)
-            elif filter_item in technique_lookup:
+            elif filter_item in attack.technique_lookup:
                 self._process_technique_id(filter_item)
 
     def _process_tactic_id(self, filter_item: str) -> None:
@@ -35,7 +35,7 @@ class QueryIndex:
         tactic_name = self.reverse_tactics_map[filter_item]
         click.echo(f"Found tactic ID {filter_item} (Tactic Name: {tactic_name}). Searching for associated techniques.")
 
-        for tech_id, details in technique_lookup.items():
+        for tech_id, details in attack.technique_lookup.items():
             kill_chain_phases = details.get("kill_chain_phases", [])
             if any(tactic_name.lower().replace(" ", "-") == phase["phase_name"] for phase in kill_chain_phases):
                 self.mitre_technique_ids.add(tech_id)
@@ -45,7 +45,7 @@ class QueryIndex:
         self.mitre_technique_ids.add(filter_item)
         if "." not in filter_item:
             sub_techniques = {
-                sub_tech_id for sub_tech_id in technique_lookup if sub_tech_id.startswith(f"{filter_item}.")
+                sub_tech_id for sub_tech_id in attack.technique_lookup if sub_tech_id.startswith(f"{filter_item}.")
             }
             self.mitre_technique_ids.update(sub_techniques)
 
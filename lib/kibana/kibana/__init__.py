@@ -8,7 +8,7 @@
 from .connector import Kibana
 from .resources import RuleResource, Signal
 
-__version__ = '0.4.7'
+__version__ = '0.4.14'
 __all__ = (
     "Kibana",
     "RuleResource",
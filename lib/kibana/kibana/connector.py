@@ -6,19 +6,32 @@
 """Wrapper around requests.Session for HTTP requests to Kibana."""
 import atexit
 import base64
+import gzip
 import json
 import os
 import sys
 import threading
+import time
 import uuid
 from importlib import metadata
 from typing import List, Optional, Union
 
 import requests
 from elasticsearch import Elasticsearch
+from requests.adapters import HTTPAdapter
+from urllib3.util import Retry
 
 _context = threading.local()
 
+# Transport defaults. The pool is sized for the default worker counts of the bulk commands, and is grown by
+# ``Kibana.ensure_pool_size`` when more concurrent requests are made.
+DEFAULT_POOL_MAXSIZE = 10
+DEFAULT_MAX_RETRIES = 3
+DEFAULT_BACKOFF_FACTOR = 0.5
+RETRYABLE_STATUS_CODES = (429, 502, 503, 504)
+# Statuses which mean a request was rejected before being applied, so that non-idempotent requests can be re-sent
+NON_IDEMPOTENT_RETRYABLE_STATUS_CODES = (429, 503)
+
 # Environment variable that, when set, disables the custom User-Agent header
 # on outbound Kibana requests. When disabled, no additional User-Agent string
 # is sent and the underlying ``requests`` default applies.
@@ -60,11 +73,73 @@ def build_user_agent(user_agent: Optional[str] = None) -> Optional[str]:
     return f"{USER_AGENT_PRODUCT}-kibana/{kibana_version}"
 
 
+class KibanaRetry(Retry):
+    """Retry policy which only re-sends non-idempotent requests, such as POST, for statuses they were not applied on."""
+
+    def is_retry(self, method: str, status_code: int, has_retry_after: bool = False) -> bool:
+        idempotent = method.upper() in Retry.DEFAULT_ALLOWED_METHODS
+        if not idempotent and status_code not in NON_IDEMPOTENT_RETRYABLE_STATUS_CODES:
+            return False
+        return super().is_retry(method, status_code, has_retry_after)
+
+
+def build_retry(max_retries: int = DEFAULT_MAX_RETRIES, backoff_factor: float = DEFAULT_BACKOFF_FACTOR) -> Retry:
+    """Build the retry policy for the Kibana transport.
+
+    Failed connections and retryable statuses are retried with exponential backoff, honoring ``Retry-After`` for
+    429 and 503 responses. Reads are not retried, since a request which was sent may already have been applied, and
+    for the same reason non-idempotent requests are only retried on 429 and 503.
+    """
+    return KibanaRetry(
+        total=max_retries,
+        connect=max_retries,
+        read=0,
+        status=max_retries,
+        status_forcelist=RETRYABLE_STATUS_CODES,
+        allowed_methods=None,
+        backoff_factor=backoff_factor,
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+
+
+class RequestMetrics:
+    """Thread-safe timings of the requests made by a Kibana connector, grouped by method and URI."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats = {}
+
+    def record(self, method: str, uri: str, elapsed: float, status_code: Optional[int] = None, retries: int = 0):
+        """Record the timing of a single request."""
+        with self._lock:
+            stats = self._stats.setdefault((method, uri), dict(count=0, errors=0, retries=0, total=0.0, max=0.0))
+            stats['count'] += 1
+            stats['retries'] += retries
+            stats['total'] += elapsed
+            stats['max'] = max(stats['max'], elapsed)
+            if status_code is None or status_code >= 400:
+                stats['errors'] += 1
+
+    def summary(self) -> List[dict]:
+        """Get the recorded timings, slowest total first."""
+        with self._lock:
+            summary = [dict(method=method, uri=uri, mean=stats['total'] / stats['count'], **stats)
+                       for (method, uri), stats in self._stats.items()]
+        return sorted(summary, key=lambda s: s['total'], reverse=True)
+
+    def clear(self):
+        """Reset the recorded timings."""
+        with self._lock:
+            self._stats.clear()
+
+
 class Kibana:
     """Wrapper around the Kibana SIEM APIs."""
 
     def __init__(self, cloud_id=None, kibana_url=None, api_key=None, verify=True, elasticsearch=None, space=None,
-                 user_agent=None):
+                 user_agent=None, pool_maxsize=None, max_retries=None, backoff_factor=None, timeout=None,
+                 gzip_min_bytes=None):
         """"Open a session to the platform."""
         self.authenticated = False
 
@@ -72,9 +147,18 @@ class Kibana:
         # recreated (e.g. on logout). ``None`` means no custom header is sent.
         self.user_agent = build_user_agent(user_agent)
 
+        self.pool_maxsize = pool_maxsize or DEFAULT_POOL_MAXSIZE
+        self.max_retries = DEFAULT_MAX_RETRIES if max_retries is None else max_retries
+        self.backoff_factor = DEFAULT_BACKOFF_FACTOR if backoff_factor is None else backoff_factor
+        self.timeout = timeout
+        self.gzip_min_bytes = gzip_min_bytes
+        self.metrics = RequestMetrics()
+        self._pool_lock = threading.Lock()
+
         self.session = requests.Session()
         self.session.verify = verify
         self._set_user_agent()
+        self._mount_adapter()
 
         if api_key:
             self.session.headers.update(
@@ -131,6 +215,20 @@ class Kibana:
         if self.user_agent:
             self.session.headers.update({"User-Agent": self.user_agent})
 
+    def _mount_adapter(self):
+        """Mount a pooled adapter with the retry policy on the current session."""
+        adapter = HTTPAdapter(pool_connections=self.pool_maxsize, pool_maxsize=self.pool_maxsize,
+                              max_retries=build_retry(self.max_retries, self.backoff_factor))
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+    def ensure_pool_size(self, pool_maxsize: int):
+        """Grow the connection pool, so that ``pool_maxsize`` concurrent requests can each keep a connection alive."""
+        with self._pool_lock:
+            if pool_maxsize > self.pool_maxsize:
+                self.pool_maxsize = pool_maxsize
+                self._mount_adapter()
+
     @property
     def version(self):
         """Get the semantic version."""
@@ -165,12 +263,25 @@ class Kibana:
         assert not (body and raw_data), "Cannot provide both data and raw_data"
 
         body = body or raw_data
+        if self.timeout is not None:
+            kwargs.setdefault('timeout', self.timeout)
 
-        response = self.session.request(method, url, params=params, data=body, **kwargs)
+        # optionally compress large bodies, such as the ndjson of a rule import
+        if body and self.gzip_min_bytes is not None and len(body) >= self.gzip_min_bytes:
+            body = gzip.compress(body.encode('utf-8') if isinstance(body, str) else body)
+            kwargs['headers'] = {**(kwargs.get('headers') or {}), 'Content-Encoding': 'gzip'}
 
-        if response.status_code != 200:
-            # retry once
+        # retries of failed connections and retryable statuses are handled by the adapter
+        start = time.perf_counter()
+        try:
             response = self.session.request(method, url, params=params, data=body, **kwargs)
+        except requests.exceptions.RequestException:
+            self.metrics.record(method, uri, time.perf_counter() - start)
+            raise
+
+        retry = getattr(response.raw, 'retries', None)
+        retries = len(retry.history) if retry is not None else 0
+        self.metrics.record(method, uri, time.perf_counter() - start, response.status_code, retries)
 
         if error:
             try:
@@ -182,6 +293,10 @@ class Kibana:
                     print(response.content.decode("utf-8"), file=sys.stderr)
                 raise
 
+        if raw and kwargs.get("stream"):
+            # leave the body unread, so it can be consumed incrementally
+            return response
+
         if not response.content:
             return
 
@@ -218,6 +333,7 @@ class Kibana:
         self.authenticated = False
         self.session = requests.Session()
         self._set_user_agent()
+        self._mount_adapter()
         self.elasticsearch = None
 
     def __close(self):
@@ -4,14 +4,26 @@
 # 2.0.
 
 import datetime
-from typing import List, Optional, Type
+import hashlib
+import os
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Iterator, List, Optional, Type, Union
 
 import json
 
+import requests
+
 from .connector import Kibana
 from . import definitions
 
 DEFAULT_PAGE_SIZE = 10
+# keys of the errors in an _import response
+IMPORT_ERROR_KEYS = ("errors", "exceptions_errors", "action_connectors_errors")
+# keys identifying rules, exception lists (and their items) and action connectors in an _import request
+IMPORT_OBJECT_ID_KEYS = ("rule_id", "list_id", "id")
 
 
 class BaseResource(dict):
@@ -38,15 +50,22 @@ class BaseResource(dict):
         return self
 
     @classmethod
-    def find(cls, per_page=None, **params) -> iter:
+    def find(cls, per_page=None, prefetch: int = 1, fields: Optional[List[str]] = None, **params) -> iter:
+        """Iterate over the results of the _find API.
+
+        With `prefetch`, up to that many of the following pages are fetched concurrently once the total is known, and
+        `fields` restricts the returned fields to shrink the pages.
+        """
         if per_page is None:
             per_page = DEFAULT_PAGE_SIZE
 
         # _id is no valid sort field so we sort by name by default
         params.setdefault("sort_field", "name")
         params.setdefault("sort_order", "asc")
+        if fields:
+            params["fields"] = list(fields)
 
-        return ResourceIterator(cls, cls.BASE_URI + "/_find", per_page=per_page, **params)
+        return ResourceIterator(cls, cls.BASE_URI + "/_find", per_page=per_page, prefetch=prefetch, **params)
 
     @classmethod
     def from_id(cls, resource_id) -> 'BaseResource':
@@ -63,26 +82,31 @@ class BaseResource(dict):
 
 class ResourceIterator(object):
 
-    def __init__(self, cls: Type[BaseResource], uri: str, per_page: int, **params: dict):
+    def __init__(self, cls: Type[BaseResource], uri: str, per_page: int, prefetch: int = 1, **params: dict):
         self.cls = cls
         self.uri = uri
         self.params = params
         self.page = 0
         self.per_page = per_page
+        self.prefetch = max(1, prefetch)
         self.fetched = 0
         self.current = None
         self.total = None
         self.batch = []
         self.batch_pos = 0
         self.kibana = Kibana.current()
+        self._pool = None
+        self._pending = deque()
+        self._next_page = None
 
     def __iter__(self):
         return self
 
-    def _batch(self):
-        params = dict(per_page=self.per_page, page=self.page + 1, **self.params)
-        response = self.kibana.get(self.uri, params=params, error=True)
+    def _get_page(self, page: int) -> dict:
+        params = dict(per_page=self.per_page, page=page, **self.params)
+        return self.kibana.get(self.uri, params=params, error=True)
 
+    def _set_batch(self, response: dict):
         self.page = response["page"]
         self.per_page = response["perPage"]
         self.total = response["total"]
@@ -90,15 +114,52 @@ class ResourceIterator(object):
         self.batch_pos = 0
         self.fetched += len(self.batch)
 
+    def _batch(self):
+        self._set_batch(self._get_page(self.page + 1))
+
+    def _prefetched_batch(self):
+        """Get the next page, keeping up to `prefetch` of the following pages in flight."""
+        if self._pool is None:
+            self.kibana.ensure_pool_size(self.prefetch)
+            self._pool = ThreadPoolExecutor(max_workers=self.prefetch)
+            self._next_page = self.page + 1
+
+        # the total and page size are known from the first page, so the remaining pages can be requested up front
+        last_page = -(-self.total // self.per_page)
+        while len(self._pending) < self.prefetch and self._next_page <= last_page:
+            self._pending.append(self._pool.submit(self._get_page, self._next_page))
+            self._next_page += 1
+
+        if self._pending:
+            self._set_batch(self._pending.popleft().result())
+        else:
+            self.batch = []
+            self.batch_pos = 0
+
+    def close(self):
+        """Stop prefetching pages."""
+        for future in self._pending:
+            future.cancel()
+        self._pending.clear()
+        if self._pool is not None:
+            self._pool.shutdown(wait=False)
+            self._pool = None
+
     def __next__(self) -> BaseResource:
-        if self.total is None or 0 < self.batch_pos == len(self.batch) == self.per_page:
+        if self.total is None:
             self._batch()
+        elif 0 < self.batch_pos == len(self.batch) == self.per_page:
+            if self.prefetch > 1:
+                self._prefetched_batch()
+            else:
+                self._batch()
 
         if self.batch_pos < len(self.batch):
             result = self.cls(self.batch[self.batch_pos])
             self.batch_pos += 1
             return result
 
+        self.close()
         raise StopIteration()
 
 
@@ -156,7 +217,9 @@ class RuleResource(BaseResource):
         response = Kibana.current().post(cls.BASE_URI + "/_bulk_action", params=params, data=data, **kwargs)
 
         # export returns ndjson
-        if action == 'export':
+        if action == 'export' and kwargs.get('stream'):
+            response = cls._iter_ndjson(response)
+        elif action == 'export':
             response = [cls(r) for r in [json.loads(r) for r in response.text.splitlines()]]
 
         return response
@@ -198,6 +261,13 @@ class RuleResource(BaseResource):
         """Bulk export rules using _bulk_action."""
         return cls.bulk_action("export", rule_ids=rule_ids, query=query, raw=True)
 
+    @classmethod
+    def stream_bulk_export(
+        cls, rule_ids: Optional[List[str]] = None, query: Optional[str] = None
+    ) -> Iterator['RuleResource']:
+        """Bulk export rules using _bulk_action, yielding each exported object as it is read from the response."""
+        return cls.bulk_action("export", rule_ids=rule_ids, query=query, raw=True, stream=True)
+
     @classmethod
     def bulk_edit(
         cls, edit_object: list[definitions.RuleBulkEditActionTypes], rule_ids: Optional[List[str]] = None,
@@ -233,33 +303,107 @@ class RuleResource(BaseResource):
         overwrite: bool = False,
         overwrite_exceptions: bool = False,
         overwrite_action_connectors: bool = False,
+        batch_size: Optional[int] = None,
+        batch_bytes: Optional[int] = None,
+        workers: int = 1,
+        journal: Optional[Union[str, Path]] = None,
     ) -> (dict, list, List[Optional["RuleResource"]]):
-        """Import a list of rules into Kibana using the _import API and return the response and successful imports."""
+        """Import a list of rules into Kibana using the _import API and return the response and successful imports.
+
+        By default, everything is imported in a single request. With `batch_size` and/or `batch_bytes`, the ndjson is
+        split into chunks of at most that many objects or bytes. Exceptions and action connectors are imported first,
+        in order, so that the rule chunks which reference them can then be imported by a pool of `workers`. Chunks are
+        retried by the transport of the Kibana connector, and rules in a chunk which still fails are reported in the
+        errors of the merged response. With a `journal` file, the response of each chunk imported without errors is
+        recorded, and the chunks already recorded are skipped when the same import is run again into the same Kibana
+        and space, so that only the chunks which failed, or had objects fail, are imported again.
+        """
         url = f'{cls.BASE_URI}/_import'
         params = dict(
             overwrite=stringify_bool(overwrite),
             overwrite_exceptions=stringify_bool(overwrite_exceptions),
             overwrite_action_connectors=stringify_bool(overwrite_action_connectors),
         )
-        rule_ids = [r['rule_id'] for r in rules]
         flattened_exceptions = [e for sublist in exceptions for e in sublist]
         flattened_actions_connectors = [a for sublist in action_connectors for a in sublist]
-        headers, raw_data = Kibana.ndjson_file_data_prep(
-            rules + flattened_exceptions + flattened_actions_connectors, "import.ndjson"
-        )
-        response = Kibana.current().post(url, headers=headers, params=params, raw_data=raw_data)
-        errors = response.get("errors", [])
-        error_rule_ids = [e['rule_id'] for e in errors]
+        dependencies = flattened_exceptions + flattened_actions_connectors
+
+        chunks = chunk_ndjson(dependencies + rules, max_count=batch_size, max_bytes=batch_bytes)
+        import_journal = ImportJournal(journal) if journal else None
+        kibana = Kibana.current()
+        kibana.ensure_pool_size(workers)
+        # chunks are only skipped when they were imported with the same options into the same Kibana and space
+        journal_prefix = json.dumps([kibana.kibana_url, kibana.space, params], sort_keys=True).encode("utf-8")
+
+        def import_chunk(chunk: List[dict]) -> dict:
+            headers, raw_data = Kibana.ndjson_file_data_prep(chunk, "import.ndjson")
+            key = hashlib.sha256(journal_prefix + raw_data).hexdigest()
+            if import_journal and import_journal.get(key) is not None:
+                return import_journal.get(key)
+
+            try:
+                with kibana:
+                    response = kibana.post(url, headers=headers, params=params, raw_data=raw_data)
+            except requests.exceptions.RequestException as exc:
+                if len(chunks) == 1:
+                    raise
+                status_code = getattr(exc.response, "status_code", None) or "unknown status"
+                error = {"status_code": status_code, "message": f"chunk import failed: {exc}"}
+                return {"success": False, "errors": [{**i, "error": error} for i in chunk_object_ids(chunk)]}
+
+            # objects which failed to import are retried by the next run, so their chunk is not recorded
+            if import_journal and not any(response.get(k) for k in IMPORT_ERROR_KEYS):
+                import_journal.record(key, response)
+            return response
+
+        # chunks with exceptions or action connectors come first, and are imported before the rules referencing them
+        dependency_chunk_count = 0
+        imported_count = 0
+        for chunk in chunks:
+            if imported_count >= len(dependencies):
+                break
+            imported_count += len(chunk)
+            dependency_chunk_count += 1
+
+        responses = [import_chunk(chunk) for chunk in chunks[:dependency_chunk_count]]
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+            responses.extend(pool.map(import_chunk, chunks[dependency_chunk_count:]))
+
+        response = merge_import_responses(responses)
+        error_rule_ids = {e.get('rule_id') for e in response.get("errors", [])}
 
         # successful rule_ids are not returned, so they must be implicitly inferred from errored rule_ids
-        successful_rule_ids = [r for r in rule_ids if r not in error_rule_ids]
-        rule_resources = cls.export_rules(successful_rule_ids) if successful_rule_ids else []
+        successful_rule_ids = [r['rule_id'] for r in rules if r['rule_id'] not in error_rule_ids]
+        rule_resources = []
+        if successful_rule_ids:
+            export_size = batch_size or len(successful_rule_ids)
+            id_chunks = [
+                successful_rule_ids[i:i + export_size] for i in range(0, len(successful_rule_ids), export_size)
+            ]
+
+            def export_chunk(rule_ids: List[str]) -> List['RuleResource']:
+                with kibana:
+                    return cls.export_rules(rule_ids)
+
+            with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+                for exported in pool.map(export_chunk, id_chunks):
+                    rule_resources.extend(exported)
+
         return response, successful_rule_ids, rule_resources
 
     @classmethod
     def export_rules(cls, rule_ids: Optional[List[str]] = None,
                      exclude_export_details: bool = True) -> List['RuleResource']:
         """Export a list of rules from Kibana using the _export API."""
+        return list(cls.stream_export_rules(rule_ids, exclude_export_details=exclude_export_details))
+
+    @classmethod
+    def stream_export_rules(cls, rule_ids: Optional[List[str]] = None,
+                            exclude_export_details: bool = True) -> Iterator['RuleResource']:
+        """Export a list of rules using the _export API, yielding each exported object as it is read from the response.
+
+        The response body is read line by line, so only one object is held in memory at a time.
+        """
         url = f'{cls.BASE_URI}/_export'
 
         if rule_ids:
@@ -268,9 +412,16 @@ class RuleResource(BaseResource):
             rule_ids = None
 
         params = dict(exclude_export_details=stringify_bool(exclude_export_details))
-        response = Kibana.current().post(url, params=params, data=rule_ids, raw=True)
-        data = [json.loads(r) for r in response.text.splitlines()]
-        return [cls(r) for r in data]
+        response = Kibana.current().post(url, params=params, data=rule_ids, raw=True, stream=True)
+        return cls._iter_ndjson(response)
+
+    @classmethod
+    def _iter_ndjson(cls, response: requests.Response) -> Iterator['RuleResource']:
+        """Parse an ndjson response one line at a time."""
+        with response:
+            for line in response.iter_lines(decode_unicode=False):
+                if line.strip():
+                    yield cls(json.loads(line))
 
 
 class Signal(BaseResource):
@@ -326,6 +477,85 @@ class Signal(BaseResource):
         return cls.set_status_many(signal_ids, "open")
 
 
+class ImportJournal:
+    """Record of the chunks of an import which were completed, so a failed import can be resumed."""
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        self.lock = threading.Lock()
+        self.chunks = {}
+
+        if self.path.exists():
+            self.chunks = json.loads(self.path.read_text(encoding="utf-8")).get("chunks", {})
+
+    def get(self, key: str) -> Optional[dict]:
+        """Get the recorded response of a completed chunk."""
+        with self.lock:
+            return self.chunks.get(key)
+
+    def record(self, key: str, response: dict):
+        """Record the response of a completed chunk."""
+        with self.lock:
+            self.chunks[key] = response
+            tmp_path = self.path.with_suffix(f"{self.path.suffix}.{os.getpid()}.tmp")
+            tmp_path.write_text(json.dumps({"chunks": self.chunks}), encoding="utf-8")
+            tmp_path.replace(self.path)
+
+
+def chunk_ndjson(
+    items: List[dict], max_count: Optional[int] = None, max_bytes: Optional[int] = None
+) -> List[List[dict]]:
+    """Split objects into ordered chunks of at most `max_count` objects and `max_bytes` bytes of ndjson.
+
+    An object larger than `max_bytes` on its own is placed in a chunk by itself.
+    """
+    chunks = []
+    chunk = []
+    chunk_bytes = 0
+
+    for item in items:
+        item_bytes = len(json.dumps(item).encode("utf-8")) + 1
+        if chunk and ((max_count and len(chunk) >= max_count) or (max_bytes and chunk_bytes + item_bytes > max_bytes)):
+            chunks.append(chunk)
+            chunk = []
+            chunk_bytes = 0
+
+        chunk.append(item)
+        chunk_bytes += item_bytes
+
+    if chunk or not chunks:
+        chunks.append(chunk)
+    return chunks
+
+
+def chunk_object_ids(chunk: List[dict]) -> List[dict]:
+    """Get the identifiers of the rules, exception lists and action connectors in an import chunk."""
+    object_ids = []
+    for obj in chunk:
+        id_key = next((k for k in IMPORT_OBJECT_ID_KEYS if k in obj), None)
+        if id_key and {id_key: obj[id_key]} not in object_ids:
+            object_ids.append({id_key: obj[id_key]})
+    return object_ids
+
+
+def merge_import_responses(responses: List[dict]) -> dict:
+    """Merge the responses of several _import requests, summing counts and concatenating errors."""
+    merged = {}
+    for response in responses:
+        for key, value in (response or {}).items():
+            if isinstance(value, bool):
+                merged[key] = merged.get(key, True) and value
+            elif isinstance(value, (int, float)):
+                merged[key] = merged.get(key, 0) + value
+            elif isinstance(value, list):
+                merged[key] = merged.get(key, []) + value
+            else:
+                merged.setdefault(key, value)
+
+    merged.setdefault("errors", [])
+    return merged
+
+
 def stringify_bool(obj: bool) -> str:
     """Convert a boolean to a string."""
     assert isinstance(obj, bool), f"Expected a boolean, got {type(obj)}"
@@ -6,6 +6,8 @@
 import eql
 
 from . import ast
+from .batch import BatchCompiler, DocumentColumns
+from .compiler import FilterCompiler
 from .dsl import ToDsl
 from .eql2kql import Eql2Kql
 from .errors import KqlParseError, KqlCompileError
@@ -16,7 +18,9 @@ from .parser import lark_parse, KqlParser
 __version__ = '0.1.8'
 __all__ = (
     "ast",
+    "DocumentColumns",
     "from_eql",
+    "get_batch_evaluator",
     "get_evaluator",
     "get_field_names",
     "KqlParseError",
@@ -105,8 +109,27 @@ def from_eql(tree, optimize=True):
     return converted.optimize(recursive=True) if optimize else converted
 
 
-def get_evaluator(tree, optimize=False):
+def get_evaluator(tree, optimize=False, compiled=False):
+    """Get a callable which checks if a document matches a query.
+
+    With `compiled`, the query is compiled into a specialized callable, which gives the same results as the default
+    walker but is faster when evaluating many documents.
+    """
     if not isinstance(tree, ast.KqlNode):
         tree = parse(tree, optimize=optimize)
 
+    if compiled:
+        return FilterCompiler.compile(tree)
     return FilterGenerator().filter(tree)
+
+
+def get_batch_evaluator(tree, optimize=False):
+    """Get a callable which checks which documents in a list match a query, returning a list of booleans.
+
+    The fields referenced by the query are extracted once into columns, which can be shared across queries by passing
+    the same `DocumentColumns` instead of a list of documents.
+    """
+    if not isinstance(tree, ast.KqlNode):
+        tree = parse(tree, optimize=optimize)
+
+    return BatchCompiler.compile(tree)
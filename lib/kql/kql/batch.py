@@ -0,0 +1,119 @@
+# Copyright Elasticsearch B.V. and/or licensed to Elasticsearch B.V. under one
+# or more contributor license agreements. Licensed under the Elastic License
+# 2.0; you may not use this file except in compliance with the Elastic License
+# 2.0.
+
+"""Evaluate a KQL AST over a batch of documents, one column at a time."""
+
+from .compiler import RANGE_OPERATORS, FilterCompiler, compile_path
+
+
+class DocumentColumns:
+    """Columnar view of a list of documents, which extracts the terms of each field once.
+
+    The columns are cached, so the same instance can be shared by every query evaluated over the same documents.
+    """
+
+    def __init__(self, documents):
+        self.documents = list(documents)
+        self._columns = {}
+
+    def __len__(self):
+        return len(self.documents)
+
+    def column(self, name):
+        """Get the list of terms of a field, for every document."""
+        column = self._columns.get(name)
+        if column is None:
+            get_terms = compile_path(name)
+            column = self._columns[name] = [get_terms(document) for document in self.documents]
+        return column
+
+
+class BatchCompiler(FilterCompiler):
+    """Compile a KQL AST into a function which selects the matching rows of a `DocumentColumns`.
+
+    Each expression takes the ordered list of candidate row numbers and returns the ones which match, so field
+    comparisons are evaluated over a column, and `and`/`or` only evaluate their remaining items for the rows which
+    are still undecided. Values are checked the same way as the compiled row evaluator. Nested queries and free text
+    are not tied to a single column, so they fall back to evaluating each row.
+    """
+
+    def _row_fallback(self, tree):
+        check = FilterCompiler.compile(tree)
+
+        def select(columns, rows):
+            documents = columns.documents
+            return [row for row in rows if check(documents[row])]
+
+        return select
+
+    def _select_column(self, field, check):
+        name = field.name
+
+        def select(columns, rows):
+            column = columns.column(name)
+            return [row for row in rows if check(column[row])]
+
+        return select
+
+    def _walk_field_comparison(self, tree):
+        return self._select_column(tree.field, self.walk(tree.value))
+
+    def _walk_field_range(self, tree):
+        return self._select_column(tree.field, self.walk(tree.value, RANGE_OPERATORS[tree.operator]))
+
+    def _walk_nested_query(self, tree):
+        return self._row_fallback(tree)
+
+    def _walk_free_text(self, tree):
+        return self._row_fallback(tree)
+
+    def _walk_not_expr(self, tree):
+        select_expr = self.walk(tree.expr)
+
+        def select(columns, rows):
+            matched = set(select_expr(columns, rows))
+            return [row for row in rows if row not in matched]
+
+        return select
+
+    def _walk_and_expr(self, tree):
+        selects = [self.walk(item) for item in tree.items]
+
+        def select(columns, rows):
+            for select_item in selects:
+                if not rows:
+                    break
+                rows = select_item(columns, rows)
+            return rows
+
+        return select
+
+    def _walk_or_expr(self, tree):
+        selects = [self.walk(item) for item in tree.items]
+
+        def select(columns, rows):
+            matched = set()
+            remaining = rows
+            for select_item in selects:
+                if not remaining:
+                    break
+                matched.update(select_item(columns, remaining))
+                remaining = [row for row in remaining if row not in matched]
+            return [row for row in rows if row in matched]
+
+        return select
+
+    @classmethod
+    def compile(cls, expression):
+        select = cls().walk(expression)
+
+        def evaluate(documents):
+            columns = documents if isinstance(documents, DocumentColumns) else DocumentColumns(documents)
+            mask = [False] * len(columns)
+            for row in select(columns, list(range(len(columns)))):
+                mask[row] = True
+            return mask
+
+        return evaluate
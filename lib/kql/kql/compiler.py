@@ -0,0 +1,304 @@
+# Copyright Elasticsearch B.V. and/or licensed to Elasticsearch B.V. under one
+# or more contributor license agreements. Licensed under the Elastic License
+# 2.0; you may not use this file except in compliance with the Elastic License
+# 2.0.
+
+"""Compile a KQL AST into a flat, specialized Python callable."""
+
+import operator
+import re
+
+import eql.ast
+from eql import Walker, utils
+from eql.functions import CidrMatch
+
+from .ast import Boolean, Null, Number, String, Wildcard
+from .errors import KqlCompileError, KqlRuntimeError
+from .evaluator import FilterGenerator
+from .parser import is_ipaddress
+
+RANGE_OPERATORS = {"<": operator.lt, "<=": operator.le, ">=": operator.ge, ">": operator.gt}
+
+
+def compile_path(name):
+    """Compile a dotted field name into a function returning the list of terms for a document.
+
+    This matches `FilterGenerator.get_terms`, but walks the pre-split path iteratively instead of through nested
+    generators, with a fast path for top-level fields.
+    """
+    path = tuple(name.split("."))
+
+    def lookup(document, key, out):
+        if isinstance(document, dict):
+            out.append(document.get(key))
+        elif isinstance(document, (tuple, list)):
+            for item in document:
+                lookup(item, key, out)
+
+    def collect(values):
+        terms = []
+        for value in values:
+            if isinstance(value, (tuple, list)):
+                terms.extend(value)
+            elif value is not None:
+                terms.append(value)
+        return terms
+
+    if len(path) == 1:
+        key = path[0]
+
+        def get_terms(document):
+            if isinstance(document, dict):
+                value = document.get(key)
+                if value is None:
+                    return []
+                if isinstance(value, (tuple, list)):
+                    return list(value)
+                return [value]
+
+            values = []
+            lookup(document, key, values)
+            return collect(values)
+
+        return get_terms
+
+    def get_terms(document):
+        values = [document]
+        for key in path:
+            found = []
+            for value in values:
+                lookup(value, key, found)
+            values = found
+        return collect(values)
+
+    return get_terms
+
+
+class LiteralMatcher:
+    """Pre-coerced forms of one or more literal values, matched against a term by type.
+
+    Each literal is converted once to the form it is compared against for each term type, the same way
+    `FilterGenerator._walk_value` converts it for every term, so matching a term is a set lookup.
+    """
+
+    def __init__(self, values):
+        self.strings = set()
+        self.booleans = set()
+        self.integers = set()
+        self.floats = set()
+        self.cidrs = []
+
+        for value in values:
+            self.add(value)
+
+    def add(self, value):
+        if value is None:
+            return
+
+        if not utils.is_string(value):
+            self.strings.add(utils.to_unicode(value))
+            self.booleans.add(value)
+            self.integers.add(value)
+            self.floats.add(value)
+            return
+
+        self.strings.add(value)
+        if eql.utils.is_cidr_pattern(value):
+            self.cidrs.append(CidrMatch.get_callback(None, eql.ast.String(value)))
+
+        if value in ("true", "false"):
+            self.booleans.add(value == "true")
+
+        try:
+            self.integers.add(int(value))
+        except ValueError:
+            pass
+
+        try:
+            self.floats.add(float(value))
+        except ValueError:
+            pass
+
+    def match(self, term):
+        if utils.is_string(term):
+            if term in self.strings:
+                return True
+            return bool(self.cidrs) and is_ipaddress(term) and any(cidr(term) for cidr in self.cidrs)
+        elif isinstance(term, bool):
+            return term in self.booleans
+        elif isinstance(term, int):
+            return term in self.integers
+        elif isinstance(term, float):
+            return term in self.floats
+        raise KqlRuntimeError("Cannot compare value {}".format(term))
+
+
+class FilterCompiler(Walker):
+    """Compile a KQL AST into a single callable which evaluates a document.
+
+    The result matches `FilterGenerator`, but the work which only depends on the query is done once: field paths are
+    pre-split, literals are pre-coerced for every term type, literal `or` values become set lookups and wildcard
+    regexes are compiled up front.
+    """
+
+    def _walk_default(self, node, *args, **kwargs):
+        raise KqlCompileError("Unable to convert {}".format(node))
+
+    # value nodes compile to a check over the list of terms for a field
+
+    @staticmethod
+    def _any_term(match):
+        def check(terms):
+            for term in terms:
+                if term is None:
+                    continue
+                if isinstance(term, list):
+                    if check(term):
+                        return True
+                elif match(term):
+                    return True
+            return False
+
+        return check
+
+    def _walk_value(self, tree, compare_function=None):
+        if compare_function is None:
+            return self._any_term(LiteralMatcher([tree.value]).match)
+        return self._walk_range_value(tree, compare_function)
+
+    def _walk_range_value(self, tree, compare_function):
+        value = tree.value
+        matcher = LiteralMatcher([value])
+
+        def match(term):
+            if utils.is_string(term):
+                return compare_function(term, value if utils.is_string(value) else utils.to_unicode(value))
+            elif not utils.is_string(value):
+                return compare_function(term, value)
+
+            # the string value was pre-coerced, and can only be compared if it coerced to the term's type
+            if isinstance(term, bool):
+                candidates = matcher.booleans
+            elif isinstance(term, int):
+                candidates = matcher.integers
+            elif isinstance(term, float):
+                candidates = matcher.floats
+            else:
+                raise KqlRuntimeError("Cannot compare value {}".format(term))
+            return any(compare_function(term, v) for v in candidates)
+
+        return self._any_term(match)
+
+    def _walk_exists(self, _):
+        return lambda terms: any(t is not None for t in terms)
+
+    def _walk_wildcard(self, tree):
+        pattern = tree.value
+        regex = re.compile(".*?".join(map(re.escape, pattern.split("*"))), re.UNICODE | re.DOTALL)
+        fullmatch = regex.fullmatch
+
+        def check(terms):
+            for term in terms:
+                if term is not None and fullmatch(term):
+                    return True
+            return False
+
+        return check
+
+    def _walk_or_values(self, tree, *args):
+        literals = (String, Number, Boolean, Null)
+        if not args and all(type(item) in literals for item in tree.items):
+            # a set of literals is checked in a single pass over the terms
+            return self._any_term(LiteralMatcher(item.value for item in tree.items).match)
+        return self._walk_list(tree, False, *args)
+
+    def _walk_and_values(self, tree, *args):
+        return self._walk_list(tree, True, *args)
+
+    def _walk_not_value(self, tree):
+        check = self.walk(tree.value)
+        return lambda terms: not check(terms)
+
+    # expression nodes compile to a check over the document
+
+    def _walk_list(self, tree, require_all, *args):
+        checks = tuple(self.walk(item, *args) for item in tree.items)
+
+        if len(checks) == 1:
+            return checks[0]
+
+        if len(checks) == 2:
+            first, second = checks
+            if require_all:
+                return lambda x: bool(first(x) and second(x))
+            return lambda x: bool(first(x) or second(x))
+
+        if require_all:
+            def check_all(x):
+                for check in checks:
+                    if not check(x):
+                        return False
+                return True
+
+            return check_all
+
+        def check_any(x):
+            for check in checks:
+                if check(x):
+                    return True
+            return False
+
+        return check_any
+
+    def _walk_and_expr(self, tree):
+        return self._walk_list(tree, True)
+
+    def _walk_or_expr(self, tree):
+        return self._walk_list(tree, False)
+
+    def _walk_not_expr(self, tree):
+        check = self.walk(tree.expr)
+        return lambda doc: not check(doc)
+
+    def _walk_field(self, field):
+        return compile_path(field.name)
+
+    def _walk_field_comparison(self, tree):
+        get_terms = self.walk(tree.field)
+        check = self.walk(tree.value)
+        return lambda doc: check(get_terms(doc))
+
+    def _walk_field_range(self, tree):
+        get_terms = self.walk(tree.field)
+        check = self.walk(tree.value, RANGE_OPERATORS[tree.operator])
+        return lambda doc: check(get_terms(doc))
+
+    def _walk_nested_query(self, tree):
+        get_terms = self.walk(tree.field)
+        check = self.walk(tree.expr)
+
+        def check_nested(doc):
+            for nested in get_terms(doc):
+                if check(nested):
+                    return True
+            return False
+
+        return check_nested
+
+    def _walk_free_text(self, tree):
+        check = self.walk(tree.value)
+        get_all_terms = FilterGenerator.get_all_terms
+        # wildcard matching only applies to strings; other leaf values can never match
+        strings_only = isinstance(tree.value, Wildcard)
+
+        def callback(document):
+            terms = list(get_all_terms(document))
+            if strings_only:
+                terms = [term for term in terms if utils.is_string(term)]
+            return check(terms)
+
+        return callback
+
+    @classmethod
+    def compile(cls, expression):
+        return cls().walk(expression)
@@ -4,6 +4,7 @@
 # 2.0.
 
 import unittest
+from typing import Any, ClassVar
 
 import kql
 
@@ -151,3 +152,71 @@ class NestedEvaluatorTests(unittest.TestCase):
         """Conditions satisfied by different objects in the array must not match."""
         # `ADD` is on the first object, `roles/other` on the second: no single object matches.
         self.assertFalse(self.evaluate('deltas:{ action:ADD and role:"roles/other" }'))
+
+
+class CompiledEvaluatorTests(EvaluatorTests):
+    """The compiled evaluator should pass every walker test."""
+
+    def evaluate(self, source_text):
+        evaluator = kql.get_evaluator(source_text, optimize=False, compiled=True)
+        return evaluator(document)
+
+    def test_matches_walker(self):
+        """Compiled and walked evaluators should agree, including for optimized queries with literal sets."""
+        queries = [
+            "number:(0 or 1 or 2)",
+            'number:("1" or "x")',
+            "boolean:(true or 0)",
+            "boolean_list:(1 and false)",
+            'ip:(10.0.0.0/8 or 192.168.0.0/16 or "other")',
+            'string_list:(example or "missing") and not number_list:(4 or 5)',
+            "number:1 and (string:hello* or ip:10.0.0.0/8) and not boolean:false",
+            "number >= 1 and number < 2 and structured.a.b > 0",
+            "structured.a.b:(1 or 2) or missing.field:*",
+            "structured:{ a:{ b:(1 or 3) } }",
+        ]
+        for query in queries:
+            for optimize in (False, True):
+                walker = kql.get_evaluator(query, optimize=optimize)
+                compiled = kql.get_evaluator(query, optimize=optimize, compiled=True)
+                for doc in (document, nested_document, {}):
+                    with self.subTest(query=query, optimize=optimize, doc=doc):
+                        self.assertEqual(bool(walker(doc)), bool(compiled(doc)))
+
+
+class CompiledNestedEvaluatorTests(NestedEvaluatorTests):
+    """The compiled evaluator should pass every nested walker test."""
+
+    def evaluate(self, source_text):
+        evaluator = kql.get_evaluator(source_text, optimize=False, compiled=True)
+        return evaluator(nested_document)
+
+
+class BatchEvaluatorTests(unittest.TestCase):
+    """Batch evaluation should return the same matches as evaluating each document."""
+
+    documents: ClassVar[list[dict[str, Any]]] = [
+        document,
+        nested_document,
+        {},
+        {"number": 2, "string": "example", "ip": "10.1.2.3", "structured": {"a": {"b": 2}}},
+        {"number": "1", "boolean": "true", "string_list": [["hello world"]], "deltas": {"action": "ADD"}},
+    ]
+
+    def test_matches_row_evaluator(self):
+        queries = [
+            "number:1",
+            "number:(1 or 2) and not boolean:true",
+            "string:hello* or ip:10.0.0.0/8",
+            'string_list:"hello world" and (number < 2 or missing:*)',
+            "not (number:1 or structured.a.b:2)",
+            'deltas:{ action:ADD and role:"roles/target" } or "example"',
+        ]
+        columns = kql.DocumentColumns(self.documents)
+
+        for query in queries:
+            with self.subTest(query=query):
+                expected = [bool(kql.get_evaluator(query)(doc)) for doc in self.documents]
+                self.assertEqual(kql.get_batch_evaluator(query)(self.documents), expected)
+                # columns can be shared by every query over the same documents
+                self.assertEqual(kql.get_batch_evaluator(query)(columns), expected)
@@ -0,0 +1,49 @@
+# Copyright Elasticsearch B.V. and/or licensed to Elasticsearch B.V. under one
+# or more contributor license agreements. Licensed under the Elastic License
+# 2.0; you may not use this file except in compliance with the Elastic License
+# 2.0.
+
+"""Tests for the benchmark runner."""
+
+import unittest
+
+from benchmarks.runner import Benchmark, BenchmarkResults, compare_results, discover
+
+
+class Counter:
+    params = (("a", "b"),)
+    calls: list[str] = []  # noqa: RUF012
+
+    def setup(self, name: str) -> None:
+        self.calls.append(f"setup-{name}")
+
+    def teardown(self, name: str) -> None:
+        self.calls.append(f"teardown-{name}")
+
+    def time_count(self, name: str) -> None:
+        self.calls.append(f"time-{name}")
+
+
+class TestRunner(unittest.TestCase):
+    """Benchmarks should be discovered by name, timed around setup and teardown, and compared between runs."""
+
+    def test_run(self) -> None:
+        """Setup and teardown should wrap every timed run."""
+        times = Benchmark("Counter.time_count(a)", Counter, "time_count", ("a",)).run(repeat=2)
+        self.assertEqual(len(times), 2)
+        self.assertEqual(Counter.calls, ["setup-a", "time-a", "teardown-a"] * 2)
+
+    def test_discover(self) -> None:
+        """Every time method should be found for each combination of parameters."""
+        names = [b.name for b in discover(r"LoadRules")]
+        self.assertTrue(names)
+        self.assertTrue(all(n.startswith("bench_rules.LoadRules.time_load(") for n in names))
+
+    def test_compare_results(self) -> None:
+        """Ratios beyond the threshold should be flagged, and benchmarks missing from either run skipped."""
+        before = BenchmarkResults(times={"a": [2.0, 1.0], "b": [1.0], "c": [1.0], "only-before": [1.0]})
+        after = BenchmarkResults(times={"a": [1.05], "b": [2.0], "c": [0.5]})
+        rows = {r["benchmark"]: r for r in compare_results(before, after, threshold=1.1)}
+        self.assertEqual(sorted(rows), ["a", "b", "c"])
+        self.assertEqual([rows[n]["change"] for n in "abc"], ["", "slower", "faster"])
+        self.assertEqual(rows["b"]["ratio"], 2.0)
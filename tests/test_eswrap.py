@@ -0,0 +1,131 @@
+# Copyright Elasticsearch B.V. and/or licensed to Elasticsearch B.V. under one
+# or more contributor license agreements. Licensed under the Elastic License
+# 2.0; you may not use this file except in compliance with the Elastic License
+# 2.0.
+
+"""Tests for collecting events and surveying rules with Elasticsearch."""
+
+import unittest
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from types import SimpleNamespace
+from typing import Any
+from unittest import mock
+
+from elastic_transport import ObjectApiResponse
+
+from detection_rules import eswrap
+from detection_rules.eswrap import CollectEvents
+
+
+def make_rule(rule_id: str, rule_type: str = "eql") -> Any:
+    data = SimpleNamespace(type=rule_type, unique_fields=["process.name"])
+    return SimpleNamespace(id=rule_id, contents=SimpleNamespace(data=data))
+
+
+def eql_response(name: str, is_running: bool = False, search_id: str | None = None) -> ObjectApiResponse[Any]:
+    events = [{"_source": {"process": {"name": name}}}]
+    response: dict[str, Any] = {"is_running": is_running, "hits": {"events": events}}
+    if search_id:
+        response["id"] = search_id
+    return ObjectApiResponse(body=response, meta=mock.MagicMock())
+
+
+class TestSearchFromRule(unittest.TestCase):
+    """Rule surveys should batch msearch requests and run async searches concurrently."""
+
+    def test_chunk_multi_searches(self) -> None:
+        """Chunks should respect the search count and byte limits."""
+        searches = [(make_rule(str(i)), {"index": "logs-*"}, {"query": {"match_all": {}}}) for i in range(5)]
+        by_count = list(CollectEvents._chunk_multi_searches(searches, max_searches=2, max_bytes=10**6))  # noqa: SLF001
+        self.assertEqual([len(c) for c in by_count], [2, 2, 1])
+
+        by_bytes = list(CollectEvents._chunk_multi_searches(searches, max_searches=100, max_bytes=1))  # noqa: SLF001
+        self.assertEqual([len(c) for c in by_bytes], [1] * 5)
+
+    def test_async_searches_are_bounded_and_polled(self) -> None:
+        """No more than the maximum searches should run at once, and every result should be collected."""
+        client = mock.MagicMock()
+        running: set[str] = set()
+        max_running = 0
+
+        def submit(**kwargs: Any) -> ObjectApiResponse[Any]:
+            nonlocal max_running
+            search_id = f"id-{kwargs['query']}"
+            running.add(search_id)
+            max_running = max(max_running, len(running))
+            return eql_response(kwargs["query"], is_running=True, search_id=search_id)
+
+        def get(id: str) -> ObjectApiResponse[Any]:  # noqa: A002
+            running.discard(id)
+            return eql_response(id.removeprefix("id-"))
+
+        client.eql.search.side_effect = submit
+        client.eql.get.side_effect = get
+
+        rules = [make_rule(f"rule-{i}") for i in range(5)]
+        searches = [(rule, "eql", {"index": "*", "query": f"proc-{i}"}) for i, rule in enumerate(rules)]
+        results: dict[str, Any] = {}
+        completed: list[int] = []
+
+        with mock.patch.object(eswrap, "ASYNC_SEARCH_POLL_INTERVAL", 0):
+            CollectEvents(client)._run_async_searches(searches, results, 2, completed.append)  # noqa: SLF001
+
+        self.assertEqual(max_running, 2)
+        self.assertEqual(len(completed), len(rules))
+        self.assertEqual(client.eql.delete.call_count, len(rules))
+        for i, rule in enumerate(rules):
+            self.assertEqual(results[rule.id]["results"]["process.name"], {f"proc-{i}": 1})
+            self.assertIn("search_time_ms", results[rule.id])
+
+
+class TestStreamEvents(unittest.TestCase):
+    """Streamed collection should page with a point in time and write events incrementally."""
+
+    total = 7
+
+    def setUp(self) -> None:
+        self.client = mock.MagicMock()
+        self.client.open_point_in_time.return_value = {"id": "pit-1"}
+        self.searches: list[dict[str, Any]] = []
+
+        def search(**kwargs: Any) -> dict[str, Any]:
+            self.searches.append(kwargs)
+            start = kwargs["search_after"][0] + 1 if kwargs["search_after"] else 0
+            hits = [
+                {
+                    "_source": {"@timestamp": 1700000000 + i, "agent": {"type": "endpoint" if i % 2 else "winlogbeat"}},
+                    "sort": [i],
+                }
+                for i in range(start, min(start + kwargs["size"], self.total))
+            ]
+            return {"pit_id": "pit-2", "hits": {"hits": hits}}
+
+        self.client.search.side_effect = search
+
+    def test_stream_pages_with_search_after(self) -> None:
+        """Every hit should be yielded once, and the point in time closed."""
+        collector = CollectEvents(self.client)
+        hits = list(collector.stream({"bool": {"filter": []}}, "dsl", start_time="now-1h", page_size=3))
+        self.assertEqual([h["sort"][0] for h in hits], list(range(self.total)))
+        self.assertEqual([s["search_after"] for s in self.searches], [None, [2], [5]])
+        self.assertEqual(self.searches[-1]["pit"]["id"], "pit-2")
+        self.client.close_point_in_time.assert_called_once_with(id="pit-2")
+
+        self.searches.clear()
+        limited = list(collector.stream({"bool": {"filter": []}}, "dsl", max_events=4, page_size=3))
+        self.assertEqual(len(limited), 4)
+        self.assertEqual([s["size"] for s in self.searches], [3, 1])
+
+    def test_stream_save(self) -> None:
+        """Events should be written per agent type, optionally compressed, and read back."""
+        collector = CollectEvents(self.client)
+        with TemporaryDirectory() as tmp_dir:
+            hits = collector.stream({"bool": {"filter": []}}, "dsl", page_size=3)
+            paths = eswrap.Events.stream_save(hits, dump_dir=Path(tmp_dir), compress=True)
+            self.assertEqual(sorted(p.name for p in paths.values()), ["endpoint.ndjson.gz", "winlogbeat.ndjson.gz"])
+
+            events = eswrap.Events.load(paths.values()).events
+            self.assertEqual(len(events["endpoint"]), 3)
+            self.assertEqual(len(events["winlogbeat"]), 4)
+            self.assertTrue(all(isinstance(e["@timestamp"], str) for e in events["winlogbeat"]))
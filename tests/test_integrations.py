@@ -23,6 +23,7 @@ from detection_rules.integrations import (
     find_latest_compatible_version,
     find_latest_integration_patch_for_minor,
     get_integration_schema_data,
+    get_merged_integration_schema,
     resolve_related_integration_version,
 )
 from detection_rules.rule_validators import KQLValidator
@@ -318,6 +319,32 @@ class TestFindLatestCompatibleVersion(unittest.TestCase):
         self.assertEqual(schema_data[0]["package_version"], "1.1.0")
         self.assertEqual(schema_data[0]["stack_version"], "9.2.0")
 
+    def test_merged_integration_schema_is_shared(self):
+        """Merged integration schemas are built once per package, integration and ECS version, and are read-only."""
+        integration_fields = {"pkg.ds.count": "long", "pkg.ds.name": "keyword"}
+        schemas = {"pkg": {"1.0.0": {"ds": integration_fields}}}
+        ecs_fields = {"host.name": "keyword", "message": "match_only_text"}
+
+        get_merged_integration_schema.clear()
+        with unittest.mock.patch(
+            "detection_rules.integrations.ecs.get_flat_field_types", return_value=ecs_fields
+        ) as get_flat_field_types:
+            first = get_merged_integration_schema(schemas, "pkg", "1.0.0", "ds", "test-ecs")
+            second = get_merged_integration_schema(schemas, "pkg", "1.0.0", "ds", "test-ecs")
+            without_ecs = get_merged_integration_schema(schemas, "pkg", "1.0.0", "ds", None)
+
+        self.assertIs(first, second)
+        self.assertEqual(get_flat_field_types.call_count, 1)
+        self.assertEqual(get_merged_integration_schema.cache_stats().hits, 1)
+        self.assertEqual(
+            dict(first),
+            {"pkg.ds.count": "integer", "pkg.ds.name": "keyword", "host.name": "keyword", "message": "text"},
+        )
+        self.assertNotIn("host.name", without_ecs)
+        self.assertEqual(integration_fields, {"pkg.ds.count": "long", "pkg.ds.name": "keyword"})
+        with self.assertRaises(TypeError):
+            first["pkg.ds.extra"] = "keyword"  # type: ignore[index]
+
 
 class TestResolveRelatedIntegrationVersion(unittest.TestCase):
     """Behavior coverage for ``resolve_related_integration_version``."""
@@ -0,0 +1,287 @@
+# Copyright Elasticsearch B.V. and/or licensed to Elasticsearch B.V. under one
+# or more contributor license agreements. Licensed under the Elastic License
+# 2.0; you may not use this file except in compliance with the Elastic License
+# 2.0.
+
+"""Tests for the Kibana library transport, paged finds, chunked rule imports and streamed rule exports."""
+
+import gzip
+import json
+import threading
+import unittest
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from typing import Any, ClassVar
+from unittest import mock
+
+import requests
+from kibana import RuleResource
+from kibana.connector import RETRYABLE_STATUS_CODES, Kibana, RequestMetrics
+from kibana.resources import chunk_ndjson, merge_import_responses
+
+
+class TestTransport(unittest.TestCase):
+    """The Kibana connector should pool connections, retry retryable statuses and time each request."""
+
+    def test_adapter_retry_policy(self) -> None:
+        """The mounted adapter should be sized and retry with backoff, honoring Retry-After."""
+        kibana = Kibana(kibana_url="https://example.com", api_key="abc", pool_maxsize=4, max_retries=2)
+        adapter = kibana.session.get_adapter("https://example.com")
+        self.assertEqual(adapter._pool_maxsize, 4)  # noqa: SLF001
+        retry = adapter.max_retries
+        self.assertEqual(retry.total, 2)
+        self.assertEqual(set(retry.status_forcelist), set(RETRYABLE_STATUS_CODES))
+        self.assertTrue(retry.respect_retry_after_header)
+        self.assertTrue(retry.is_retry("POST", 429))
+        self.assertFalse(retry.is_retry("POST", 500))
+        self.assertFalse(retry.is_retry("POST", 502))
+        self.assertTrue(retry.is_retry("GET", 502))
+        self.assertTrue(retry.new(total=1).is_retry("POST", 503))
+
+        kibana.ensure_pool_size(2)
+        self.assertEqual(kibana.pool_maxsize, 4)
+        kibana.ensure_pool_size(8)
+        self.assertEqual(kibana.session.get_adapter("https://example.com")._pool_maxsize, 8)  # noqa: SLF001
+
+    def test_gzip_and_metrics(self) -> None:
+        """Large bodies should be compressed, and every request recorded in the metrics."""
+        kibana = Kibana(kibana_url="https://example.com", api_key="abc", gzip_min_bytes=10)
+        response = mock.MagicMock(spec=requests.Response, status_code=200, content=b"{}", raw=None)
+        response.json.return_value = {}
+
+        with mock.patch.object(kibana.session, "request", return_value=response) as request:
+            kibana.post("/api/test", data={"key": "value"})
+            kibana.post("/api/test", data={})
+
+        first, second = request.call_args_list
+        self.assertEqual(gzip.decompress(first.kwargs["data"]), b'{"key": "value"}')
+        self.assertEqual(first.kwargs["headers"]["Content-Encoding"], "gzip")
+        self.assertEqual(second.kwargs["data"], "{}")
+        self.assertNotIn("headers", second.kwargs)
+
+        [summary] = kibana.metrics.summary()
+        self.assertEqual((summary["method"], summary["uri"], summary["count"]), ("POST", "/api/test", 2))
+        self.assertEqual(summary["errors"], 0)
+
+    def test_request_metrics(self) -> None:
+        """Metrics should be grouped by method and uri, and sorted by total time."""
+        metrics = RequestMetrics()
+        metrics.record("GET", "/a", 1.0, 200)
+        metrics.record("GET", "/a", 3.0, 503, retries=2)
+        metrics.record("POST", "/b", 0.5)
+        slowest, fastest = metrics.summary()
+        self.assertEqual(
+            slowest,
+            {
+                "method": "GET",
+                "uri": "/a",
+                "mean": 2.0,
+                "count": 2,
+                "errors": 1,
+                "retries": 2,
+                "total": 4.0,
+                "max": 3.0,
+            },
+        )
+        self.assertEqual(fastest["errors"], 1)
+        metrics.clear()
+        self.assertEqual(metrics.summary(), [])
+
+
+def parse_ndjson(raw_data: bytes) -> list[dict[str, Any]]:
+    """Get the objects posted in a multipart ndjson import."""
+    lines = raw_data.decode("utf-8").splitlines()
+    return [json.loads(line) for line in lines if line.startswith("{")]
+
+
+class TestChunkedImport(unittest.TestCase):
+    """RuleResource.import_rules should split large imports into chunks and merge the results."""
+
+    rules: ClassVar[list[dict[str, Any]]] = [
+        {"rule_id": f"rule-{i}", "name": f"Rule {i}", "type": "query"} for i in range(7)
+    ]
+    exceptions: ClassVar[list[list[dict[str, Any]]]] = [
+        [{"list_id": "list-1", "type": "detection"}, {"list_id": "list-1", "item_id": "item-1"}]
+    ]
+
+    def setUp(self) -> None:
+        self.kibana = Kibana(kibana_url="https://example.com", api_key="abc")
+        self.posted: list[list[dict[str, Any]]] = []
+        self.failing: set[str] = set()
+        self.lock = threading.Lock()
+
+    def fake_post(self, _uri: str, raw_data: bytes | None = None, **_: Any) -> dict[str, Any]:
+        objects = parse_ndjson(raw_data or b"")
+        if self.failing & {o.get("rule_id") or o.get("list_id") for o in objects}:
+            raise requests.exceptions.ConnectionError("connection reset")
+
+        with self.lock:
+            self.posted.append(objects)
+        rule_ids = [o["rule_id"] for o in objects if "rule_id" in o]
+        errors = [{"rule_id": r, "error": {"status_code": 400, "message": "bad"}} for r in rule_ids if r == "rule-3"]
+        return {"success": not errors, "success_count": len(rule_ids) - len(errors), "errors": errors}
+
+    def import_rules(self, **kwargs: Any) -> tuple[dict[str, Any], list[str], list[Any]]:
+        exported = mock.patch.object(
+            RuleResource, "export_rules", side_effect=lambda ids: [RuleResource(rule_id=i) for i in ids]
+        )
+        with self.kibana, mock.patch.object(self.kibana, "post", side_effect=self.fake_post), exported:
+            return RuleResource.import_rules(self.rules, self.exceptions, **kwargs)
+
+    def test_chunk_ndjson(self) -> None:
+        """Chunks should respect the count and byte limits, and keep the object order."""
+        items = [{"id": i, "padding": "x" * 10} for i in range(10)]
+        by_count = chunk_ndjson(items, max_count=4)
+        self.assertEqual([len(c) for c in by_count], [4, 4, 2])
+
+        item_bytes = len(json.dumps(items[0])) + 1
+        by_bytes = chunk_ndjson(items, max_bytes=item_bytes * 3)
+        self.assertEqual([len(c) for c in by_bytes], [3, 3, 3, 1])
+        self.assertEqual([i for c in by_bytes for i in c], items)
+        self.assertEqual(chunk_ndjson(items), [items])
+
+    def test_merge_import_responses(self) -> None:
+        """Counts should be summed, errors concatenated and success only kept if every chunk succeeded."""
+        merged = merge_import_responses(
+            [
+                {"success": True, "success_count": 2, "errors": []},
+                {"success": False, "success_count": 1, "errors": [{"rule_id": "a"}]},
+            ]
+        )
+        self.assertEqual(merged, {"success": False, "success_count": 3, "errors": [{"rule_id": "a"}]})
+
+    def test_unchunked_import_is_a_single_request(self) -> None:
+        """Without batch limits, everything should be imported in one request, as before."""
+        response, successful, resources = self.import_rules()
+        self.assertEqual(len(self.posted), 1)
+        self.assertEqual(len(self.posted[0]), len(self.rules) + 2)
+        self.assertEqual([e["rule_id"] for e in response["errors"]], ["rule-3"])
+        self.assertEqual(len(successful), len(self.rules) - 1)
+        self.assertEqual(len(resources), len(successful))
+
+    def test_chunked_import(self) -> None:
+        """Exceptions should be imported in the first chunk, and the results of every chunk merged."""
+        response, successful, _ = self.import_rules(batch_size=3, workers=3)
+        self.assertEqual(len(self.posted), 3)
+        self.assertIn({"list_id": "list-1", "type": "detection"}, self.posted[0])
+        self.assertEqual(response["success_count"], len(self.rules) - 1)
+        self.assertEqual([e["rule_id"] for e in response["errors"]], ["rule-3"])
+        self.assertNotIn("rule-3", successful)
+
+    def test_failed_chunk_is_reported_and_resumed(self) -> None:
+        """Rules in a chunk which keeps failing should be errors, and a re-run should only import missing chunks.
+
+        Chunks with rules which failed to import are imported again, and the journal is kept per Kibana space, so a
+        run into another space imports every chunk again.
+        """
+        with TemporaryDirectory() as tmp_dir:
+            journal = Path(tmp_dir) / "import-journal.json"
+            kwargs: dict[str, Any] = {"batch_size": 3, "journal": journal}
+
+            self.failing = {"rule-5"}
+            response, successful, _ = self.import_rules(**kwargs)
+            self.assertIn("rule-5", {e["rule_id"] for e in response["errors"]})
+            self.assertNotIn("rule-5", successful)
+
+            self.failing = set()
+            self.posted.clear()
+            response, successful, _ = self.import_rules(**kwargs)
+            posted = sorted([o["rule_id"] for o in chunk] for chunk in self.posted)
+            self.assertEqual(posted, [["rule-1", "rule-2", "rule-3"], ["rule-4", "rule-5", "rule-6"]])
+            self.assertIn("rule-5", successful)
+            self.assertEqual([e["rule_id"] for e in response["errors"]], ["rule-3"])
+
+            self.kibana.space = "other"
+            self.posted.clear()
+            _ = self.import_rules(**kwargs)
+            self.assertEqual(len(self.posted), 3)
+
+    def test_failed_dependency_chunk_is_reported(self) -> None:
+        """A chunk of only exceptions which keeps failing should be reported by list_id."""
+        self.failing = {"list-1"}
+        response, successful, _ = self.import_rules(batch_size=2)
+        errors = [e for e in response["errors"] if "rule_id" not in e]
+        self.assertEqual([e["list_id"] for e in errors], ["list-1"])
+        self.assertEqual(errors[0]["error"]["status_code"], "unknown status")
+        self.assertEqual(len(successful), len(self.rules) - 1)
+
+
+class TestStreamedExport(unittest.TestCase):
+    """RuleResource exports should be parsed one line at a time."""
+
+    lines: ClassVar[list[bytes]] = [b'{"rule_id": "rule-1"}', b"", b'{"rule_id": "rule-2"}']
+    details = b'{"exported_rules_count": 2}'
+
+    def setUp(self) -> None:
+        self.kibana = Kibana(kibana_url="https://example.com", api_key="abc")
+        self.read: list[bytes] = []
+
+    def fake_response(self, details: bool = True) -> mock.MagicMock:
+        """Build a streamed response, with the export details line unless it was excluded."""
+        lines = [*self.lines, self.details] if details else self.lines
+
+        def iter_lines(**_: Any) -> Any:
+            for line in lines:
+                self.read.append(line)
+                yield line
+
+        response = mock.MagicMock(spec=requests.Response)
+        response.iter_lines.side_effect = iter_lines
+        response.__enter__.return_value = response
+        return response
+
+    def test_stream_export_rules(self) -> None:
+        """Objects should be yielded as they are read, and export_rules should still return every object."""
+        with self.kibana, mock.patch.object(self.kibana, "post", return_value=self.fake_response()) as post:
+            results = RuleResource.stream_export_rules(["rule-1", "rule-2"], exclude_export_details=False)
+            self.assertTrue(post.call_args.kwargs["stream"])
+
+            first = next(results)
+            self.assertEqual(first, {"rule_id": "rule-1"})
+            self.assertIsInstance(first, RuleResource)
+            self.assertEqual(len(self.read), 1)
+            self.assertEqual(list(results), [{"rule_id": "rule-2"}, {"exported_rules_count": 2}])
+
+        with self.kibana, mock.patch.object(self.kibana, "post", return_value=self.fake_response(details=False)):
+            self.assertEqual([r["rule_id"] for r in RuleResource.export_rules()], ["rule-1", "rule-2"])
+
+    def test_stream_bulk_export(self) -> None:
+        """The bulk export should stream the same way."""
+        with self.kibana, mock.patch.object(self.kibana, "post", return_value=self.fake_response()):
+            results = RuleResource.stream_bulk_export(query="alert.attributes.tags: test")
+            self.assertEqual(len(self.read), 0)
+            self.assertEqual(len(list(results)), 3)
+
+
+class TestPrefetchedFind(unittest.TestCase):
+    """Paged finds should yield every result in order, with or without prefetching."""
+
+    total = 23
+
+    def setUp(self) -> None:
+        self.kibana = Kibana(kibana_url="https://example.com", api_key="abc")
+        self.requests: list[dict[str, Any]] = []
+        self.lock = threading.Lock()
+
+    def fake_get(self, _uri: str, params: dict[str, Any], **_: Any) -> dict[str, Any]:
+        with self.lock:
+            self.requests.append(params)
+        page, per_page = params["page"], params["per_page"]
+        start = (page - 1) * per_page
+        data = [{"rule_id": f"rule-{i}"} for i in range(start, min(start + per_page, self.total))]
+        return {"page": page, "perPage": per_page, "total": self.total, "data": data}
+
+    def find(self, **kwargs: Any) -> list[str]:
+        with self.kibana, mock.patch.object(self.kibana, "get", side_effect=self.fake_get):
+            return [r["rule_id"] for r in RuleResource.find(per_page=5, **kwargs)]
+
+    def test_sequential_find(self) -> None:
+        """Without prefetching, pages should be requested one at a time."""
+        self.assertEqual(self.find(), [f"rule-{i}" for i in range(self.total)])
+        self.assertEqual([r["page"] for r in self.requests], [1, 2, 3, 4, 5])
+
+    def test_prefetched_find(self) -> None:
+        """With prefetching, every page should still be requested once and the results kept in order."""
+        self.assertEqual(self.find(prefetch=3, fields=["rule_id"]), [f"rule-{i}" for i in range(self.total)])
+        self.assertEqual(sorted(r["page"] for r in self.requests), [1, 2, 3, 4, 5])
+        self.assertTrue(all(r["fields"] == ["rule_id"] for r in self.requests))
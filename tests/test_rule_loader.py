@@ -5,14 +5,28 @@
 
 """Test RawRuleCollection loading and CLI flag backwards compatibility."""
 
+import json
+import os
+import shutil
 import unittest
 from pathlib import Path
 from tempfile import TemporaryDirectory
 from typing import Any
+from unittest import mock
 
+from detection_rules import affected_rules
+from detection_rules.affected_rules import get_affected_rules
 from detection_rules.kbwrap import kibana_export_rules
 from detection_rules.main import import_rules_into_repo
-from detection_rules.rule_loader import RawRuleCollection
+from detection_rules.rule import TOMLRuleContents
+from detection_rules.rule_cache import RuleCache
+from detection_rules.rule_loader import (
+    DEFAULT_PREBUILT_RULES_DIRS,
+    LOADER_PROCESSES_ENV,
+    RawRuleCollection,
+    RuleCollection,
+    get_loader_processes,
+)
 
 DUPLICATE_NAME = "Duplicate Name Rule"
 ACTIVE_RULE_ID = "11111111-1111-4111-8111-111111111111"
@@ -86,6 +100,202 @@ class TestRawRuleCollectionDeprecatedSplit(unittest.TestCase):
             self.assertEqual(len(collection.deprecated.rules), 1)
 
 
+class TestRuleCollectionParallelLoading(unittest.TestCase):
+    """RuleCollection should load the same rules with worker processes as it does serially."""
+
+    @staticmethod
+    def copy_rules(directory: Path, count: int = 6) -> list[Path]:
+        """Copy a handful of prebuilt rules into a temporary directory."""
+        paths = RuleCollection()._get_paths(DEFAULT_PREBUILT_RULES_DIRS[0])  # noqa: SLF001
+        sources = [path for path in paths if "_deprecated" not in path.parts][:count]
+        for source in sources:
+            _ = shutil.copy(source, directory / source.name)
+        return sorted(directory.glob("*.toml"))
+
+    def test_loader_processes_from_env(self) -> None:
+        """The number of loader processes should default to serial and be configurable from the environment."""
+        with mock.patch.dict(os.environ, {}, clear=False):
+            _ = os.environ.pop(LOADER_PROCESSES_ENV, None)
+            self.assertEqual(get_loader_processes(), 0)
+            self.assertEqual(get_loader_processes(3), 3)
+
+        with mock.patch.dict(os.environ, {LOADER_PROCESSES_ENV: "2"}):
+            self.assertEqual(get_loader_processes(), 2)
+            self.assertEqual(get_loader_processes(0), 0)
+
+        with mock.patch.dict(os.environ, {LOADER_PROCESSES_ENV: "auto"}):
+            self.assertEqual(get_loader_processes(), os.cpu_count() or 1)
+
+    def test_parallel_load_matches_serial_load(self) -> None:
+        """Rules loaded in worker processes should match rules loaded serially."""
+        with TemporaryDirectory() as tmp_dir:
+            tmp = Path(tmp_dir)
+            _ = self.copy_rules(tmp)
+
+            serial = RuleCollection()
+            serial.load_directory(tmp)
+            parallel = RuleCollection(processes=2)
+            parallel.load_directory(tmp)
+
+            self.assertEqual([r.id for r in serial], [r.id for r in parallel])
+            self.assertEqual([r.path for r in serial], [r.path for r in parallel])
+            self.assertEqual(
+                [r.contents.get_hash() for r in serial],
+                [r.contents.get_hash() for r in parallel],
+            )
+
+    def test_parallel_load_detects_collisions(self) -> None:
+        """Rule ID collisions should still be detected when loading in worker processes."""
+        with TemporaryDirectory() as tmp_dir:
+            tmp = Path(tmp_dir)
+            paths = self.copy_rules(tmp, count=2)
+            _ = shutil.copy(paths[0], tmp / f"duplicate_{paths[0].name}")
+
+            with self.assertRaisesRegex(ValueError, "collides with rule"):
+                RuleCollection().load_directory(tmp, processes=2)
+
+    def test_parallel_load_reports_invalid_rule(self) -> None:
+        """Errors raised in a worker process should be raised by the parent collection as they are serially."""
+        with TemporaryDirectory() as tmp_dir:
+            tmp = Path(tmp_dir)
+            _ = self.copy_rules(tmp, count=2)
+            _ = (tmp / "invalid_rule.toml").write_text('[metadata]\nmaturity = "production"\n\n[rule]\nname = "x"\n')
+
+            with self.assertRaises(Exception) as serial_ctx:
+                RuleCollection().load_directory(tmp)
+
+            with self.assertRaises(type(serial_ctx.exception)) as parallel_ctx:
+                RuleCollection(processes=2).load_directory(tmp)
+
+            self.assertEqual(str(serial_ctx.exception), str(parallel_ctx.exception))
+
+
+class TestRuleCollectionCache(unittest.TestCase):
+    """RuleCollection should reuse validated rules from the persistent rule cache."""
+
+    def test_warm_load_skips_validation(self) -> None:
+        """Unchanged rules should be loaded from the cache without being validated again."""
+        with TemporaryDirectory() as rules_dir, TemporaryDirectory() as cache_dir:
+            rules_path = Path(rules_dir)
+            _ = TestRuleCollectionParallelLoading.copy_rules(rules_path, count=3)
+            cache = RuleCache(directory=Path(cache_dir), fingerprint="test")
+
+            cold = RuleCollection(cache=cache)
+            cold.load_directory(rules_path)
+            self.assertEqual(len(list(cache.entries_dir.glob("*.pickle"))), len(cold))
+
+            with mock.patch.object(TOMLRuleContents, "from_dict", side_effect=AssertionError("validated again")):
+                warm = RuleCollection(cache=cache)
+                warm.load_directory(rules_path)
+                parallel_warm = RuleCollection(cache=cache, processes=2)
+                parallel_warm.load_directory(rules_path)
+
+            for collection in (warm, parallel_warm):
+                self.assertEqual([r.id for r in cold], [r.id for r in collection])
+                self.assertEqual(
+                    [r.contents.get_hash() for r in cold],
+                    [r.contents.get_hash() for r in collection],
+                )
+
+    def test_changed_fingerprint_invalidates_entries(self) -> None:
+        """Entries stored for another fingerprint should not be used, and are pruned on the next write."""
+        with TemporaryDirectory() as rules_dir, TemporaryDirectory() as cache_dir:
+            rules_path = Path(rules_dir)
+            paths = TestRuleCollectionParallelLoading.copy_rules(rules_path, count=1)
+            old_cache = RuleCache(directory=Path(cache_dir), fingerprint="old")
+            RuleCollection(cache=old_cache).load_directory(rules_path)
+
+            new_cache = RuleCache(directory=Path(cache_dir), fingerprint="new")
+            self.assertIsNone(new_cache.get(new_cache.file_hash(paths[0])))
+
+            RuleCollection(cache=new_cache).load_directory(rules_path)
+            self.assertFalse(old_cache.entries_dir.exists())
+            self.assertIsNotNone(new_cache.get(new_cache.file_hash(paths[0])))
+
+
+class TestRuleCache(unittest.TestCase):
+    """The rule cache is only an optimization, so failing to store an entry should not fail rule loading."""
+
+    def test_put_errors_are_ignored(self) -> None:
+        """Entries which cannot be written or pickled should be skipped, without leaving temporary files behind."""
+        with TemporaryDirectory() as cache_dir:
+            cache = RuleCache(directory=Path(cache_dir), fingerprint="test")
+            cache.put("unpicklable", lambda: None)  # type: ignore[reportArgumentType]
+            self.assertEqual(list(cache.entries_dir.iterdir()), [])
+            self.assertIsNone(cache.get("unpicklable"))
+
+            with mock.patch.object(Path, "write_bytes", side_effect=OSError("No space left on device")):
+                cache.put("full-disk", {})  # type: ignore[reportArgumentType]
+            self.assertIsNone(cache.get("full-disk"))
+
+        with TemporaryDirectory() as tmp_dir:
+            not_a_dir = Path(tmp_dir) / "cache"
+            _ = not_a_dir.write_text("")
+            RuleCache(directory=not_a_dir, fingerprint="test").put("read-only", {})  # type: ignore[reportArgumentType]
+
+
+class TestAffectedRules(unittest.TestCase):
+    """Only rules affected by the changes since a git ref should be validated again."""
+
+    @staticmethod
+    def build_rules(rules_dir: Path) -> RawRuleCollection:
+        """Build a raw collection with an integration rule and an index-only rule."""
+        collection = RawRuleCollection()
+        integration_rule = build_rule_dict(ACTIVE_RULE_ID, "Integration Rule", "production")
+        integration_rule["metadata"]["integration"] = ["okta"]
+        index_rule = build_rule_dict(DEPRECATED_RULE_ID, "Index Rule", "production")
+        index_rule["rule"]["index"] = ["winlogbeat-*"]
+        _ = collection.load_dict(integration_rule, path=rules_dir / "integration_rule.toml")
+        _ = collection.load_dict(index_rule, path=rules_dir / "index_rule.toml")
+        return collection
+
+    def test_changed_rule_files(self) -> None:
+        """Changed rule files should be affected, while unrelated files should not require a full validation."""
+        with (
+            TemporaryDirectory() as tmp_dir,
+            mock.patch.object(affected_rules, "DEFAULT_PREBUILT_RULES_DIRS", [Path(tmp_dir)]),
+        ):
+            rule_path = Path(tmp_dir, "some_rule.toml").resolve()
+            _ = rule_path.write_text("")
+            affected = get_affected_rules("main", changed_files=[rule_path, Path("/elsewhere/README.md")])
+
+        self.assertFalse(affected.validate_all)
+        self.assertEqual(affected.paths, {rule_path})
+
+    def test_code_changes_affect_all_rules(self) -> None:
+        """Changes to the code or the ECS schemas should require every rule to be validated."""
+        ecs_file = affected_rules.CODE_DIR / "etc" / "ecs_schemas" / "8.0.0" / "ecs_flat.json.gz"
+        affected = get_affected_rules("main", changed_files=[ecs_file])
+        self.assertTrue(affected.validate_all)
+
+    def test_schema_changes_affect_matching_rules(self) -> None:
+        """Rules should be affected by changes to the schemas of their integrations or indices."""
+        rules_dir = DEFAULT_PREBUILT_RULES_DIRS[0].resolve()
+        rules = self.build_rules(rules_dir)
+        schema_file = affected_rules.NON_ECS_SCHEMA_FILE.resolve()
+        old_schema = b'{"winlogbeat-*": {"a": "keyword"}, "logs-*": {"b": "keyword"}}'
+        new_schema = b'{"winlogbeat-*": {"a": "long"}, "logs-*": {"b": "keyword"}}'
+
+        with (
+            mock.patch.object(affected_rules, "git_show_bytes", return_value=old_schema),
+            mock.patch.object(affected_rules, "read_bytes", return_value=new_schema),
+        ):
+            affected = get_affected_rules("main", rules=rules, changed_files=[schema_file])
+
+        self.assertEqual(affected.paths, {rules_dir / "index_rule.toml"})
+
+        lock_file = affected_rules.RULES_CONFIG.version_lock_file.resolve()
+        old_lock = json.dumps({ACTIVE_RULE_ID: {"version": 1}}).encode()
+        new_lock = json.dumps({ACTIVE_RULE_ID: {"version": 2}}).encode()
+        with (
+            mock.patch.object(affected_rules, "git_show_bytes", return_value=old_lock),
+            mock.patch.object(affected_rules, "read_bytes", return_value=new_lock),
+        ):
+            affected = get_affected_rules("main", rules=rules, changed_files=[lock_file])
+
+        self.assertEqual(affected.paths, {rules_dir / "integration_rule.toml"})
+
+
 class TestLoadRuleLoadingFlagBackwardsCompatibility(unittest.TestCase):
     """--load-rule-loading / -lr must keep working as deprecated aliases for --use-existing-rule-dirs."""
 
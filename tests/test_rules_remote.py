@@ -5,20 +5,35 @@
 
 import unittest
 from copy import deepcopy
+from pathlib import Path
+from tempfile import TemporaryDirectory
 from types import SimpleNamespace
 
 import pytest
 
+from detection_rules import misc
+from detection_rules.esql import EventDataset
 from detection_rules.esql_errors import (
     EsqlSchemaError,
     EsqlSemanticError,
     EsqlSyntaxError,
     EsqlTypeMismatchError,
     EsqlUnknownIndexError,
+    cleanup_empty_indices,
 )
+from detection_rules.index_mappings import MappingCache, ValidationIndexPool
 from detection_rules.misc import (
+    ClientRegistry,
     get_default_config,
     getdefault,
+    kibana_options,
+    resolve_option_defaults,
+)
+from detection_rules.remote_validation import (
+    AdaptiveConcurrencyLimiter,
+    RemoteValidationResult,
+    RemoteValidationStore,
+    RemoteValidator,
 )
 from detection_rules.rule import ESQLRuleData
 from detection_rules.rule_loader import RuleCollection
@@ -89,6 +104,204 @@ class TestESQLRemoteValidation(unittest.TestCase):
         self.assertIn("9.3.0", prepared_stack_versions)
 
 
+class TestValidationIndexPool(unittest.TestCase):
+    """Test indices should be shared by rules with the same mappings and deleted together."""
+
+    def setUp(self):
+        self.client = unittest.mock.MagicMock()
+        self.created: list[str] = []
+        self.client.indices.create.side_effect = lambda index, **_: self.created.append(index)
+        self.lookup = {"logs-endpoint.events.process-*": {"process": {"properties": {}}}}
+
+    def test_indices_are_reused(self):
+        """Identical mappings should reuse the same indices, and different mappings create new ones."""
+        with ValidationIndexPool(self.client) as pool:
+            with pool.indices({"a": {"type": "keyword"}}, self.lookup, print) as first:
+                pass
+            with pool.indices({"a": {"type": "keyword"}}, deepcopy(self.lookup), print) as second:
+                pass
+            with pool.indices({"b": {"type": "keyword"}}, self.lookup, print) as third:
+                pass
+
+            self.assertEqual(first, second)
+            self.assertNotEqual(first, third)
+            self.assertEqual((pool.created, pool.reused), (2, 1))
+            self.assertEqual(len(self.created), 4)
+            self.client.indices.delete.assert_not_called()
+
+        [call] = self.client.indices.delete.call_args_list
+        self.assertEqual(sorted(call.kwargs["index"].split(",")), sorted(self.created))
+
+    def test_pooled_indices_survive_cleanup(self):
+        """Empty index cleanup after a failed rule should skip pooled indices."""
+        pool = ValidationIndexPool(self.client)
+        with pool.indices({}, self.lookup, print):
+            pass
+
+        self.client.cat.indices.return_value = [
+            {"index": name, "docs.count": "0"} for name in [*self.created, "test-x"]
+        ]
+        with unittest.mock.patch("detection_rules.esql_errors.getdefault", return_value=lambda: False):
+            cleanup_empty_indices(self.client, index_patterns=("test-*",))
+        self.client.indices.delete.assert_called_once_with(index="test-x")
+
+        pool.cleanup()
+        self.assertEqual(self.client.indices.delete.call_count, 2)
+
+    def test_least_recently_used_indices_are_evicted(self):
+        """Once the pool is full, the least recently used indices not in use should be deleted."""
+        pool = ValidationIndexPool(self.client, max_indices=4)
+        with pool.indices({"a": {}}, self.lookup, print) as first:
+            pass
+        with pool.indices({"b": {}}, self.lookup, print):
+            pass
+        with pool.indices({"c": {}}, self.lookup, print):
+            pass
+
+        [call] = self.client.indices.delete.call_args_list
+        self.assertEqual(call.kwargs["index"], first.replace(" ", ""))
+        pool.cleanup()
+
+
+class TestMappingCache(unittest.TestCase):
+    """Mappings should be prepared once for every rule and stack version needing the same ones."""
+
+    def setUp(self):
+        self.client = unittest.mock.MagicMock()
+        self.client.info.return_value = {"cluster_uuid": "uuid", "version": {"number": "9.2.0"}}
+        self.prepared: list[str] = []
+
+        def prepare_mappings(_client, indices, _event_datasets, _metadata, stack_version, _log):
+            self.prepared.append(stack_version)
+            return {"a": {"type": "keyword"}}, {indices[0]: {}}, {"b": {"type": stack_version}}
+
+        patcher = unittest.mock.patch("detection_rules.index_mappings.prepare_mappings", side_effect=prepare_mappings)
+        _ = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def prepare(self, cache: MappingCache, stack_version: str, integration: str = "aws"):
+        metadata = SimpleNamespace(integration=[integration])
+        event_datasets = [EventDataset("aws", "cloudtrail")]
+        return cache.prepare(self.client, ["logs-aws.*"], event_datasets, metadata, stack_version, print)
+
+    def test_mappings_are_reused(self):
+        """The same rule inputs and stack version should reuse the mappings, and any change prepare them again."""
+        cache = MappingCache()
+        first = self.prepare(cache, "9.2.0")
+        self.assertIs(self.prepare(cache, "9.2.0"), first)
+        _ = self.prepare(cache, "9.3.0")
+        _ = self.prepare(cache, "9.2.0", integration="gcp")
+
+        self.assertEqual(self.prepared, ["9.2.0", "9.3.0", "9.2.0"])
+        self.assertEqual((cache.misses, cache.hits), (3, 1))
+        self.client.info.assert_called_once()
+
+    def test_mappings_are_persisted(self):
+        """Persisted mappings should be loaded by a new cache, until cleared."""
+        with TemporaryDirectory() as tmp_dir:
+            first = self.prepare(MappingCache(Path(tmp_dir)), "9.2.0")
+            cache = MappingCache(Path(tmp_dir))
+            self.assertEqual(self.prepare(cache, "9.2.0"), first)
+            self.assertEqual(self.prepared, ["9.2.0"])
+
+            cache.clear()
+            _ = self.prepare(MappingCache(Path(tmp_dir)), "9.2.0")
+            self.assertEqual(self.prepared, ["9.2.0", "9.2.0"])
+
+
+class TestRemoteValidationStore(unittest.TestCase):
+    """Unit tests for skipping unchanged rules and backing off during remote validation."""
+
+    @staticmethod
+    def make_rule(rule_id: str, rule_hash: str):
+        data = SimpleNamespace(rule_id=rule_id, type="esql")
+        return SimpleNamespace(contents=SimpleNamespace(data=data, get_hash=lambda **_: rule_hash))
+
+    @staticmethod
+    def make_result(rule_id: str) -> RemoteValidationResult:
+        return RemoteValidationResult(rule_id, "name", {}, 1, "9.2.0", {"columns": []}, {"isAborted": False})
+
+    def test_validate_rules_skips_stored_results(self):
+        """Only rules whose content, stack version or schemas changed should be validated again."""
+        rules = [self.make_rule("rule-1", "hash-1"), self.make_rule("rule-2", "hash-2")]
+        validated: list[str] = []
+
+        def validate_rule(contents):
+            validated.append(contents.data.rule_id)
+            return self.make_result(contents.data.rule_id)
+
+        with TemporaryDirectory() as tmp_dir:
+            store = RemoteValidationStore(Path(tmp_dir))
+            validator = RemoteValidator()
+            validator.remote_stack_version = "9.2.0"
+            with unittest.mock.patch.object(validator, "validate_rule", side_effect=validate_rule):
+                _ = validator.validate_rules(rules, threads=2, store=store)
+                self.assertEqual(sorted(validated), ["rule-1", "rule-2"])
+
+                validated.clear()
+                rules[1] = self.make_rule("rule-2", "hash-2-changed")
+                results = validator.validate_rules(rules, threads=2, store=store)
+                self.assertEqual(validated, ["rule-2"])
+                self.assertEqual(results["rule-1"], self.make_result("rule-1"))
+
+                validated.clear()
+                validator.remote_stack_version = "9.3.0"
+                _ = validator.validate_rules(rules, threads=2, store=store)
+                self.assertEqual(sorted(validated), ["rule-1", "rule-2"])
+
+            [summary] = validator.latencies.summary()
+            self.assertEqual((summary["rule_type"], summary["validated"], summary["cached"]), ("esql", 5, 1))
+
+    def test_adaptive_concurrency(self):
+        """The limit should be halved on backoff and grow back one step at a time."""
+        limiter = AdaptiveConcurrencyLimiter(8)
+        limiter.backoff()
+        limiter.backoff()
+        self.assertEqual(limiter.limit, 2)
+        for _ in range(2):
+            limiter.success()
+        self.assertEqual(limiter.limit, 3)
+        for _ in range(100):
+            limiter.success()
+        self.assertEqual(limiter.limit, 8)
+
+
+class TestClientRegistry(unittest.TestCase):
+    """Clients should be authenticated once per set of options and shared until they are closed."""
+
+    def test_clients_are_shared(self):
+        """The same options should get the same clients, and the Kibana status should only be requested once."""
+        registry = ClientRegistry()
+        with (
+            unittest.mock.patch.object(misc, "get_elasticsearch_client", side_effect=lambda **_: unittest.mock.Mock()),
+            unittest.mock.patch.object(misc, "get_kibana_client", side_effect=lambda **_: unittest.mock.Mock()),
+        ):
+            url = "http://localhost:9200"
+            elastic_client = registry.get_elasticsearch_client(elasticsearch_url=url, timeout=60)
+            self.assertIs(registry.get_elasticsearch_client(timeout=60, elasticsearch_url=url), elastic_client)
+            self.assertIsNot(registry.get_elasticsearch_client(elasticsearch_url=url), elastic_client)
+
+            kibana_client = registry.get_kibana_client(kibana_url="http://localhost:5601", api_key="key")
+            self.assertIs(registry.get_kibana_client(kibana_url="http://localhost:5601", api_key="key"), kibana_client)
+
+        kibana_client.status = None
+        kibana_client.get.return_value = {"version": {"number": "9.2.0"}}
+        for _ in range(3):
+            self.assertEqual(registry.get_kibana_status(kibana_client), {"version": {"number": "9.2.0"}})
+        kibana_client.get.assert_called_once_with("/api/status", {})
+
+        registry.close()
+        elastic_client.close.assert_called_once_with()
+        kibana_client.session.close.assert_called_once_with()
+
+    def test_option_defaults_are_converted(self):
+        """Defaults from the environment should be converted to the option types."""
+        with unittest.mock.patch.dict("os.environ", {"DR_MAX_RETRIES": "2", "DR_POOL_MAXSIZE": "20"}):
+            defaults = resolve_option_defaults(kibana_options)
+        self.assertEqual(defaults["max_retries"], 2)
+        self.assertEqual(defaults["pool_maxsize"], 20)
+
+
 @unittest.skipIf(get_default_config() is None, "Skipping remote validation due to missing config")
 @unittest.skipIf(
     not getdefault("remote_esql_validation")(), "Skipping remote validation because remote_esql_validation is False"
@@ -0,0 +1,108 @@
+# Copyright Elasticsearch B.V. and/or licensed to Elasticsearch B.V. under one
+# or more contributor license agreements. Licensed under the Elastic License
+# 2.0; you may not use this file except in compliance with the Elastic License
+# 2.0.
+
+"""Test the precompiled schema store."""
+
+import os
+import unittest
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import mock
+
+from detection_rules import beats, ecs, endgame
+from detection_rules.schema_store import KEY_SEP, SCHEMA_STORE_DIR_ENV, SchemaStore, get_schema_store
+
+
+class TestSchemaStore(unittest.TestCase):
+    """Test building and memory-mapping schema indexes."""
+
+    def test_index_lookups(self):
+        """Test lookups, iteration and composite key views of an index."""
+        fields = {
+            KEY_SEP.join(("filebeat", "", "", "message")): "text",
+            KEY_SEP.join(("filebeat", "aws", "", "aws.region")): "keyword",
+            KEY_SEP.join(("filebeat", "aws", "s3", "aws.s3.bucket")): "keyword",
+            KEY_SEP.join(("filebeat", "aws", "s3", "aws.s3.size")): "long",
+            KEY_SEP.join(("filebeat", "azure", "", "azure.tenant")): "keyword",
+            KEY_SEP.join(("winlogbeat", "", "", "winlog.event_id")): "keyword",
+        }
+
+        with TemporaryDirectory() as tmp_dir:
+            source = Path(tmp_dir, "source.json.gz")
+            _ = source.write_bytes(b"{}")
+            store = SchemaStore(Path(tmp_dir))
+            _ = store.save("beats", "1.0.0", source, fields)
+
+            index = store.load("beats", "1.0.0", source)
+            self.assertIsNotNone(index)
+            self.assertEqual(index.to_dict(), fields)
+            self.assertEqual(dict(index.items()), fields)
+            self.assertEqual(len(index), len(fields))
+            self.assertIsNone(index.get("missing"))
+
+            filebeat = index.subset("filebeat")
+            self.assertEqual(filebeat.children(), ["", "aws", "azure"])
+            self.assertEqual(filebeat.subset("", "").to_dict(), {"message": "text"})
+            self.assertEqual(filebeat.subset("aws").children(), ["", "s3"])
+            self.assertEqual(filebeat.subset("aws", "s3")["aws.s3.size"], "long")
+            self.assertNotIn("aws.s3.size", filebeat.subset("aws", ""))
+            self.assertEqual(len(index.subset("packetbeat")), 0)
+
+    def test_stale_index(self):
+        """Test that an index is ignored once its source file changes."""
+        with TemporaryDirectory() as tmp_dir:
+            source = Path(tmp_dir, "source.json.gz")
+            _ = source.write_bytes(b"{}")
+            store = SchemaStore(Path(tmp_dir))
+            _ = store.save("endgame", "1.0.0", source, {"process.name": "keyword"})
+            self.assertIsNotNone(store.load("endgame", "1.0.0", source))
+
+            _ = source.write_bytes(b'{"process.name": "keyword"}')
+            self.assertIsNone(store.load("endgame", "1.0.0", source))
+            self.assertIsNone(store.load("endgame", "2.0.0", source))
+
+    def test_stale_index_same_size_and_mtime(self):
+        """Test that an index is ignored when its source content changes without a change in size or mtime."""
+        with TemporaryDirectory() as tmp_dir:
+            source = Path(tmp_dir, "source.json.gz")
+            _ = source.write_bytes(b'{"a": 1}')
+            stat = source.stat()
+            store = SchemaStore(Path(tmp_dir))
+            _ = store.save("endgame", "1.0.0", source, {"process.name": "keyword"})
+
+            _ = source.write_bytes(b'{"b": 2}')
+            os.utime(source, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+            self.assertIsNone(store.load("endgame", "1.0.0", source))
+
+    def test_schemas_match_sources(self):
+        """Test that the indexes of the bundled schemas match the schemas they are built from."""
+        ecs_version = ecs.get_max_version()
+        beats_version = beats.get_max_version()
+        endgame_version = sorted(p.name for p in endgame.ENDGAME_SCHEMA_DIR.iterdir() if p.is_dir())[-1]
+        expected_kql = ecs.get_kql_schema(version=ecs_version, indexes=["logs-*"])
+        expected_beats = beats.get_schema_from_datasets(["filebeat"], {"aws"}, set(), version=beats_version)
+        expected_endgame = dict(endgame.read_endgame_schema(endgame_version))
+
+        with TemporaryDirectory() as tmp_dir, mock.patch.dict(os.environ, {SCHEMA_STORE_DIR_ENV: tmp_dir}):
+            self.assertEqual(get_schema_store().directory, Path(tmp_dir))
+            _ = ecs.build_schema_index(ecs_version)
+            _ = beats.build_schema_index(beats_version)
+            _ = endgame.build_schema_index(endgame_version)
+
+            try:
+                self.assertIsNotNone(ecs.get_schema_index(ecs_version))
+                kql_schema = ecs.get_kql_schema.__wrapped__(version=ecs_version, indexes=["logs-*"])
+                self.assertEqual(kql_schema, expected_kql)
+
+                beats_schema = beats.get_schema_from_datasets.__wrapped__(
+                    ["filebeat"], {"aws"}, set(), version=beats_version
+                )
+                self.assertEqual(ecs.flatten_multi_fields(beats_schema), ecs.flatten_multi_fields(expected_beats))
+
+                self.assertEqual(dict(endgame.read_endgame_schema(endgame_version)), expected_endgame)
+            finally:
+                ecs.get_schema_index.clear()
+                beats.get_schema_index.clear()
+                endgame.read_endgame_schema.clear()
@@ -11,16 +11,18 @@ import unittest
 import unittest.mock
 import uuid
 from pathlib import Path
-from typing import Any
+from types import SimpleNamespace
+from typing import Any, ClassVar
 
 import eql
 import pytest
 from marshmallow import ValidationError
 from semver import Version
 
-from detection_rules import utils
+from detection_rules import ecs, rule_validators, utils
 from detection_rules.config import load_current_package_version
-from detection_rules.esql_errors import EsqlSemanticError
+from detection_rules.esql import analyze_esql_query
+from detection_rules.esql_errors import EsqlSchemaError, EsqlSemanticError
 from detection_rules.rule import TOMLRuleContents
 from detection_rules.rule_loader import RuleCollection
 from detection_rules.schemas import RULES_CONFIG, downgrade
@@ -255,6 +257,55 @@ class TestSchemas(unittest.TestCase):
                     process where process.pid == "some string field"
             """)
 
+    def test_eql_validation_cached(self):
+        """Test that rules with the same query and schemas share validation outcomes, but not error trailers."""
+
+        def build_rule(name, query):
+            metadata = {
+                "creation_date": "1970/01/01",
+                "updated_date": "1970/01/01",
+                "min_stack_version": load_current_package_version(),
+            }
+            data = {
+                "author": ["Elastic"],
+                "description": "test description",
+                "index": ["filebeat-*"],
+                "language": "eql",
+                "license": "Elastic License v2",
+                "name": name,
+                "risk_score": 21,
+                "rule_id": str(uuid.uuid4()),
+                "severity": "low",
+                "type": "eql",
+                "query": query,
+            }
+            return TOMLRuleContents.from_dict({"metadata": metadata, "rule": data})
+
+        rule_validators.parse_eql_with_schema.clear()
+        _ = build_rule("first rule", 'process where process.name == "cmd.exe"')
+        misses = rule_validators.parse_eql_with_schema.cache_stats().misses
+        self.assertGreater(misses, 0)
+
+        _ = build_rule("second rule", 'process where process.name == "cmd.exe"')
+        self.assertEqual(rule_validators.parse_eql_with_schema.cache_stats().misses, misses)
+
+        for name in ("first rule", "second rule"):
+            with self.assertRaisesRegex(eql.EqlSemanticError, name):
+                _ = build_rule(name, 'process where process.invalid_field == "hello world"')
+
+    def test_integration_schema_key(self):
+        """Integration schemas should be keyed by the packages, versions and indices they are built from."""
+        data: Any = SimpleNamespace(index=["logs-*"], index_or_dataview=["logs-*"])
+        integration = {"package": "aws", "integration": "cloudtrail", "package_version": "2.0.0", "ecs_version": "8.11"}
+        key = rule_validators.integration_schema_key(data, "9.0.0", [integration])
+
+        self.assertEqual(rule_validators.integration_schema_key(data, "9.0.0", [dict(integration)]), key)
+        newer = {**integration, "package_version": "2.1.0"}
+        self.assertNotEqual(rule_validators.integration_schema_key(data, "9.0.0", [newer]), key)
+        self.assertNotEqual(rule_validators.integration_schema_key(data, "9.1.0", [integration]), key)
+        other_index: Any = SimpleNamespace(index=["logs-aws*"], index_or_dataview=["logs-aws*"])
+        self.assertNotEqual(rule_validators.integration_schema_key(other_index, "9.0.0", [integration]), key)
+
     def test_empty_kuery_with_filters_is_valid_for_custom_rules(self):
         """Filter-only KQL custom rules can load without a query (issue #6167)."""
         metadata = {
@@ -844,6 +895,18 @@ class TestVersions(unittest.TestCase):
         err_msg = f"There is no entry defined for the current package ({package_version}) in the stack-schema-map"
         self.assertIn(package_version, [Version.parse(v) for v in stack_map], err_msg)
 
+    def test_ecs_schema_loaded_per_version(self):
+        """Test that an ECS schema is loaded without loading every other version."""
+        latest = max(Version.parse(v) for v in ecs.get_schema_map() if not v.startswith("master"))
+        self.assertEqual(ecs.get_max_version(), str(latest))
+
+        with unittest.mock.patch.object(ecs, "get_schemas", side_effect=AssertionError("loaded every version")):
+            schema = ecs.get_schema.__wrapped__(str(latest))
+
+        self.assertEqual(schema["process.name"]["type"], "keyword")
+        with self.assertRaises(KeyError):
+            ecs.get_schema.__wrapped__("0.0.1")
+
 
 class TestESQLValidation(unittest.TestCase):
     """Test ESQL rule validation"""
@@ -853,7 +916,10 @@ class TestESQLValidation(unittest.TestCase):
         # These cases exercise local AST/semantic validation (KEEP/METADATA checks). Routing them
         # through remote validation is possible, but the explicit goal of these is to use local vs remote,
         # so we patch the environment variable to force local validation regardless of other settings.
-        patcher = unittest.mock.patch.dict(os.environ, {"DR_REMOTE_ESQL_VALIDATION": ""})
+        # Their queries are not checked against the mappings, except by the schema validation tests.
+        patcher = unittest.mock.patch.dict(
+            os.environ, {"DR_REMOTE_ESQL_VALIDATION": "", "DR_BYPASS_ESQL_SCHEMA_VALIDATION": "1"}
+        )
         patcher.start()
         self.addCleanup(patcher.stop)
 
@@ -980,3 +1046,89 @@ class TestESQLValidation(unittest.TestCase):
         rule_dict["rule"]["query"] = query
         with unittest.mock.patch.dict(os.environ, {"DR_BYPASS_ESQL_KEEP_VALIDATION": "1"}):
             _ = RuleCollection().load_dict(rule_dict, path=rule_path)
+
+    def test_esql_schema_validation(self):
+        """ES|QL fields are checked against the local mappings of the query indices."""
+        rule_path = Path("tests/data/command_control_dummy_production_rule.toml")
+        rule_dict = RuleCollection.deserialize_toml_string(rule_path.read_text())
+        query = """
+            FROM logs-endpoint.events.process-* METADATA _id, _version, _index
+            | WHERE process.name == "cmd.exe"
+            | EVAL Esql.parent_name = TO_LOWER(process.parent.name)
+            | KEEP process.name, Esql.parent_name, _id, _version, _index
+        """
+        with unittest.mock.patch.dict(os.environ):
+            del os.environ["DR_BYPASS_ESQL_SCHEMA_VALIDATION"]
+            rule_dict["rule"]["query"] = query
+            _ = RuleCollection().load_dict(rule_dict, path=rule_path)
+
+            rule_dict["rule"]["query"] = query.replace("process.parent.name", "process.parent.not_a_field")
+            with pytest.raises(EsqlSchemaError, match=r"process\.parent\.not_a_field"):
+                _ = RuleCollection().load_dict(rule_dict, path=rule_path)
+
+
+class TestESQLQueryAnalysis(unittest.TestCase):
+    """Test resolving the fields and columns of ES|QL queries against index mappings."""
+
+    mappings: ClassVar[dict[str, Any]] = {
+        "@timestamp": {"type": "date"},
+        "host": {"properties": {"name": {"type": "keyword"}}},
+        "process": {
+            "properties": {
+                "command_line": {"type": "wildcard"},
+                "name": {"type": "keyword"},
+                "pid": {"type": "long"},
+            }
+        },
+    }
+
+    def test_unknown_fields(self):
+        """Fields should be unknown if they are not mapped, or no longer available as columns."""
+        query = """
+            FROM logs-endpoint.events.process-* METADATA _id, _version, _index // a | in a comment
+            | WHERE process.nme == "cmd.exe" AND process.command_line.text LIKE "*|*"
+            | DROP process.pid
+            | STATS Esql.count = COUNT(*) WHERE process.pid > 0 BY host.name
+            | WHERE Esql.count > 1 AND process.name == "cmd.exe"
+            | KEEP Esql.*, host.name
+        """
+        analysis = analyze_esql_query(query, self.mappings)
+        self.assertEqual(analysis.sources, ["logs-endpoint.events.process-*"])
+        self.assertEqual(analysis.unknown_fields, ["process.nme", "process.pid", "process.name"])
+        self.assertTrue(analysis.complete)
+
+    def test_columns(self):
+        """Columns created by the query should be typed from their expressions where possible."""
+        query = """
+            FROM logs-endpoint.events.process-*
+            | EVAL Esql.name = TO_LOWER(process.name), Esql.length = LENGTH(Esql.name), process.pid = "1"
+            | GROK process.command_line "%{WORD:Esql.verb} (?<Esql.target>.+)"
+            | DISSECT process.command_line "%{?skipped} %{Esql.argument}"
+            | RENAME Esql.verb AS Esql.action
+            | STATS Esql.count = COUNT(*), Esql.pids = VALUES(process.pid)
+                BY host.name, Esql.action, Esql.target, Esql.argument, Esql.bucket = BUCKET(@timestamp, 1 hour)
+        """
+        analysis = analyze_esql_query(query, self.mappings)
+        self.assertEqual(analysis.unknown_fields, [])
+        self.assertEqual(
+            analysis.columns,
+            [
+                {"name": "Esql.count", "type": "long"},
+                {"name": "Esql.pids", "type": "keyword"},
+                {"name": "host.name", "type": "keyword"},
+                {"name": "Esql.action", "type": "keyword"},
+                {"name": "Esql.target", "type": "keyword"},
+                {"name": "Esql.argument", "type": "keyword"},
+            ],
+        )
+
+    def test_incomplete(self):
+        """Fields should not be reported as unknown after commands adding columns which cannot be known locally."""
+        query = """
+            FROM logs-endpoint.events.process-*
+            | LOOKUP JOIN threat-intel ON host.nam
+            | WHERE threat.indicator.name IS NOT NULL
+        """
+        analysis = analyze_esql_query(query, self.mappings)
+        self.assertEqual(analysis.unknown_fields, ["host.nam"])
+        self.assertFalse(analysis.complete)
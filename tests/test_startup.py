@@ -0,0 +1,111 @@
+# Copyright Elasticsearch B.V. and/or licensed to Elasticsearch B.V. under one
+# or more contributor license agreements. Licensed under the Elastic License
+# 2.0; you may not use this file except in compliance with the Elastic License
+# 2.0.
+
+"""Tests for the CLI startup time and import profiling."""
+
+import os
+import pkgutil
+import subprocess
+import sys
+import unittest
+
+import click
+
+import detection_rules
+from detection_rules.import_profile import TOTAL_STAGE, StageProfile, check_budgets, profile_imports
+from detection_rules.main import LAZY_COMMANDS, root
+
+IMPORT_TIME_BUDGET_ENV = "DR_IMPORT_TIME_BUDGET"
+LAZY_MODULES = (
+    "detection_rules.custom_rules",
+    "detection_rules.devtools",
+    "detection_rules.docs",
+    "detection_rules.eswrap",
+    "detection_rules.ghwrap",
+    "detection_rules.kbwrap",
+    "detection_rules.ml",
+    "github",
+    "xlsxwriter",
+)
+
+
+def import_time(module: str) -> dict[str, int]:
+    """Import a module in a fresh interpreter and get the cumulative import time of each module, in microseconds."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        check=True,
+        text=True,
+    )
+
+    timings: dict[str, int] = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.removeprefix("import time:").split("|")
+        timings[name.strip()] = int(cumulative)
+    return timings
+
+
+class TestLazyCommands(unittest.TestCase):
+    """Subcommand modules should only be imported when their commands are invoked."""
+
+    def test_import_time(self) -> None:
+        """Importing the CLI should not load any subcommand module, and stay within the time budget if one is set."""
+        timings = import_time("detection_rules.main")
+        self.assertFalse([m for m in LAZY_MODULES if m in timings])
+
+        if not os.getenv(IMPORT_TIME_BUDGET_ENV):
+            return
+
+        budget = float(os.environ[IMPORT_TIME_BUDGET_ENV])
+        elapsed = (timings["detection_rules"] + timings["detection_rules.main"]) / 1e6
+        self.assertLess(elapsed, budget, f"importing the CLI took {elapsed:.2f}s, budget is {budget:.2f}s")
+
+    def test_lazy_commands(self) -> None:
+        """Lazy commands should be listed, load on demand and have the help registered for them."""
+        ctx = click.Context(root)
+        self.assertTrue(set(LAZY_COMMANDS).issubset(root.list_commands(ctx)))
+
+        for name, (_, short_help) in LAZY_COMMANDS.items():
+            command = root.get_command(ctx, name)
+            assert command is not None, name
+            self.assertEqual(command.get_short_help_str(limit=len(short_help)), short_help)
+
+
+class TestModuleImports(unittest.TestCase):
+    """Every module should be importable on its own, without relying on another import to break a cycle."""
+
+    def test_import_modules(self) -> None:
+        """Import each module in a fresh interpreter."""
+        modules = pkgutil.walk_packages(detection_rules.__path__, f"{detection_rules.__name__}.")
+        for module in sorted(m.name for m in modules if not m.name.endswith(".__main__")):
+            with self.subTest(module=module):
+                result = subprocess.run(
+                    [sys.executable, "-c", f"import {module}"],
+                    capture_output=True,
+                    check=False,
+                    text=True,
+                )
+                self.assertEqual(result.returncode, 0, result.stderr)
+
+
+class TestImportProfile(unittest.TestCase):
+    """Import profiles should time each stage in a fresh interpreter and check budgets."""
+
+    def test_profile_imports(self) -> None:
+        """Each requested stage should be profiled, in order."""
+        profiles = profile_imports(["kql", "rules_config"], rounds=2)
+        self.assertEqual([p.name for p in profiles], ["kql", "rules_config"])
+        self.assertTrue(all(p.seconds > 0 for p in profiles))
+
+    def test_check_budgets(self) -> None:
+        """Stages and the total should be reported only when over their budget."""
+        profiles = [StageProfile("kql", 0.5), StageProfile("attack", 1.0)]
+        self.assertEqual(check_budgets(profiles, {"kql": 1.0, TOTAL_STAGE: 2.0}), [])
+        self.assertEqual(
+            check_budgets(profiles, {"attack": 0.5, TOTAL_STAGE: 1.0}),
+            ["attack took 1.000s, budget is 0.500s", "total took 1.500s, budget is 1.000s"],
+        )
@@ -5,6 +5,7 @@
 
 """Tests for multi-version threat mappings (e.g. MITRE ATT&CK v18/v19) support."""
 
+import json
 import os
 import unittest
 from pathlib import Path
@@ -20,6 +21,7 @@ from detection_rules.config import (
 )
 from detection_rules.rule_loader import RuleCollection
 from detection_rules.stack_emit import MITRE_V19_MIN_STACK
+from detection_rules.utils import gzip_compress
 
 TACTIC = {
     "id": "TA0001",
@@ -678,5 +680,107 @@ class TestIdentityScaffold(unittest.TestCase):
                 )
 
 
+class TestAttackIndex(unittest.TestCase):
+    """ATT&CK lookups should be built from the lookup index, and match those built from the full data."""
+
+    @staticmethod
+    def technique(technique_id: str, name: str, *phases: str, **fields: Any) -> dict[str, Any]:
+        return {
+            "type": "attack-pattern",
+            "name": name,
+            "description": "Not kept in the index.",
+            "external_references": [{"source_name": "mitre-attack", "external_id": technique_id}],
+            "kill_chain_phases": [{"kill_chain_name": "mitre-attack", "phase_name": phase} for phase in phases],
+            **fields,
+        }
+
+    def setUp(self) -> None:
+        tactic_refs = [{"source_name": "mitre-attack", "external_id": "TA0001"}]
+        self.raw: dict[str, Any] = {
+            "objects": [
+                {"type": "x-mitre-tactic", "name": "Initial Access", "external_references": tactic_refs},
+                self.technique("T1078", "Valid Accounts", "initial-access"),
+                self.technique("T1078.001", "Default Accounts", "initial-access"),
+                self.technique("T1000", "Revoked Technique", "initial-access", revoked=True),
+                {"type": "malware", "name": "Not kept in the index"},
+            ]
+        }
+
+    def test_index_lookups(self) -> None:
+        """The index should only keep tactics and techniques, and give the same lookups as the full data."""
+        with TemporaryDirectory() as tmp:
+            path = Path(tmp) / "attack-v18.1.json.gz"
+            _ = path.write_bytes(gzip_compress(json.dumps(self.raw)))
+
+            index_path = attack.save_attack_index(path, self.raw)
+            self.assertEqual(index_path.name, "attack-v18.1.index.json")
+            index = attack.load_attack_index(path)
+            self.assertEqual(len(index["objects"]), 4)
+            self.assertNotIn("description", index["objects"][1])
+
+            expected = attack._build_lookups("18.1", self.raw)  # noqa: SLF001
+            lookups = attack._build_lookups("18.1", index)  # noqa: SLF001
+            self.assertEqual(lookups.tactics_map, expected.tactics_map)
+            self.assertEqual(lookups.matrix, {"Initial Access": ["T1078.001", "T1000", "T1078"]})
+            self.assertEqual(list(lookups.revoked), ["T1000"])
+            self.assertEqual(
+                {tid: t["name"] for tid, t in lookups.technique_lookup.items()},
+                {tid: t["name"] for tid, t in expected.technique_lookup.items()},
+            )
+
+    def test_stale_index(self) -> None:
+        """An index should be ignored once its data file is replaced."""
+        with TemporaryDirectory() as tmp:
+            path = Path(tmp) / "attack-v18.1.json.gz"
+            _ = path.write_bytes(gzip_compress(json.dumps(self.raw)))
+            _ = attack.save_attack_index(path, self.raw)
+
+            self.raw["objects"].append(self.technique("T1133", "External Remote Services", "initial-access"))
+            _ = path.write_bytes(gzip_compress(json.dumps(self.raw)))
+            attack.load_attack_index.clear()  # type: ignore[reportFunctionMemberAccess]
+
+            lookups = attack._build_lookups("18.1", attack.load_attack_index(path))  # noqa: SLF001
+            self.assertIn("T1133", lookups.technique_lookup)
+
+            # the rebuilt index replaces the stale one
+            index = json.loads(attack.get_attack_index_path(path).read_text())
+            self.assertEqual(index["source"], attack.get_attack_source(path))
+            self.assertEqual(len(index["objects"]), 5)
+
+    def test_missing_index(self) -> None:
+        """A missing index should be built from the full data and saved next to it."""
+        with TemporaryDirectory() as tmp:
+            path = Path(tmp) / "attack-v18.1.json.gz"
+            _ = path.write_bytes(gzip_compress(json.dumps(self.raw)))
+            attack.load_attack_index.clear()  # type: ignore[reportFunctionMemberAccess]
+
+            index = attack.load_attack_index(path)
+            self.assertEqual(json.loads(attack.get_attack_index_path(path).read_text()), index)
+            self.assertEqual(sorted(p.name for p in Path(tmp).iterdir()), ["attack-v18.1.index.json", path.name])
+
+            # saving is skipped when the directory is not writable
+            attack.load_attack_index.clear()  # type: ignore[reportFunctionMemberAccess]
+            attack.get_attack_index_path(path).unlink()
+            with mock.patch.object(Path, "write_text", side_effect=PermissionError):
+                self.assertEqual(attack.load_attack_index(path), index)
+            self.assertFalse(attack.get_attack_index_path(path).exists())
+
+    def test_stale_index_same_size(self) -> None:
+        """An index should be ignored when its data file digest changed, even if the name and size did not."""
+        with TemporaryDirectory() as tmp:
+            path = Path(tmp) / "attack-v18.1.json.gz"
+            _ = path.write_bytes(gzip_compress(json.dumps(self.raw)))
+            index_path = attack.save_attack_index(path, self.raw)
+
+            # an index of other data, for a file of the same name and size
+            index = json.loads(index_path.read_text())
+            index["source"]["sha256"] = "0" * 64
+            index["objects"] = []
+            _ = index_path.write_text(json.dumps(index))
+            attack.load_attack_index.clear()  # type: ignore[reportFunctionMemberAccess]
+
+            self.assertEqual(len(attack.load_attack_index(path)["objects"]), 4)
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -5,13 +5,14 @@
 
 """Test util time functions."""
 
+import gc
 import random
 import time
 import unittest
 
 from detection_rules.ecs import get_kql_schema
 from detection_rules.eswrap import Events
-from detection_rules.utils import cached, normalize_timing_and_sort
+from detection_rules.utils import FREEZE_MAX_ITEMS, cached, clear_caches, get_cache_stats, normalize_timing_and_sort
 
 
 class TestTimeUtils(unittest.TestCase):
@@ -102,3 +103,86 @@ class TestTimeUtils(unittest.TestCase):
         self.assertEqual(increment(), 6)
         self.assertEqual(increment(None), 7)
         self.assertEqual(increment(1), 8)
+
+    def test_caching_lru(self):
+        """Test that caches are bounded and evict the least recently used entry."""
+        calls = []
+
+        @cached(maxsize=2)
+        def square(value):
+            calls.append(value)
+            return value * value
+
+        self.assertEqual(square(2), 4)
+        self.assertEqual(square(3), 9)
+        self.assertEqual(square(2), 4)
+        self.assertEqual(square(4), 16)
+        self.assertEqual(square(2), 4)
+        self.assertEqual(square(3), 9)
+        self.assertEqual(calls, [2, 3, 4, 3])
+
+        stats = square.cache_stats()
+        self.assertEqual((stats.hits, stats.misses, stats.evictions), (2, 4, 2))
+        self.assertEqual((stats.currsize, stats.maxsize), (2, 2))
+        self.assertIn(stats.name, [s.name for s in get_cache_stats()])
+
+        clear_caches()
+        self.assertEqual(square.cache_stats().currsize, 0)
+
+    def test_caching_keys(self):
+        """Test that unhashable arguments are keyed by value, except for large dicts."""
+        counter = 0
+
+        @cached
+        def increment(*args, **kwargs):
+            nonlocal counter
+
+            counter += 1
+            return counter
+
+        self.assertEqual(increment(1, a=2), 1)
+        self.assertEqual(increment(1, 2), 2)
+        self.assertEqual(increment({"a", "b"}), 3)
+        self.assertEqual(increment({"b", "a"}), 3)
+
+        large = {str(i): [i] for i in range(FREEZE_MAX_ITEMS + 1)}
+        self.assertEqual(increment(large), 4)
+        self.assertEqual(increment(large), 4)
+        self.assertEqual(increment(dict(large)), 5)
+
+    def test_caching_key_function(self):
+        """Test that a key function can key arguments by value where they would otherwise be keyed by identity."""
+        calls = []
+
+        @cached(key=lambda mapping: frozenset(mapping.items()))
+        def size(mapping):
+            calls.append(mapping)
+            return len(mapping)
+
+        large = {str(i): i for i in range(FREEZE_MAX_ITEMS + 1)}
+        self.assertEqual(size(large), FREEZE_MAX_ITEMS + 1)
+        self.assertEqual(size(dict(large)), FREEZE_MAX_ITEMS + 1)
+        self.assertEqual(size({"a": 1}), 1)
+        self.assertEqual(len(calls), 2)
+
+    def test_caching_methods(self):
+        """Test that methods are cached per instance without keeping the instance alive."""
+
+        class Counter:
+            calls = 0
+
+            @cached
+            def get(self, value):
+                Counter.calls += 1
+                return value
+
+        first, second = Counter(), Counter()
+        self.assertEqual(first.get([1]), [1])
+        self.assertEqual(first.get([1]), [1])
+        self.assertEqual(second.get([1]), [1])
+        self.assertEqual(Counter.calls, 2)
+        self.assertEqual(Counter.get.cache_stats().currsize, 2)
+
+        del first, second
+        gc.collect()
+        self.assertEqual(Counter.get.cache_stats().currsize, 0)